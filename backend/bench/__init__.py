@@ -0,0 +1,3 @@
+"""
+Outils de mesure des performances du backend.
+"""
@@ -0,0 +1,286 @@
+"""
+Test de charge des tableaux de bord des professeurs (routes HTTP).
+
+Chaque professeur ouvre plusieurs fois son tableau de bord : les requêtes GET de la page (profil, questionnaires,
+banque de questions, modèles de session, sessions lancées, groupes) partent en même temps, comme depuis un
+navigateur. Les requêtes sont envoyées directement à l'application ASGI, sans passer par le réseau.
+
+Deux implémentations des mêmes routes sont comparées :
+
+- async : les routes de l'application, sur le moteur asyncrone (boucle d'évènements, un seul pool) ;
+- sync : les mêmes routes écrites comme avant, sur le moteur synchrone, chaque requête occupant
+  un thread du pool de Starlette et une connexion d'un second pool.
+
+Utilisation, depuis le dossier backend :
+
+    python -m bench.dashboard_load --teachers 50 --dashboards 10 --output resultats.json
+
+Par défaut la base est une base sqlite en mémoire, avec --database postgres celle configurée dans le fichier .env.
+Le rapport JSON donne, par implémentation, la latence (p50, p95, p99) et le débit de chaque route et de la page.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import timedelta
+from typing import Annotated
+
+from .load_test import Recorder
+
+DASHBOARD = [
+    "/users/me",
+    "/question/read_surveys",
+    "/question/read_questions_bank",
+    "/sessions/template/all",
+    "/sessions/all",
+    "/groups/get_groups",
+]
+
+PREFIXES = {"async": "/api", "sync": "/sync/api"}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Test de charge des tableaux de bord des professeurs")
+    parser.add_argument("--teachers", type=int, default=50, help="nombre de professeurs connectés en même temps")
+    parser.add_argument("--dashboards", type=int, default=10, help="ouvertures du tableau de bord par professeur")
+    parser.add_argument("--surveys", type=int, default=5, help="nombre de questionnaires par professeur")
+    parser.add_argument("--questions", type=int, default=5, help="nombre de questions par questionnaire")
+    parser.add_argument("--sessions", type=int, default=10, help="nombre de sessions lancées par professeur")
+    parser.add_argument("--mode", choices=["async", "sync", "both"], default="both", help="implémentation mesurée")
+    parser.add_argument("--database", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--output", help="fichier JSON de sortie (sortie standard par défaut)")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace):
+    """
+    Prépare les variables d'environnement lues à l'import de l'application.
+    """
+    os.environ.setdefault("DEPLOY_MODE", "dev")
+    os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+    # Un seul processus : le schéma peut être créé au démarrage
+    os.environ.setdefault("DB_AUTO_MIGRATE", "1")
+
+    if args.database == "sqlite":
+        os.environ["IS_TESTING"] = "1"
+
+
+def populate(args: argparse.Namespace) -> list[str]:
+    """
+    Crée les professeurs, leurs questionnaires, modèles de session et sessions.
+    Renvoie les adresses mail des professeurs.
+    """
+    from sae_backend.model.database import SessionLocal, init_db
+    from sae_backend.model.database.db_models import QuestionType, SurveySessionType, UserAffiliation
+    from sae_backend.model.database.operations import (
+        add_question_to_survey,
+        create_answer,
+        create_group,
+        create_question,
+        create_session_template,
+        create_survey,
+        register_user,
+        start_survey_session,
+    )
+
+    run_id = uuid.uuid4().hex[:8]
+    emails = [f"bench-teacher-{run_id}-{i}@bench.local" for i in range(args.teachers)]
+
+    # Moteurs de la base et schéma, comme au démarrage de l'application
+    init_db()
+
+    with SessionLocal() as db:
+        for email in emails:
+            teacher = register_user(db, "Bench", "Teacher", email, UserAffiliation.teacher)
+            create_group(db, teacher.id, f"Groupe {email}", None)
+
+            templates = []
+            for s in range(args.surveys):
+                survey = create_survey(db, teacher.id, f"Bench {run_id} {s}", "bench")
+                for q in range(args.questions):
+                    question = create_question(db, teacher.id, QuestionType.single_answer, f"Question {q}", "")
+                    create_answer(db, teacher.id, question.id, "Réponse", True)
+                    add_question_to_survey(db, teacher.id, survey.id, question.id)
+
+                templates.append(
+                    create_session_template(db, teacher.id, survey.id, "Bench", SurveySessionType.piloted, None, True)
+                )
+
+            for s in range(args.sessions):
+                start_survey_session(db, teacher.id, templates[s % len(templates)].id)  # type: ignore
+
+    return emails
+
+
+def sync_router():
+    """
+    Les routes du tableau de bord telles qu'elles étaient écrites avant le passage au moteur asyncrone :
+    fonctions synchrones (exécutées dans le pool de threads de Starlette) sur un moteur synchrone séparé.
+    """
+    from fastapi import APIRouter, Depends, HTTPException, status
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session, sessionmaker
+    from sqlalchemy.pool import QueuePool
+
+    from sae_backend.model.api.api_models import GroupRead, SessionTemplateCreated, SurveyBase, SurveysBase, User
+    from sae_backend.model.api.auth import get_email_from_jwt, oauth2_scheme
+    from sae_backend.model.config import get_dsn
+    from sae_backend.model.database import operations
+
+    # Pool de l'ancien moteur des routes (25 connexions), mais sans limite de débordement : avec la limite
+    # d'avant (35 connexions), les requêtes qui attendent une connexion occupent les threads dont les autres
+    # ont besoin pour rendre la leur, et tout se bloque jusqu'à l'expiration de l'attente (30 s).
+    # Les connexions sqlite passent d'un thread à l'autre.
+    connect_args = {"check_same_thread": False} if os.getenv("IS_TESTING") else {}
+    engine = create_engine(
+        get_dsn(), poolclass=QueuePool, pool_size=25, max_overflow=-1, connect_args=connect_args
+    )
+    SyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_db():
+        db = SyncSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def only_teacher_allowed(db: Annotated[Session, Depends(get_db)], token: Annotated[str, Depends(oauth2_scheme)]):
+        user = operations.get_user(db, get_email_from_jwt(token))
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+        return user
+
+    Db = Annotated[Session, Depends(get_db)]
+    Teacher = Annotated[User, Depends(only_teacher_allowed)]
+
+    router = APIRouter()
+
+    @router.get("/users/me")
+    def get_user_info(active_user: Teacher) -> User:
+        return active_user
+
+    @router.get("/question/read_surveys", response_model=list[SurveysBase])
+    def read_surveys(current_user: Teacher, db: Db):
+        return operations.get_surveys(db, current_user.id)
+
+    @router.get("/question/read_questions_bank", response_model=list[SurveyBase])
+    def read_questions(current_user: Teacher, db: Db):
+        return operations.get_questions(db, current_user.id)
+
+    @router.get("/sessions/template/all")
+    def get_all_session_templates(current_user: Teacher, db: Db) -> list[SessionTemplateCreated]:
+        return [
+            SessionTemplateCreated(
+                name=t.name,
+                type=t.type,  # type: ignore
+                authorised_group_id=None if t.is_public else operations.get_authorised_group_id(db, t),
+                show_answers=t.show_answers,
+                id=t.id,
+                survey_id=t.survey_id,
+            )
+            for t in operations.get_all_session_templates(db, current_user.id) or []
+        ]
+
+    @router.get("/sessions/all")
+    def list_all_sessions(current_user: Teacher, db: Db):
+        return operations.get_all_session(db, current_user.id)
+
+    @router.get("/groups/get_groups", response_model=list[GroupRead])
+    def get_groups(current_user: Teacher, db: Db):
+        return operations.get_groups(db)
+
+    return router, engine
+
+
+async def open_dashboards(client, recorder: Recorder, mode: str, token: str, dashboards: int):
+    """
+    Un professeur ouvre `dashboards` fois son tableau de bord, toutes les routes de la page en même temps.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def get(path: str):
+        start = time.perf_counter()
+        response = await client.get(PREFIXES[mode] + path, headers=headers)
+        recorder.record(path, start, time.perf_counter(), response.status_code == 200)
+
+    for _ in range(dashboards):
+        start = time.perf_counter()
+        await asyncio.gather(*(get(path) for path in DASHBOARD))
+        recorder.record("dashboard", start, time.perf_counter())
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from sae_backend.application import create_app
+    from sae_backend.model.api.auth import create_access_token
+
+    emails = populate(args)
+    tokens = [create_access_token({"sub": e, "aff": "teacher"}, timedelta(hours=1)) for e in emails]
+
+    app = create_app()
+    router, sync_engine = sync_router()
+    app.include_router(router, prefix=PREFIXES["sync"])
+
+    modes = ["async", "sync"] if args.mode == "both" else [args.mode]
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)  # type: ignore
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in modes:
+            # Un premier passage pour ouvrir les connexions des pools et remplir les caches de requêtes
+            await open_dashboards(client, Recorder(), mode, tokens[0], 1)
+
+            recorder = Recorder()
+            started = time.perf_counter()
+            await asyncio.gather(*(open_dashboards(client, recorder, mode, t, args.dashboards) for t in tokens))
+            duration = time.perf_counter() - started
+
+            results[mode] = {
+                "duration_s": duration,
+                "dashboards_per_s": args.teachers * args.dashboards / duration,
+                "requests_per_s": args.teachers * args.dashboards * len(DASHBOARD) / duration,
+                "routes": recorder.report(),
+            }
+
+    sync_engine.dispose()
+
+    report = {
+        "config": {
+            "teachers": args.teachers,
+            "dashboards": args.dashboards,
+            "surveys": args.surveys,
+            "questions": args.questions,
+            "sessions": args.sessions,
+            "database": args.database,
+        },
+        "modes": results,
+    }
+
+    if "async" in results and "sync" in results:
+        report["speedup"] = results["async"]["dashboards_per_s"] / results["sync"]["dashboards_per_s"]
+
+    return report
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    configure_environment(args)
+
+    # Les messages de l'application ne doivent pas se mélanger au rapport JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = json.dumps(asyncio.run(run(args)), indent=2)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
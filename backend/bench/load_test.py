@@ -0,0 +1,348 @@
+"""
+Test de charge du déroulement d'une session de questionaire.
+
+Le serveur est exécuté dans le même processus que les clients : chaque client parle Engine.IO/Socket.IO
+directement à l'application ASGI, sans passer par le réseau. Un propriétaire et N étudiants suivent le
+scénario complet (session_connect -> initiate_next_question -> user_answer -> end_session) et la latence
+de chaque évènement est rapportée en JSON (p50, p95, p99, débit), pour comparer les exécutions entre elles.
+
+Utilisation, depuis le dossier backend :
+
+    python -m bench.load_test --students 300 --questions 5 --output resultats.json
+
+Par défaut la base est une base sqlite en mémoire et Redis est celui de REDIS_URL (redis://localhost:6379).
+Avec --fake-redis, Redis est remplacé par fakeredis (à installer séparément) et les salons socket.io sont
+gérés en mémoire. Avec --database postgres, la base configurée dans le fichier .env est utilisée.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import timedelta
+
+NAMESPACE = "/session"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Test de charge des sessions de questionaire")
+    parser.add_argument("--students", type=int, default=100, help="nombre d'étudiants connectés")
+    parser.add_argument("--questions", type=int, default=5, help="nombre de questions QCM du questionaire")
+    parser.add_argument("--answers", type=int, default=4, help="nombre de réponses possibles par question")
+    parser.add_argument("--database", choices=["sqlite", "postgres"], default="sqlite")
+    parser.add_argument("--fake-redis", action="store_true", help="utilise fakeredis au lieu d'un serveur Redis")
+    parser.add_argument("--seed", type=int, default=0, help="graine des réponses choisies")
+    parser.add_argument("--timeout", type=float, default=60, help="délai maximal d'attente d'un évènement (s)")
+    parser.add_argument("--output", help="fichier JSON de sortie (sortie standard par défaut)")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args: argparse.Namespace):
+    """
+    Prépare les variables d'environnement lues à l'import de l'application.
+    """
+    os.environ.setdefault("DEPLOY_MODE", "dev")
+    os.environ.setdefault("REDIS_URL", "redis://localhost:6379")
+    # Un seul processus : le schéma peut être créé au démarrage
+    os.environ.setdefault("DB_AUTO_MIGRATE", "1")
+
+    if args.database == "sqlite":
+        os.environ["IS_TESTING"] = "1"
+
+    if args.fake_redis:
+        os.environ["SOCKETIO_MANAGER"] = "memory"
+
+
+class Recorder:
+    """
+    Latences mesurées, par évènement.
+    """
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self._spans: dict[str, list[float]] = {}
+
+    def record(self, event: str, start: float, end: float, ok: bool = True):
+        self.latencies.setdefault(event, []).append(end - start)
+        self.errors.setdefault(event, 0)
+        if not ok:
+            self.errors[event] += 1
+
+        span = self._spans.setdefault(event, [start, end])
+        span[0] = min(span[0], start)
+        span[1] = max(span[1], end)
+
+    async def timed(self, event: str, coro, expected: set[str] | None = None):
+        """
+        Attend un appel avec accusé de réception et enregistre sa latence.
+        """
+        start = time.perf_counter()
+        ack = await coro
+        self.record(event, start, time.perf_counter(), expected is None or (bool(ack) and ack[0] in expected))
+        return ack
+
+    def report(self) -> dict:
+        out = {}
+        for event, values in self.latencies.items():
+            duration = self._spans[event][1] - self._spans[event][0]
+            out[event] = {
+                "count": len(values),
+                "errors": self.errors[event],
+                "mean_ms": statistics.fmean(values) * 1000,
+                "p50_ms": _percentile(values, 50) * 1000,
+                "p95_ms": _percentile(values, 95) * 1000,
+                "p99_ms": _percentile(values, 99) * 1000,
+                "max_ms": max(values) * 1000,
+                "throughput_per_s": len(values) / duration if duration > 0 else None,
+            }
+        return out
+
+
+def _percentile(values: list[float], p: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+class SocketClient:
+    """
+    Client Socket.IO minimal (transport websocket uniquement) qui appelle l'application ASGI directement.
+    """
+
+    def __init__(self, app, timeout: float):
+        self.app = app
+        self.timeout = timeout
+
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._opened = asyncio.Event()
+        self._connected = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._acks: dict[int, asyncio.Future] = {}
+        self._next_ack = 0
+        self._waiters: dict[str, list[asyncio.Future]] = {}
+        self._task: asyncio.Task | None = None
+
+    async def connect(self, token: str, join_code: str):
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": "/ws/",
+            "raw_path": b"/ws/",
+            "root_path": "",
+            "query_string": f"EIO=4&transport=websocket&join_code={join_code}".encode(),
+            "headers": [(b"host", b"bench"), (b"connection", b"Upgrade"), (b"upgrade", b"websocket")],
+            "client": ("127.0.0.1", 0),
+            "server": ("bench", 80),
+            "subprotocols": [],
+        }
+        self._task = asyncio.create_task(self.app(scope, self._to_app.get, self._from_app))
+        await self._to_app.put({"type": "websocket.connect"})
+
+        await asyncio.wait_for(self._opened.wait(), self.timeout)
+        self._send(f"40{NAMESPACE},{json.dumps(token)}")
+        await asyncio.wait_for(self._connected.wait(), self.timeout)
+
+    async def call(self, event: str, *args) -> list:
+        """
+        Émet un évènement et attend son accusé de réception.
+        """
+        ack_id = self._next_ack
+        self._next_ack += 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._acks[ack_id] = future
+        self._send(f"42{NAMESPACE},{ack_id}{json.dumps([event, *args])}")
+
+        return await asyncio.wait_for(future, self.timeout)
+
+    def expect(self, event: str) -> asyncio.Future:
+        """
+        Renvoie un futur résolu (avec l'heure de réception et les données) à la prochaine réception de l'évènement.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(event, []).append(future)
+        return future
+
+    async def close(self):
+        if not self._closed.is_set():
+            self._send(f"41{NAMESPACE},")
+            await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+
+        if self._task is not None:
+            await asyncio.wait_for(self._task, self.timeout)
+
+    def _send(self, text: str):
+        self._to_app.put_nowait({"type": "websocket.receive", "text": text})
+
+    async def _from_app(self, message: dict):
+        if message["type"] == "websocket.close":
+            self._closed.set()
+            return
+
+        if message["type"] != "websocket.send":
+            return
+
+        text = message.get("text")
+        if text is None:
+            return
+
+        if text == "2":  # ping Engine.IO
+            self._send("3")
+        elif text.startswith("0"):
+            self._opened.set()
+        elif text.startswith(f"40{NAMESPACE},"):
+            self._connected.set()
+        elif text.startswith(f"43{NAMESPACE},"):
+            ack_id, data = _split_packet(text[len(f"43{NAMESPACE},"):])
+            future = self._acks.pop(ack_id, None)
+            if future is not None and not future.done():
+                future.set_result(data)
+        elif text.startswith(f"42{NAMESPACE},"):
+            _, data = _split_packet(text[len(f"42{NAMESPACE},"):])
+            received = time.perf_counter()
+            for future in self._waiters.pop(data[0], []):
+                if not future.done():
+                    future.set_result((received, data[1] if len(data) > 1 else None))
+
+
+def _split_packet(body: str) -> tuple[int | None, list]:
+    digits = 0
+    while digits < len(body) and body[digits].isdigit():
+        digits += 1
+
+    return (int(body[:digits]) if digits else None), json.loads(body[digits:])
+
+
+def populate(args: argparse.Namespace) -> tuple[str, str, list[str]]:
+    """
+    Crée le propriétaire, les étudiants, le questionaire et démarre une session.
+    Renvoie le code de la session, l'adresse mail du propriétaire et celles des étudiants.
+    """
+    from sae_backend.model.database import SessionLocal, init_db
+    from sae_backend.model.database.db_models import QuestionType, SurveySessionType, UserAffiliation
+    from sae_backend.model.database.operations import (
+        add_question_to_survey,
+        create_answer,
+        create_question,
+        create_session_template,
+        create_survey,
+        register_user,
+        start_survey_session,
+    )
+
+    run_id = uuid.uuid4().hex[:8]
+    owner_email = f"bench-owner-{run_id}@bench.local"
+    student_emails = [f"bench-{run_id}-{i}@bench.local" for i in range(args.students)]
+
+    # Moteurs de la base et schéma, comme au démarrage de l'application
+    init_db()
+
+    with SessionLocal() as db:
+        owner = register_user(db, "Bench", "Owner", owner_email, UserAffiliation.teacher)
+        for email in student_emails:
+            register_user(db, "Bench", "Student", email, UserAffiliation.student)
+
+        survey = create_survey(db, owner.id, f"Bench {run_id}", "bench")
+        for q in range(args.questions):
+            question = create_question(db, owner.id, QuestionType.single_answer, f"Question {q}", None)
+            for a in range(args.answers):
+                create_answer(db, owner.id, question.id, f"Réponse {a}", a == 0)
+            add_question_to_survey(db, owner.id, survey.id, question.id)
+
+        template = create_session_template(db, owner.id, survey.id, "Bench", SurveySessionType.piloted, None, True)
+        session = start_survey_session(db, owner.id, template.id)  # type: ignore
+
+        return session.join_code, owner_email, student_emails  # type: ignore
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from sae_backend import app
+    from sae_backend.model.api.auth import create_access_token
+
+    if args.fake_redis:
+        import fakeredis
+
+        from sae_backend.model import redis_operations
+
+        redis_operations._client = fakeredis.FakeAsyncRedis()
+
+    def token(email: str) -> str:
+        return create_access_token(data={"sub": email, "aff": None}, expires_delta=timedelta(hours=1))
+
+    join_code, owner_email, student_emails = populate(args)
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    started = time.perf_counter()
+
+    owner = SocketClient(app, args.timeout)
+    await owner.connect(token(owner_email), join_code)
+    await recorder.timed("session_connect_owner", owner.call("session_connect", join_code), {"owner_join"})
+
+    students = [SocketClient(app, args.timeout) for _ in student_emails]
+
+    async def join(client: SocketClient, email: str):
+        start = time.perf_counter()
+        await client.connect(token(email), join_code)
+        recorder.record("connect", start, time.perf_counter())
+        await recorder.timed("session_connect", client.call("session_connect", join_code), {"join"})
+
+    await asyncio.gather(*(join(c, e) for c, e in zip(students, student_emails)))
+
+    for _ in range(args.questions):
+        deliveries = [c.expect("next_question") for c in students]
+
+        start = time.perf_counter()
+        await recorder.timed("initiate_next_question", owner.call("initiate_next_question"), {"next_question"})
+
+        received = await asyncio.wait_for(asyncio.gather(*deliveries), args.timeout)
+        for received_at, _ in received:
+            recorder.record("next_question_delivery", start, received_at)
+
+        async def answer(client: SocketClient, payload: dict):
+            choice = rng.choice(payload["answers"])["id"]
+            await recorder.timed("user_answer", client.call("user_answer", [choice]), {"answer_saved"})
+
+        await asyncio.gather(*(answer(c, payload) for c, (_, payload) in zip(students, received)))
+
+    await recorder.timed("end_session", owner.call("end_session"), {"session_ends"})
+
+    await asyncio.gather(*(c.close() for c in students), owner.close(), return_exceptions=True)
+
+    return {
+        "config": {
+            "students": args.students,
+            "questions": args.questions,
+            "answers": args.answers,
+            "database": args.database,
+            "redis": "fakeredis" if args.fake_redis else os.environ["REDIS_URL"],
+            "seed": args.seed,
+        },
+        "duration_s": time.perf_counter() - started,
+        "events": recorder.report(),
+    }
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    configure_environment(args)
+
+    # Les messages de l'application ne doivent pas se mélanger au rapport JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        report = json.dumps(asyncio.run(run(args)), indent=2)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        sys.stdout.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+#!/bin/sh
+# Lance un processus uvicorn par shard, sur des ports consécutifs à partir de 8080.
+# Le proxy envoie toutes les connexions d'un même code de session vers le même port
+# (hachage cohérent, voir frontend/nginx/config.conf) : SOCKET_SHARDS doit correspondre
+# au nombre de serveurs de l'upstream "backend_sessions".
+
+SHARDS=${SOCKET_SHARDS:-4}
+export SOCKET_SHARDING=true
+
+# Migrations appliquées une seule fois, avant le démarrage des processus
+python -m sae_backend.model.database.migrations || exit 1
+
+# Arrêt de tous les processus si le conteneur est arrêté
+trap 'kill $(jobs -p) 2>/dev/null' INT TERM
+
+i=0
+while [ "$i" -lt "$SHARDS" ]; do
+    uvicorn sae_backend:app --workers 1 --host 0.0.0.0 --port $((8080 + i)) \
+        --proxy-headers --forwarded-allow-ips='*' &
+    i=$((i + 1))
+done
+
+wait
@@ -0,0 +1,84 @@
+"""
+Construction de l'application.
+
+Les ressources (moteurs de la base de données, client Redis) sont ouvertes au démarrage et fermées à l'arrêt
+par le cycle de vie de l'application, et non à l'import des modules.
+"""
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from socketio import ASGIApp, AsyncServer
+from starlette.middleware.cors import CORSMiddleware
+
+from .model.config import settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from .model import redis_operations as redis_ops
+    from .model.answer_buffer import answer_buffer
+    from .model.database import close_db, init_db
+    from .model.shard import shard_leases
+
+    init_db()
+    redis_ops.get_redis_client()
+
+    yield
+
+    # Tâches de fond arrêtées avant de fermer les connexions qu'elles utilisent
+    await app.state.session_namespace.shutdown()
+    await shard_leases.stop()
+
+    # Les réponses encore en attente sont écrites avant de fermer les connexions
+    await answer_buffer.flush()
+    await redis_ops.close_redis_client()
+    await close_db()
+
+
+def create_app() -> FastAPI:
+    """
+    Construit l'application : API HTTP et serveur Socket.IO.
+    """
+    from .controller import api_router
+    from .controller.socket.session import SessionNamespace
+    from .model.socket_manager import manager
+
+    # Serveur HTTP
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        summary="API de l'application SAE.",
+        license_info={"name": "AGPLv3", "url": "https://www.gnu.org/licenses/agpl-3.0.fr.html"},
+        openapi_tags=[
+            {
+                "name": "users",
+                "description": "Opérations relatives aux utilisateurs, à l'authentification et à la déconnexion.",
+            },
+        ],
+        openapi_url="/api/openapi.json",
+        docs_url="/api/docs",
+        redoc_url="/api/redoc",
+        lifespan=lifespan,
+    )
+
+    # Autoriser les CORS depuis les url de developement
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://localhost:5173", "https://localhost:8443"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.include_router(api_router, prefix="/api")
+
+    # Serveur Socket.IO
+    sio = AsyncServer(client_manager=manager, async_mode="asgi", cors_allowed_origins=[])  # FastAPI s'occupe des Cors
+    app.state.session_namespace = SessionNamespace("/session")
+    sio.register_namespace(app.state.session_namespace)
+
+    app.mount("/ws", ASGIApp(sio, socketio_path=""))
+
+    return app
+
+
+__all__ = ["create_app", "lifespan"]
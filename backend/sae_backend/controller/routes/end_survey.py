@@ -1,41 +1,100 @@
 """
 Routes API en rapport avec les résultats d'un questionnaire.
 """
+import csv
+import io
 import json
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Annotated, Sequence
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ...model.api.api_models import ExportFormat
 from ...model.api.auth import only_teacher_allowed, student_or_teacher_allowed
 from ...model.database.db_models import User, UserAffiliation
-from ...model.database import get_db
-from ...model.database.operations import get_saved_results, add_name_to_players, add_name_to_player
+from ...model.database import get_async_db
+from ...model.database.async_ import AsyncSessionLocal
+from ...model.database.async_.crud import (
+    add_name_to_player,
+    add_name_to_players,
+    get_owned_session_ids,
+    get_player_results,
+    get_saved_progress,
+    get_session_scores,
+    stream_session_results,
+)
+from ...model.live_session import get_live_session
 
 
 router = APIRouter()
 
 
 @router.get("/get_end_survey/{join_code}")
-def get_end_survey(
-    db: Annotated[Session, Depends(get_db)],
+async def get_end_survey(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     active_user: Annotated[User, Depends(only_teacher_allowed)],
     join_code: str,
 ):
     """
-    Récupère les résultats de tout les joueurs.
+    Récupère le score de tout les joueurs, par score décroissant.
     """
-    survey_results = get_saved_results(db, join_code)
-    score_players = get_score_all_players(survey_results)
-    if score_players == "Aucun resultat":
-        return score_players
+    score_players = await get_session_scores(db, join_code)
+    if not score_players:
+        return "Aucun resultat"
+    else:
+        return await add_name_to_players(db, score_players)
+
+
+@router.get("/live_scoreboard/{join_code}")
+async def get_live_scoreboard(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    active_user: Annotated[User, Depends(only_teacher_allowed)],
+    join_code: str,
+):
+    """
+    Récupère le classement en direct d'une session en cours, trié par score décroissant.
+    """
+    live = get_live_session(join_code)
+
+    if live is None or live.owner_id != active_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No running session with this join code",
+        )
+
+    return await add_name_to_players(db, live.scoreboard.ranking())
+
+
+@router.get("/progress/{join_code}")
+async def get_progress(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    active_user: Annotated[User, Depends(only_teacher_allowed)],
+    join_code: str,
+):
+    """
+    Récupère le taux de complétion de chaque participant d'une session autonome libre :
+    depuis la mémoire si la session est en cours, sinon depuis l'avancement enregistré à la fin.
+    """
+    live = get_live_session(join_code)
+
+    if live is not None and live.owner_id == active_user.id:
+        players = live.participant_progress()
     else:
-        sort_players = sort_scores_players(score_players)
-        return add_name_to_players(db, sort_players)
+        players = await get_saved_progress(db, active_user.id, join_code)
+
+    if players is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No session with this join code",
+        )
+
+    return await add_name_to_players(db, players)
 
 
 @router.get("/get_player_details/{id_player}/{join_code}")
-def get_player_details(
-    db: Annotated[Session, Depends(get_db)],
+async def get_player_details(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     active_user: Annotated[User, Depends(student_or_teacher_allowed)],
     id_player: str,
     join_code: str,
@@ -50,65 +109,158 @@ def get_player_details(
             detail="Student cannot see the results of another student",
         )
 
-    survey_results = get_saved_results(db, join_code)
-    info_player = get_info_player(survey_results, id_player)
+    info_player = await get_player_results(db, join_code, int(id_player))
+
+    if info_player is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No results for this player in this session",
+        )
+
+    return await add_name_to_player(db, info_player)
+
+
+@router.get("/export/{join_code}")
+async def export_session_results(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    active_user: Annotated[User, Depends(only_teacher_allowed)],
+    join_code: str,
+    export_format: ExportFormat = Query(ExportFormat.csv, alias="format"),
+):
+    """
+    Exporte le détail des résultats d'une session (un participant et une question par ligne), en CSV ou NDJSON.
+    """
+    session_ids = await get_owned_session_ids(db, active_user.id, join_code=join_code)
+
+    if not session_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No session with this join code",
+        )
+
+    return export_response(session_ids, export_format, f"resultats-{join_code}")
 
-    return add_name_to_player(db, info_player)
 
+@router.get("/export_survey/{survey_id}")
+async def export_survey_results(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    active_user: Annotated[User, Depends(only_teacher_allowed)],
+    survey_id: int,
+    export_format: ExportFormat = Query(ExportFormat.csv, alias="format"),
+):
+    """
+    Exporte le détail des résultats de toutes les sessions d'un questionnaire, en CSV ou NDJSON.
+    """
+    session_ids = await get_owned_session_ids(db, active_user.id, survey_id=survey_id)
+
+    if not session_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No session for this survey",
+        )
+
+    return export_response(session_ids, export_format, f"resultats-questionnaire-{survey_id}")
+
+
+EXPORT_COLUMNS = [
+    "join_code",
+    "user_id",
+    "name",
+    "surname",
+    "question_id",
+    "question_text",
+    "answers_text",
+    "correctly_answered",
+]
 
-def get_score_all_players(results: str) -> list | str:
+
+def export_response(session_ids: list[int], export_format: ExportFormat, filename: str) -> StreamingResponse:
     """
-    Récupère le score de chaque joueur
+    Renvoie l'export des résultats des sessions, envoyé au fur et à mesure de la lecture de la base.
 
     Paramètres
+
     ----------
-    results : str
-        Le résultat du questionnaire.
+
+    session_ids : list[int]
+        Sessions exportées, dont l'utilisateur est le propriétaire.
+
+    export_format : ExportFormat
+        CSV (une ligne d'en-tête) ou NDJSON (un objet JSON par ligne).
 
     Retour
     ------
-    list | str
-        le score de chaque joueur ou 'Aucun résultat'
+
+    StreamingResponse
+        Réponse téléchargée sous le nom `filename`
     """
-    json_data = json.loads(results)
-    infos_players = []
+    format_rows = rows_to_csv if export_format == ExportFormat.csv else rows_to_ndjson
 
-    for player_id, player_info in json_data.items():
-        if player_id is not None and player_id != "null":
-            id_player = player_id
-            correctly_answered = sum(
-                1
-                for question_info in player_info.values()
-                if "correctly_answered" in question_info and question_info["correctly_answered"]
-            )
+    async def content():
+        # Session propre à l'export : la réponse est envoyée après la fin de la route et de ses dépendances
+        async with AsyncSessionLocal() as db:
+            if export_format == ExportFormat.csv:
+                yield ",".join(EXPORT_COLUMNS) + "\r\n"
 
-            infos_players.append({"id_player": id_player, "correctly_answered": correctly_answered})
+            async for rows in stream_session_results(db, session_ids):
+                yield format_rows(rows)
 
-    if not infos_players:
-        return "Aucun resultat"
-    else:
-        return infos_players
+    media_type = "text/csv" if export_format == ExportFormat.csv else "application/x-ndjson"
+    extension = export_format.value
+
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
 
 
-def sort_scores_players(infos_players: list) -> list:
+def rows_to_csv(rows: Sequence[Row]) -> str:
     """
-    Trie les joueurs en fonctions de leur score par ordre décroissant
+    Écrit des lignes de l'export en CSV. Les réponses choisies sont séparées par " | ",
+    la justesse (true ou false) est vide pour les questions ouvertes.
 
     Paramètres
 
     ----------
 
-    infos_joueurs : list
-        Liste des joueurs et leur score
+    rows : Sequence[Row]
+        Lignes lues par stream_session_results
 
     Retour
     ------
 
-    list
-        Liste des joueurs et leur score triée par ordre décroissant
+    str
+        Lignes CSV
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    for *fields, answers_text, correctly_answered in rows:
+        correctness = "" if correctly_answered is None else json.dumps(correctly_answered)
+        writer.writerow([*fields, " | ".join(answers_text), correctness])
+
+    return buffer.getvalue()
+
+
+def rows_to_ndjson(rows: Sequence[Row]) -> str:
     """
+    Écrit des lignes de l'export en NDJSON, un objet par ligne avec les colonnes de EXPORT_COLUMNS.
+
+    Paramètres
+
+    ----------
 
-    return sorted(infos_players, key=lambda x: x["correctly_answered"], reverse=True)
+    rows : Sequence[Row]
+        Lignes lues par stream_session_results
+
+    Retour
+    ------
+
+    str
+        Lignes NDJSON
+    """
+    return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows)
 
 
 def get_top3_players(infos_players: list) -> list:
@@ -129,22 +281,3 @@ def get_top3_players(infos_players: list) -> list:
         3 premiers joueurs
     """
     return infos_players[:3]
-
-
-def get_info_player(infos_players, id_player):
-    json_data = json.loads(infos_players)
-    if id_player not in json_data:
-        return None
-
-    infos_player = {"id_player": id_player, "questions_answers": []}
-
-    for question_id, question_info in json_data[id_player].items():
-        question_answer = {
-            "question_id": question_id,
-            "question_text": question_info.get("question_text", ""),
-            "answers_text": question_info.get("answers_text", []),
-            "correctly_answered": question_info.get("correctly_answered", None),
-        }
-        infos_player["questions_answers"].append(question_answer)
-
-    return infos_player
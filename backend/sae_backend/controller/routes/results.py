@@ -3,33 +3,26 @@ Routes en rapport avec l'historique des sessions auxquelles
 l'etudiant a participé'.
 """
 from typing import Annotated
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sae_backend.model.database import db_models
-from sqlalchemy.orm import Session
-from ...model.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...model.database import get_async_db
 from ...model.api.auth import student_or_teacher_allowed
-from ...model.database.operations import (
-    get_sessions_player,
-    get_join_code_survey_id,
-    get_name_survey_owner,
-    get_sessions_results,
-)
+from ...model.database.async_.crud import get_session_history
 
 
 router = APIRouter()
 
 
 @router.get("/get_sessions_player")
-def get_sessions(
+async def get_sessions(
     current_user: Annotated[db_models.User, Depends(student_or_teacher_allowed)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
 ):
     """
-    Récupère les sessions auxquelles l'étudiant a participé.
+    Récupère les sessions terminées auxquelles l'étudiant a participé, de la plus récente à la plus ancienne,
+    avec son score (par pages de `limit` sessions).
     """
-    sessions = get_sessions_player(db, current_user.id)
-    jcSurveyId = get_join_code_survey_id(db, sessions)
-    surveyNameOwner = get_name_survey_owner(db, jcSurveyId)
-    sessionsResults = get_sessions_results(db, surveyNameOwner, current_user.id)
-
-    return sessionsResults
+    return await get_session_history(db, current_user.id, limit, offset)
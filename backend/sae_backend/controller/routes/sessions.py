@@ -1,7 +1,7 @@
 from typing import Annotated, Literal, Sequence
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...model.api.api_models import (
     SessionStart,
@@ -12,21 +12,22 @@ from ...model.api.api_models import (
     SurveySession,
 )
 from ...model.api.auth import only_teacher_allowed
-from ...model.database import get_db, db_models
-from ...model.database import operations
+from ...model.database import db_models, get_async_db
+from ...model.database.async_ import crud
 
 router = APIRouter()
 
 
 @router.get("/template/all")
-def get_all_session_templates_route(
-    current_user: Annotated[db_models.User, Depends(only_teacher_allowed)], db: Annotated[Session, Depends(get_db)]
+async def get_all_session_templates_route(
+    current_user: Annotated[db_models.User, Depends(only_teacher_allowed)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
 ) -> Sequence[SessionTemplateCreated]:
     """
     Renvoie la liste de tous les modèles de sessions crée par l'utilisateur.
     """
 
-    all_templates = operations.get_all_session_templates(db, current_user.id)
+    all_templates = await crud.get_all_session_templates(db, current_user.id)
 
     if not all_templates:
         return []
@@ -35,7 +36,7 @@ def get_all_session_templates_route(
         SessionTemplateCreated(
             name=t.name,
             type=t.type,  # type: ignore
-            authorised_group_id=None if t.is_public else operations.get_authorised_group_id(db, t),
+            authorised_group_id=None if t.is_public else await crud.get_authorised_group_id(db, t),
             show_answers=t.show_answers,
             id=t.id,
             survey_id=t.survey_id,
@@ -45,16 +46,16 @@ def get_all_session_templates_route(
 
 
 @router.get("/template/{session_template_id}")
-def get_session_template_route(
+async def get_session_template_route(
     current_user: Annotated[db_models.User, Depends(only_teacher_allowed)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     session_template_id: int,
 ) -> SessionTemplateCreated:
     """
     Renvoie des informations sur un modèle de session.
     """
 
-    template = operations.get_session_template(db, current_user.id, session_template_id)
+    template = await crud.get_session_template(db, current_user.id, session_template_id)
 
     if not template:
         raise HTTPException(
@@ -65,7 +66,7 @@ def get_session_template_route(
     return SessionTemplateCreated(
         name=template.name,
         type=template.type,  # type: ignore
-        authorised_group_id=None if template.is_public else operations.get_authorised_group_id(db, template),
+        authorised_group_id=None if template.is_public else await crud.get_authorised_group_id(db, template),
         show_answers=template.show_answers,
         id=template.id,
         survey_id=template.survey_id,
@@ -73,16 +74,16 @@ def get_session_template_route(
 
 
 @router.post("/template/new")
-def create_session_template_route(
+async def create_session_template_route(
     current_user: Annotated[db_models.User, Depends(only_teacher_allowed)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     session_template: SessionTemplateCreateable,
 ) -> SessionTemplateCreated:
     """
     Crée un modèle de session.
     """
 
-    template = operations.create_session_template(
+    template = await crud.create_session_template(
         db,
         current_user.id,
         session_template.survey_id,
@@ -101,7 +102,7 @@ def create_session_template_route(
     return SessionTemplateCreated(
         name=template.name,
         type=template.type,  # type: ignore
-        authorised_group_id=None if template.is_public else operations.get_authorised_group_id(db, template),
+        authorised_group_id=None if template.is_public else await crud.get_authorised_group_id(db, template),
         show_answers=template.show_answers,
         id=template.id,
         survey_id=template.survey_id,
@@ -109,9 +110,9 @@ def create_session_template_route(
 
 
 @router.put("/template/update/{session_template_id}")
-def update_session_template_route(
+async def update_session_template_route(
     current_user: Annotated[db_models.User, Depends(only_teacher_allowed)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     session_template_id: int,
     session_template: SessionTemplateUpdateable,
 ) -> SessionTemplateCreated:
@@ -119,7 +120,7 @@ def update_session_template_route(
     Modifie un modèle de session déjà existant.
     """
 
-    updated_template = operations.update_session_template(
+    updated_template = await crud.update_session_template(
         db,
         current_user.id,
         session_template_id,
@@ -140,7 +141,7 @@ def update_session_template_route(
         name=updated_template.name,
         type=updated_template.type,  # type: ignore
         authorised_group_id=(
-            None if updated_template.is_public else operations.get_authorised_group_id(db, updated_template)
+            None if updated_template.is_public else await crud.get_authorised_group_id(db, updated_template)
         ),
         show_answers=updated_template.show_answers,
         id=updated_template.id,
@@ -149,16 +150,16 @@ def update_session_template_route(
 
 
 @router.delete("/template/delete/{session_template_id}")
-def delete_session_template_route(
+async def delete_session_template_route(
     current_user: Annotated[db_models.User, Depends(only_teacher_allowed)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     session_template_id: int,
 ) -> Literal["OK"]:
     """
     Supprime un modèle de session.
     """
 
-    success = operations.delete_session_template(db, current_user.id, session_template_id)
+    success = await crud.delete_session_template(db, current_user.id, session_template_id)
 
     if not success:
         raise HTTPException(
@@ -170,8 +171,8 @@ def delete_session_template_route(
 
 
 @router.post("/start")
-def start_survey_session(
-    db: Annotated[Session, Depends(get_db)],
+async def start_survey_session(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     current_user: Annotated[db_models.User, Depends(only_teacher_allowed)],
     session_start: SessionStart,
 ) -> StartedSession:
@@ -179,16 +180,17 @@ def start_survey_session(
     Démarre une session de questionaire à partir d'un modèle.
     """
 
-    session = operations.start_survey_session(db, current_user.id, session_start.session_template_id)
+    session = await crud.start_survey_session(db, current_user.id, session_start.session_template_id)
 
     return StartedSession(join_code=session.join_code, created_at=session.created_at)
 
 
 @router.get("/all")
-def list_all_sessions(
-    db: Annotated[Session, Depends(get_db)], current_user: Annotated[db_models.User, Depends(only_teacher_allowed)]
+async def list_all_sessions(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    current_user: Annotated[db_models.User, Depends(only_teacher_allowed)],
 ) -> list[SurveySession]:
     """
     Renvoie la liste de toutes les sessions "lancée" par l'utilisateur.
     """
-    return operations.get_all_session(db, current_user.id)
+    return await crud.get_all_session(db, current_user.id)
@@ -1,29 +1,42 @@
 from datetime import timedelta
-from typing import Annotated
+from functools import cache
+from typing import TYPE_CHECKING, Annotated
 from urllib.parse import quote
 
-from cas import CASClient
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse
 
 from ...model.api.api_models import CasSetup, CasSetupStage, Token
 from ...model.api.auth import create_access_token
-from ...model.database import get_db
-from ...model.database.operations import get_user, register_user
+from ...model.database import get_async_db
+from ...model.database.async_.crud import get_user, register_user
 from ...model.config import settings
 
+if TYPE_CHECKING:
+    from cas import CASClientBase
+
 IS_PROD = settings.DEPLOY_MODE == "prod"
 
 BACKEND_BASE = "https://10.22.27.3" if IS_PROD else "http://localhost:8000"
 FRONTEND_BASE = "https://10.22.27.3" if IS_PROD else "http://localhost:5173"
 
-cas_client = CASClient(
-    version=3,
-    service_url=f"{BACKEND_BASE}/api/cas/verify_ticket",
-    server_url="https://10.22.27.7:8443/cas/",
-    verify_ssl_certificate=False,
-)
+
+@cache
+def get_cas_client() -> "CASClientBase":
+    """
+    Client du CAS, créé à la première connexion plutôt qu'au démarrage de chaque processus.
+    """
+    from cas import CASClient
+
+    return CASClient(
+        version=3,
+        service_url=f"{BACKEND_BASE}/api/cas/verify_ticket",
+        server_url="https://10.22.27.7:8443/cas/",
+        verify_ssl_certificate=False,
+    )
+
 
 router = APIRouter()
 
@@ -33,24 +46,25 @@ def login_step1_route() -> CasSetup:
     """
     Renvoie l'url qui doit être utilisée pour aller sur le CAS.
     """
-    return CasSetup(stage=CasSetupStage.must_cas_login, url=cas_client.get_login_url())
+    return CasSetup(stage=CasSetupStage.must_cas_login, url=get_cas_client().get_login_url())
 
 
 @router.post("/login")
-def login_route(db: Annotated[Session, Depends(get_db)], ticket: str) -> CasSetup:
+async def login_route(db: Annotated[AsyncSession, Depends(get_async_db)], ticket: str) -> CasSetup:
     """
     Vérifie le ticket du CAS et authentifie l'utilisateur.
     """
-    user, attributes, _ = cas_client.verify_ticket(ticket)
+    # La vérification est une requête HTTP bloquante vers le CAS
+    user, attributes, _ = await run_in_threadpool(get_cas_client().verify_ticket, ticket)
 
     if not user:
         return CasSetup(stage=CasSetupStage.failed_login)
 
     # est-ce que l'utilisateur est déjà dans la BDD ?
-    user_in_db = get_user(db, attributes["mail"])  # type: ignore
+    user_in_db = await get_user(db, attributes["mail"])  # type: ignore
 
     if not user_in_db:
-        user_in_db = register_user(
+        user_in_db = await register_user(
             db,
             attributes["givenname"],  # type: ignore
             attributes["sn"],  # type: ignore
@@ -83,4 +97,4 @@ def get_logout_url_route() -> dict[str, str]:
     """
     Renvoie l'url pour la déconnexion.
     """
-    return {"url": cas_client.get_logout_url(f"{FRONTEND_BASE}/")}
+    return {"url": get_cas_client().get_logout_url(f"{FRONTEND_BASE}/")}
@@ -19,6 +19,9 @@ USER_NOT_ALLOWED = ("join_not_allowed", "Pas de droit de rejoindre la session")
 # La session n'est pas joignable
 SESSION_NOT_JOINABLE = ("not_joinable", "La session n'existe pas, a déjà commencé ou est finie")
 
+# La session est gérée par un autre processus : le client doit se reconnecter
+WRONG_SHARD = ("wrong_shard", "Session gérée par un autre serveur, reconnexion nécessaire")
+
 
 ## Renvoyé par initiate_next_question
 
@@ -31,6 +34,18 @@ NO_MORE_QUESTIONS = "no_more_questions", "Fin du questionaire"
 # Passage à la question suivante
 NEXT_QUESTION = ("next_question", "Passage à la question suivante")
 
+# Session autonome libre déjà démarrée : chaque participant avance à son rythme
+SELF_PACED_SESSION = ("self_paced", "Les participants avancent à leur rythme")
+
+# Session avec minuteur déjà démarrée : les questions avancent à l'échéance, pas à la demande du propriétaire
+TIMED_SESSION = ("timed", "Les questions avancent avec le minuteur")
+
+
+## Renvoyé par next_free_question (+ NEXT_QUESTION et NO_MORE_QUESTIONS)
+
+# La session n'est pas une session autonome libre
+NOT_SELF_PACED = ("not_self_paced", "Les questions sont choisies par le propriétaire de la session")
+
 
 ## Renvoyé par user_answer
 
@@ -1,3 +1,8 @@
+import asyncio
+from functools import wraps
+from inspect import isawaitable
+from typing import Awaitable, Callable
+
 from jose import JWTError
 from socketio import AsyncNamespace
 
@@ -6,8 +11,13 @@ from sae_backend.model.database.async_.exceptions import AnswerDoesNotExist, Not
 from ...model.database.async_ import AsyncSessionLocal
 from ...model.database.async_ import operations as pg_ops
 from ...model import redis_operations as redis_ops
+from ...model.live_session import LiveSession, close_live_session, get_live_session, load_live_session
+from ...model.session_acl import get_cached_session_acl, get_session_acl, load_session_acl
+from ...model.session_scheduler import SessionScheduler
+from ...model.shard import NotSessionShard, shard_leases
 
 from ...model.api.auth import get_email_from_jwt
+from ...model.config import settings
 from ...model.socket_manager import manager
 from .codes import (
     ANSWER_DOES_NOT_EXIST,
@@ -17,17 +27,158 @@ from .codes import (
     NO_MORE_QUESTIONS,
     NEXT_QUESTION_NOT_OWNER,
     NOT_OPEN_ANSWER,
+    NOT_SELF_PACED,
     OPEN_ANSWER_TOO_LONG,
     OWNER_JOINS_SESSION,
+    SELF_PACED_SESSION,
     SESSION_ENDS,
     SESSION_NOT_JOINABLE,
+    TIMED_SESSION,
     USER_ALREADY_JOINED,
     USER_JOINS_SESSION,
     USER_NOT_ALLOWED,
+    WRONG_SHARD,
 )
 
 
+def _shard_handler(handler):
+    """
+    Gestionnaire d'évènement qui charge l'état en mémoire d'une session : si la session est déjà chargée
+    par un autre processus, le client reçoit WRONG_SHARD et doit se reconnecter au bon processus.
+    """
+
+    @wraps(handler)
+    async def wrapper(self, sid, *args):
+        try:
+            return await handler(self, sid, *args)
+        except NotSessionShard:
+            return WRONG_SHARD
+
+    return wrapper
+
+
 class SessionNamespace(AsyncNamespace):  # pragma: no cover
+    def __init__(self, namespace=None):
+        super().__init__(namespace)
+
+        # (type d'envoi, code de session) -> prochain envoi groupé prévu
+        self._scheduled: dict[tuple[str, str], asyncio.Task] = {}
+        # Echéances des questions des sessions avec minuteur, une seule tâche pour tout le processus
+        self._timers = SessionScheduler(self._on_question_deadline)
+        # Vérification de l'inactivité des sessions chargées, pour oublier les sessions abandonnées
+        self._idle_checks = SessionScheduler(self._on_idle_check)
+
+    async def shutdown(self):
+        """
+        Arrête les tâches de fond du namespace (arrêt de l'application) : envois groupés prévus et ordonnanceurs.
+        """
+        for task in self._scheduled.values():
+            task.cancel()
+        self._scheduled.clear()
+
+        await self._timers.stop()
+        await self._idle_checks.stop()
+
+    async def _live_session(self, join_code: str, participant: str | None = None) -> LiveSession:
+        """
+        Renvoie l'état en mémoire d'une session, en ne touchant à la base que s'il n'est pas encore chargé
+        (ou si le participant n'y est pas encore connu).
+        """
+        live = get_live_session(join_code)
+        if live is not None and (participant is None or participant in live.participants):
+            live.touch()
+            return live
+
+        # Première utilisation de la session dans ce processus : elle ne doit pas être chargée ailleurs
+        if live is None:
+            if settings.SOCKET_SHARDING:
+                await shard_leases.claim(join_code)
+            self._idle_checks.schedule(join_code, settings.LIVE_SESSION_IDLE_S)
+
+        async with AsyncSessionLocal() as sess:
+            live = await load_live_session(sess, join_code)
+            if participant is not None:
+                await live.add_participant(sess, participant)
+
+        live.touch()
+        return live
+
+    async def _enter_room(self, sid, join_code: str):
+        """
+        Fait entrer un sid dans le salon d'une session (enter_room est une coroutine depuis python-socketio 5.10).
+        """
+        entered = self.enter_room(sid, join_code)
+        if isawaitable(entered):
+            await entered
+
+    def _schedule(self, kind: str, join_code: str, delay_ms: int, send: Callable[[], Awaitable[None]]):
+        """
+        Prévoit un envoi groupé. Les évènements reçus d'ici là sont regroupés dans le même envoi :
+        au plus un message par intervalle, par type d'envoi et par session.
+        """
+        key = (kind, join_code)
+        if key not in self._scheduled:
+            self._scheduled[key] = asyncio.create_task(self._send_later(key, delay_ms, send))
+
+    async def _send_later(self, key: tuple[str, str], delay_ms: int, send: Callable[[], Awaitable[None]]):
+        try:
+            await asyncio.sleep(delay_ms / 1000)
+        finally:
+            self._scheduled.pop(key, None)
+
+        await send()
+
+    def _cancel_scheduled(self, join_code: str):
+        for key in [key for key in self._scheduled if key[1] == join_code]:
+            self._scheduled.pop(key).cancel()
+
+    def _schedule_answers_update(self, live: LiveSession):
+        """
+        Prévoit l'envoi au propriétaire d'un résumé des réponses à la question en cours.
+        """
+
+        async def send():
+            summary = live.answer_summary()
+            if live.owner_sid is not None and summary is not None:
+                await self.emit("answers_update", summary, to=live.owner_sid)
+
+        self._schedule("answers", live.join_code, settings.ANSWER_STATS_INTERVAL_MS, send)
+
+    def _schedule_word_cloud(self, live: LiveSession, question_id: int):
+        """
+        Prévoit l'envoi au propriétaire des mots les plus répondus à une question ouverte en un mot.
+        """
+
+        async def send():
+            cloud = live.word_cloud(question_id, settings.WORD_CLOUD_TOP_K)
+            if live.owner_sid is not None and cloud is not None:
+                await self.emit("word_cloud", cloud, to=live.owner_sid)
+
+        self._schedule("word_cloud", live.join_code, settings.ANSWER_STATS_INTERVAL_MS, send)
+
+    def _schedule_presence_delta(self, live: LiveSession):
+        """
+        Prévoit l'envoi à la salle des arrivées et départs de participants.
+        """
+
+        async def send():
+            delta = live.presence.delta()
+            if delta is not None:
+                await self.emit("presence_delta", delta, room=live.join_code)
+
+        self._schedule("presence", live.join_code, settings.PRESENCE_TICK_MS, send)
+
+    def _schedule_progress_update(self, live: LiveSession):
+        """
+        Prévoit l'envoi au propriétaire du taux de complétion d'une session autonome libre.
+        """
+
+        async def send():
+            if live.owner_sid is not None:
+                await self.emit("progress_update", live.progress_summary(), to=live.owner_sid)
+
+        self._schedule("progress", live.join_code, settings.ANSWER_STATS_INTERVAL_MS, send)
+
     async def on_connect(self, sid, environ, auth):
         """
         Connexion aux websockets. L'utilisateur doit être authentifié.
@@ -53,44 +204,70 @@ class SessionNamespace(AsyncNamespace):  # pragma: no cover
         if "join_code" not in session:
             return
 
-        async with redis_ops.get_redis_session() as client:
-            await redis_ops.leave_session(client, session["email"], session["join_code"])
+        await redis_ops.leave_session(redis_ops.get_redis_client(), session["email"], session["join_code"])
 
-        await self.emit("user_leave", session["email"], room=session["join_code"])
+        live = get_live_session(session["join_code"])
+        if live is not None and not session.get("is_owner", False):
+            live.presence.leave(session["email"])
+            self._schedule_presence_delta(live)
 
+    @_shard_handler
     async def on_session_connect(self, sid, join_code):
         """
         Demande de connexion à une session.
         """
         async with self.session(sid) as session:
-            async with AsyncSessionLocal() as sess:
-                if not await pg_ops.is_session_joinable(sess, join_code):
-                    return SESSION_NOT_JOINABLE
+            email = session["email"]
 
-                email = session["email"]
+            # Droits d'accès en cache : une seule requête au premier arrivant, puis vérification en mémoire
+            acl = get_cached_session_acl(join_code)
+            if acl is None:
+                async with AsyncSessionLocal() as sess:
+                    acl = await get_session_acl(sess, join_code)
 
-                if await pg_ops.is_session_owner(sess, email, join_code):
-                    self.enter_room(sid, join_code)
-                    session["join_code"] = join_code
-                    session["is_owner"] = True
-                    async with redis_ops.get_redis_session() as client:
-                        await redis_ops.set_session_sid_owner(client, join_code, sid)
-                    return OWNER_JOINS_SESSION
+            if acl is None or not acl.joinable:
+                return SESSION_NOT_JOINABLE
 
-                if await pg_ops.can_join_session(sess, email, join_code):
-                    async with redis_ops.get_redis_session() as client:
-                        if await redis_ops.is_in_session(client, email, join_code):
-                            return USER_ALREADY_JOINED
+            if acl.is_owner(email):
+                live = await self._live_session(join_code)
+                live.owner_sid = sid
 
-                        self.enter_room(sid, join_code)
-                        session["join_code"] = join_code
-                        await redis_ops.join_session(client, email, join_code)
-
-                        await self.emit("user_join", email, room=join_code)
-                        return USER_JOINS_SESSION
+                await self._enter_room(sid, join_code)
+                session["join_code"] = join_code
+                session["is_owner"] = True
+                await redis_ops.set_session_sid_owner(redis_ops.get_redis_client(), join_code, sid)
+                return OWNER_JOINS_SESSION
 
+            if not acl.can_join(email):
                 return USER_NOT_ALLOWED
 
+            live = await self._live_session(join_code, email)
+
+            # Vérification et ajout en un seul aller-retour atomique
+            if not await redis_ops.join_session(redis_ops.get_redis_client(), email, join_code):
+                return USER_ALREADY_JOINED
+
+            await self._enter_room(sid, join_code)
+            session["join_code"] = join_code
+
+            live.presence.join(email)
+            self._schedule_presence_delta(live)
+            return USER_JOINS_SESSION
+
+    async def on_presence_snapshot(self, sid):
+        """
+        Liste complète des participants connectés, pour un client qui arrive en cours de session.
+        """
+
+        session: dict = await self.get_session(sid)
+
+        live = get_live_session(session.get("join_code", ""))
+        if live is None:
+            return SESSION_NOT_JOINABLE
+
+        return live.presence.snapshot()
+
+    @_shard_handler
     async def on_initiate_next_question(self, sid):
         """
         Ordre de démarrage de la session ou de passage à la prochaine question,
@@ -102,31 +279,143 @@ class SessionNamespace(AsyncNamespace):  # pragma: no cover
         if not session.get("is_owner", False):
             return NEXT_QUESTION_NOT_OWNER
 
-        join_code = session["join_code"]
+        live = await self._live_session(session["join_code"])
 
-        async with AsyncSessionLocal() as sess:
-            await pg_ops.start_survey_session(sess, join_code)
+        if live.is_self_paced:
+            return await self._start_self_paced(live)
 
-            question, answers = await pg_ops.next_question(sess, join_code)
+        # Une fois démarrée, une session avec minuteur n'avance qu'à l'échéance de chaque question :
+        # une demande du propriétaire juste après l'échéance ferait sauter une question à toute la salle
+        if live.is_timed and live.has_started:
+            return TIMED_SESSION
 
-        if question is None:
+        if not await self._next_question(live):
             return NO_MORE_QUESTIONS
 
-        if answers is not None:  # question ouverte
-            formated_answers = [{"text": a.text, "id": a.id} for a in answers]
-        else:
-            formated_answers = None  # TODO : penser au cas question qcm sans réponses
+        return NEXT_QUESTION
+
+    async def _next_question(self, live: LiveSession) -> bool:
+        """
+        Passe toute la salle à la question suivante. Renvoie False si il n'y a plus de questions.
+        Dans une session avec minuteur, l'échéance de la nouvelle question remplace la précédente.
+        """
+        async with live.lock:
+            if live.closed:
+                return False
+
+            # Changement de question : les réponses à la question précédente sont écrites en base
+            await live.flush()
+
+            async with AsyncSessionLocal() as sess:
+                question = await live.advance(sess)
+
+            if question is None:
+                self._timers.cancel(live.join_code)
+                return False
+
+            if live.is_timed:
+                self._timers.schedule(live.join_code, settings.AUTO_TIMER_QUESTION_S)
+
+        await self.emit("next_question", question.payload, room=live.join_code)
+
+        return True
+
+    async def _on_question_deadline(self, join_code: str):
+        """
+        Echéance d'une question d'une session avec minuteur : passage à la question suivante
+        sans attendre le propriétaire, puis fin de la session après la dernière question.
+        """
+        live = get_live_session(join_code)
+        if live is None:
+            return
 
-        data = {
-            "question": {"text": question.text, "media": question.media, "id": question.id},
-            "type": question.type.value,  # type: ignore
-            "answers": formated_answers,
-        }
+        # Le minuteur fait avancer la session : elle n'est pas abandonnée
+        live.touch()
 
-        await self.emit("next_question", data, room=join_code)
+        if not await self._next_question(live):
+            await self._end_session(live)
+
+    async def _on_idle_check(self, join_code: str):
+        """
+        Vérification de l'inactivité d'une session chargée : la vérification suivante est prévue
+        tant que la session reçoit des évènements, sinon son état en mémoire est oublié.
+        """
+        live = get_live_session(join_code)
+        if live is None or live.closed:
+            return
+
+        remaining = settings.LIVE_SESSION_IDLE_S - live.idle_seconds()
+        if remaining > 0:
+            self._idle_checks.schedule(join_code, remaining)
+            return
+
+        await self._evict_session(live)
+
+    async def _evict_session(self, live: LiveSession):
+        """
+        Oublie l'état en mémoire d'une session abandonnée sans la terminer : les réponses reçues sont écrites
+        en base, et la session est rechargée au prochain évènement à partir de ces réponses (voir LiveSession.load).
+        L'avancement final des participants n'est enregistré qu'à la fin de la session.
+        """
+        join_code = live.join_code
+
+        async with live.lock:
+            if live.closed:
+                return
+
+            await live.flush()
+            live.closed = True
+
+        close_live_session(join_code)
+        self._cancel_scheduled(join_code)
+        self._timers.cancel(join_code)
+        if settings.SOCKET_SHARDING:
+            await shard_leases.release(join_code)
+
+    async def _start_self_paced(self, live: LiveSession):
+        """
+        Démarrage d'une session autonome libre : la première question est envoyée à toute la salle,
+        chaque participant demande ensuite ses questions suivantes (voir on_next_free_question).
+        """
+        async with AsyncSessionLocal() as sess:
+            question = await live.start_self_paced(sess)
+
+        if question is None:
+            return NO_MORE_QUESTIONS if not live.questions else SELF_PACED_SESSION
+
+        await self.emit("next_question", question.payload, room=live.join_code)
 
         return NEXT_QUESTION
 
+    @_shard_handler
+    async def on_next_free_question(self, sid):
+        """
+        Session autonome libre : un participant passe à sa question suivante, à son rythme.
+        La question est servie depuis la liste en mémoire, sans accès à la base.
+        """
+
+        session: dict = await self.get_session(sid)
+
+        if "join_code" not in session or session.get("is_owner", False):
+            return NOT_SELF_PACED
+
+        email = session["email"]
+        live = await self._live_session(session["join_code"], email)
+
+        if not live.is_self_paced or not live.has_started:
+            return NOT_SELF_PACED
+
+        question = live.next_question_for(email)
+        self._schedule_progress_update(live)
+
+        if question is None:
+            return NO_MORE_QUESTIONS
+
+        await self.emit("next_question", question.payload, to=sid)
+
+        return NEXT_QUESTION
+
+    @_shard_handler
     async def on_user_answer(self, sid, answer_ids: list[int]):
         """
         Reçois la réponse a une question d'un utilsateur à une session.
@@ -137,16 +426,25 @@ class SessionNamespace(AsyncNamespace):  # pragma: no cover
         email = session["email"]
         join_code = session["join_code"]
 
+        live = await self._live_session(join_code, email)
+
         try:
-            async with AsyncSessionLocal() as sess:
-                await pg_ops.save_user_answer(sess, email, join_code, answer_ids)
+            score = await live.record_answer(email, answer_ids)
         except AnswerDoesNotExist:
             return ANSWER_DOES_NOT_EXIST
 
-        await self.emit("user_answered", email, room=join_code)
+        self._schedule_answers_update(live)
+
+        if score is not None and live.owner_sid is not None:
+            await self.emit(
+                "score_update",
+                {"id_player": str(live.participants[email]), "email": email, "correctly_answered": score},
+                to=live.owner_sid,
+            )
 
         return ANSWER_SAVED
 
+    @_shard_handler
     async def on_user_open_answer(self, sid, question_id: int, text: str):
         """
         Reçois la réponse à une question ouverte d'un utilisateur à une session.
@@ -157,22 +455,63 @@ class SessionNamespace(AsyncNamespace):  # pragma: no cover
         email = session["email"]
         join_code = session["join_code"]
 
+        live = await self._live_session(join_code, email)
+
         try:
-            async with AsyncSessionLocal() as sess:
-                await pg_ops.save_user_open_answer(sess, email, join_code, question_id, text)
+            await live.record_open_answer(email, question_id, text)
         except OpenAnswerTooLong:
             return OPEN_ANSWER_TOO_LONG
         except NotAnOpenAnswer:
             return NOT_OPEN_ANSWER
 
-        await self.emit("user_answered", email, room=join_code)
+        self._schedule_answers_update(live)
+
+        # Question en un mot : le propriétaire reçoit régulièrement les mots les plus fréquents
+        if live.has_word_cloud(question_id):
+            self._schedule_word_cloud(live, question_id)
+            return ANSWER_SAVED
+
+        owner_sid = live.owner_sid
+        if owner_sid is None:
+            owner_sid = await redis_ops.get_session_sid_owner(redis_ops.get_redis_client(), join_code)
 
-        async with redis_ops.get_redis_session() as client:
-            owner_sid = await redis_ops.get_session_sid_owner(client, join_code)
-        await self.emit("user_open_answered", text, to=owner_sid)
+        if owner_sid is not None:
+            await self.emit("user_open_answered", text, to=owner_sid)
 
         return ANSWER_SAVED
 
+    @_shard_handler
+    async def on_get_scoreboard(self, sid):
+        """
+        Classement en direct de la session, demandé par le propriétaire de la session.
+        """
+
+        session: dict = await self.get_session(sid)
+
+        if not session.get("is_owner", False):
+            return NEXT_QUESTION_NOT_OWNER
+
+        live = await self._live_session(session["join_code"])
+
+        return live.scoreboard.ranking()
+
+    @_shard_handler
+    async def on_get_progress(self, sid):
+        """
+        Taux de complétion de chaque participant d'une session autonome libre,
+        demandé par le propriétaire de la session.
+        """
+
+        session: dict = await self.get_session(sid)
+
+        if not session.get("is_owner", False):
+            return NEXT_QUESTION_NOT_OWNER
+
+        live = await self._live_session(session["join_code"])
+
+        return {**live.progress_summary(), "players": live.participant_progress()}
+
+    @_shard_handler
     async def on_end_session(self, sid):
         """
         Ordre de fin de la session, initié par le propriétaire de session.
@@ -186,15 +525,53 @@ class SessionNamespace(AsyncNamespace):  # pragma: no cover
 
         join_code = session["join_code"]
 
-        async with AsyncSessionLocal() as sess:
-            await pg_ops.save_session_results(sess, join_code)
+        # Demande répétée après la fin : la session n'est plus en mémoire, ses résultats sont déjà enregistrés
+        if get_live_session(join_code) is None:
+            async with AsyncSessionLocal() as sess:
+                acl = await load_session_acl(sess, join_code)
+            if acl is None or acl.is_finished:
+                return SESSION_ENDS
 
-        await self.emit("session_end", None, room=join_code, skip_sid=sid)
+        live = await self._live_session(join_code)
+        await self._end_session(live, sid)
+
+        return SESSION_ENDS
+
+    async def _end_session(self, live: LiveSession, owner_sid: str | None = None):
+        """
+        Sauvegarde les résultats d'une session et déconnecte tout le monde sauf `owner_sid`,
+        le propriétaire qui a demandé la fin (None si la session se termine seule, à la fin du minuteur).
+        Ne fait rien si la session est déjà terminée (fin demandée au moment de la dernière échéance).
+        """
+        join_code = live.join_code
+
+        async with live.lock:
+            if live.closed:
+                return
+
+            await live.flush()
+
+            async with AsyncSessionLocal() as sess:
+                await pg_ops.save_session_results(sess, join_code)
+                await live.save_progress(sess)
+
+            live.closed = True
+
+        close_live_session(join_code)
+        self._cancel_scheduled(join_code)
+        self._timers.cancel(join_code)
+        self._idle_checks.cancel(join_code)
+        await redis_ops.close_session(redis_ops.get_redis_client(), join_code)
+        if settings.SOCKET_SHARDING:
+            await shard_leases.release(join_code)
+
+        # Le classement final est déjà connu, inutile de relire les résultats sauvegardés
+        if live.owner_sid is not None:
+            await self.emit("scoreboard", live.scoreboard.ranking(), to=live.owner_sid)
+        await self.emit("session_end", None, room=join_code, skip_sid=owner_sid)
 
         for user_sid, _ in manager.get_participants(self.namespace, join_code):
-            if user_sid != sid:
+            if user_sid != owner_sid and user_sid != live.owner_sid:
                 await self.disconnect(user_sid)
 
         await self.close_room(join_code)
-
-        return SESSION_ENDS
@@ -0,0 +1,192 @@
+"""
+Tampon d'écriture des réponses des sessions en cours.
+
+Les réponses de toutes les sockets sont regroupées et écrites en base par lots
+(une transaction et un INSERT multi-lignes par lot) toutes les ANSWER_FLUSH_INTERVAL_MS
+millisecondes, ou dès que ANSWER_FLUSH_MAX_ROWS lignes sont en attente.
+
+Par défaut, `submit` ne rend la main qu'une fois les réponses écrites en base.
+Avec ANSWER_ACK_ON_ENQUEUE, elle rend la main dès la mise en attente.
+"""
+import asyncio
+import logging
+from typing import Callable, Sequence
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .database.async_ import AsyncSessionLocal
+from .database.async_ import operations as pg_ops
+from .database.async_.exceptions import AnswerDoesNotExist
+
+logger = logging.getLogger(__name__)
+
+# (réponses QCM, réponses ouvertes, future d'acquittement)
+_Entry = tuple[list[dict], list[dict], asyncio.Future | None]
+
+
+class AnswerBuffer:
+    """
+    Ecriture différée et groupée des lignes Results et OpenAnswer.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        *,
+        flush_interval: float,
+        max_rows: int,
+        max_pending: int,
+        ack_on_enqueue: bool = False,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.max_pending = max_pending
+        self.ack_on_enqueue = ack_on_enqueue
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        (Re)crée les primitives asyncio si la boucle d'évènements a changé (tests, rechargement).
+        """
+        loop = asyncio.get_running_loop()
+
+        if loop is not self._loop:
+            self._loop = loop
+            self._entries: list[_Entry] = []
+            self._pending_rows = 0
+            self._write_lock = asyncio.Lock()
+            self._has_room = asyncio.Condition()
+            self._wakeup = asyncio.Event()
+            self._flusher: asyncio.Task | None = None
+
+        return loop
+
+    @property
+    def pending(self) -> int:
+        """
+        Nombre de lignes en attente d'écriture.
+        """
+        return self._pending_rows if self._loop is not None else 0
+
+    async def submit(
+        self, results: Sequence[dict] = (), open_answers: Sequence[dict] = (), *, ack_on_enqueue: bool | None = None
+    ):
+        """
+        Met en attente des réponses.
+
+        Attend qu'il y ait de la place si trop de lignes sont déjà en attente, puis,
+        sauf acquittement à la mise en attente, que les réponses soient écrites en base.
+        Lève AnswerDoesNotExist si la base refuse les réponses.
+        """
+        nb_rows = len(results) + len(open_answers)
+        if nb_rows == 0:
+            return
+
+        loop = self._bind_loop()
+
+        async with self._has_room:
+            await self._has_room.wait_for(lambda: self._pending_rows < self.max_pending)
+
+        if ack_on_enqueue is None:
+            ack_on_enqueue = self.ack_on_enqueue
+
+        ack = None if ack_on_enqueue else loop.create_future()
+
+        self._entries.append((list(results), list(open_answers), ack))
+        self._pending_rows += nb_rows
+
+        if self._pending_rows >= self.max_rows:
+            self._wakeup.set()
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._run())
+
+        if ack is not None:
+            await ack
+
+    async def flush(self):
+        """
+        Ecrit immédiatement tout ce qui est en attente.
+        """
+        if self._loop is None:
+            return
+
+        self._bind_loop()
+        await self._write_pending()
+
+    async def _run(self):
+        """
+        Tâche d'écriture de fond, active tant qu'il y a des réponses en attente.
+        """
+        while self._entries:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wakeup.clear()
+            await self._write_pending()
+
+    async def _write_pending(self):
+        async with self._write_lock:
+            entries, self._entries = self._entries, []
+            if not entries:
+                return
+
+            try:
+                await self._write(entries)
+            except IntegrityError:
+                # Une réponse du lot est invalide : on écrit chaque envoi séparément pour isoler les fautifs
+                for entry in entries:
+                    try:
+                        await self._write([entry])
+                    except Exception as e:
+                        self._acknowledge([entry], e)
+                    else:
+                        self._acknowledge([entry])
+            except Exception as e:
+                self._acknowledge(entries, e)
+            else:
+                self._acknowledge(entries)
+            finally:
+                self._pending_rows -= sum(len(r) + len(o) for r, o, _ in entries)
+
+                async with self._has_room:
+                    self._has_room.notify_all()
+
+    async def _write(self, entries: list[_Entry]):
+        results = [row for r, _, _ in entries for row in r]
+        open_answers = [row for _, o, _ in entries for row in o]
+
+        async with self.session_factory() as sess:
+            await pg_ops.save_answers(sess, results, open_answers)
+
+    @staticmethod
+    def _acknowledge(entries: list[_Entry], error: Exception | None = None):
+        if isinstance(error, IntegrityError):
+            error = AnswerDoesNotExist(error)
+
+        for _, _, ack in entries:
+            if ack is None:
+                if error is not None:
+                    logger.error("Réponses perdues après acquittement : %s", error)
+            elif not ack.done():
+                if error is None:
+                    ack.set_result(None)
+                else:
+                    ack.set_exception(error)
+
+
+answer_buffer = AnswerBuffer(
+    AsyncSessionLocal,
+    flush_interval=settings.ANSWER_FLUSH_INTERVAL_MS / 1000,
+    max_rows=settings.ANSWER_FLUSH_MAX_ROWS,
+    max_pending=settings.ANSWER_BUFFER_MAX_PENDING,
+    ack_on_enqueue=settings.ANSWER_ACK_ON_ENQUEUE,
+)
+
+__all__ = ["AnswerBuffer", "answer_buffer"]
@@ -287,6 +287,34 @@ class AnswerBase(BaseModel):
     text: str
 
 
+class AnswerStatsBase(BaseModel):
+    """
+    Nombre de fois qu'une réponse d'un QCM a été choisie, sur toutes les sessions terminées.
+    """
+
+    id: int
+    text: str
+    is_correct: bool
+    nb_chosen: int
+    rate: float | None  # Part des participants qui l'ont choisie
+
+
+class QuestionStatsBase(BaseModel):
+    """
+    Statistiques d'une question sur toutes les sessions terminées qui l'ont utilisée.
+    Les taux et l'indice de discrimination sont None pour les questions ouvertes ou sans participants.
+    """
+
+    question_id: int
+    type: QuestionType
+    nb_sessions: int
+    nb_participants: int
+    success_rate: float | None
+    discrimination_index: float | None  # Taux de réussite des meilleurs moins celui des moins bons
+    average_response_time_ms: float | None  # None si aucun temps de réponse n'est connu
+    answers: list[AnswerStatsBase]
+
+
 class SessionDetailsBase(BaseModel):
     """
     Données d'une session.
@@ -300,6 +328,11 @@ class SessionDetailsBase(BaseModel):
     total_answers: int
 
 
+class ExportFormat(Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
 class CasSetupStage(Enum):
     must_cas_login = "must_cas_login"
     logged_in = "logged_in"
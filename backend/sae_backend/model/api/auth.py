@@ -8,10 +8,10 @@ from typing import Annotated
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ...model.database import db_models, get_db
-from ...model.database.operations import get_user
+from ...model.database import db_models, get_async_db
+from ...model.database.async_.crud import get_user
 from ..config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/login")  # XXX: url non utilisée
@@ -68,7 +68,7 @@ def get_email_from_jwt(token: str) -> str | None:
     return payload.get("sub")
 
 
-def _get_current_user(db: Session, token: str, *, only_teachers=False) -> db_models.User:
+async def _get_current_user(db: AsyncSession, token: str, *, only_teachers=False) -> db_models.User:
     """
     Renvoie l'utilisateur qui correspond au token de connexion (méthode interne).
     """
@@ -89,7 +89,7 @@ def _get_current_user(db: Session, token: str, *, only_teachers=False) -> db_mod
         # Le token n'est pas valide (expiré, mauvaise signature, etc.)
         raise credentials_exception
 
-    user = get_user(db, username)
+    user = await get_user(db, username)
 
     # Test si l'utilisateur existe dans la base de données
     if user is None:
@@ -105,19 +105,19 @@ def _get_current_user(db: Session, token: str, *, only_teachers=False) -> db_mod
     return user
 
 
-def only_teacher_allowed(
-    db: Annotated[Session, Depends(get_db)], token: Annotated[str, Depends(oauth2_scheme)]
+async def only_teacher_allowed(
+    db: Annotated[AsyncSession, Depends(get_async_db)], token: Annotated[str, Depends(oauth2_scheme)]
 ) -> db_models.User:
     """
     Authorise uniquement un professeur a utiliser la route.
     """
-    return _get_current_user(db, token, only_teachers=True)
+    return await _get_current_user(db, token, only_teachers=True)
 
 
-def student_or_teacher_allowed(
-    db: Annotated[Session, Depends(get_db)], token: Annotated[str, Depends(oauth2_scheme)]
+async def student_or_teacher_allowed(
+    db: Annotated[AsyncSession, Depends(get_async_db)], token: Annotated[str, Depends(oauth2_scheme)]
 ) -> db_models.User:
     """
     Authorise les étudiants et professeurs a utiliser la route.
     """
-    return _get_current_user(db, token)
+    return await _get_current_user(db, token)
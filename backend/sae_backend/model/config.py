@@ -30,7 +30,24 @@ class _Settings(BaseSettings):
     POSTGRES_PASSWORD: Optional[str] = None
     POSTGRES_DB: Optional[str] = None
 
+    DB_AUTO_MIGRATE: bool = False  # Applique les migrations au démarrage (un seul processus : développement, tests)
+
     REDIS_URL: Optional[str] = None
+    REDIS_SESSION_TTL: int = 6 * 3600  # Durée de vie (en secondes) des clés Redis d'une session
+    SOCKETIO_MANAGER: Literal["redis", "memory"] = "redis"  # "memory" : un seul processus uniquement
+    SOCKET_SHARDING: bool = False  # Plusieurs processus, chacun propriétaire de ses sessions (voir model/shard.py)
+    SHARD_LEASE_TTL: int = 60  # Durée (en secondes) d'un bail de session sans prolongation
+
+    # Ecriture groupée des réponses pendant les sessions
+    ANSWER_FLUSH_INTERVAL_MS: int = 50
+    ANSWER_FLUSH_MAX_ROWS: int = 500
+    ANSWER_BUFFER_MAX_PENDING: int = 10_000
+    ANSWER_ACK_ON_ENQUEUE: bool = False  # Acquitte avant l'écriture en base (plus rapide, moins sûr)
+    ANSWER_STATS_INTERVAL_MS: int = 250  # Intervalle minimal entre deux résumés des réponses envoyés au propriétaire
+    WORD_CLOUD_TOP_K: int = 50  # Nombre de mots envoyés au propriétaire pour les questions ouvertes en un mot
+    PRESENCE_TICK_MS: int = 500  # Intervalle minimal entre deux envois des arrivées et départs de participants
+    AUTO_TIMER_QUESTION_S: float = 30  # Temps laissé pour chaque question dans les sessions avec minuteur
+    LIVE_SESSION_IDLE_S: float = 2 * 3600  # Inactivité (en secondes) après laquelle une session est oubliée
 
     model_config = _model_config
 
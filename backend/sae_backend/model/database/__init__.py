@@ -2,26 +2,46 @@
 Tout ce aqui concerne la communication avec la base de données ainsi que les opération CRUD.
 """
 
-from sqlalchemy.orm import Session
-from typing import Generator, Any
+from typing import AsyncGenerator, Any
 
-from .connection import SessionLocal, engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from .async_ import AsyncSessionLocal, dispose_async_engine, get_async_engine
+from .connection import SessionLocal, dispose_engine, get_engine
 from .db_models import Base
+from .migrations import check_schema_version, migrate
 
 
 def init_db():
     """
-    Effectue la population initiale de la base de données.
+    Crée les moteurs de la base de données et vérifie que le schéma est à jour (démarrage de l'application).
+    En développement et pendant les tests (DB_AUTO_MIGRATE), les migrations sont d'abord appliquées :
+    en production, elles le sont une seule fois par la commande de migration, avant le démarrage des serveurs.
     """
-    Base.metadata.create_all(bind=engine)
+    engine = get_engine()
+    get_async_engine()
+
+    if settings.DB_AUTO_MIGRATE:
+        migrate(engine)
+
+    check_schema_version(engine)
 
 
-def get_db() -> Generator[Session, Any, Any]:  # pragma: no cover
+async def close_db():
+    """
+    Ferme les connexions des moteurs de la base de données (arrêt de l'application).
+    """
+    await dispose_async_engine()
+    dispose_engine()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, Any]:
     """
     Fourni une connexion à la base de données depuis une route API.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+__all__ = ["Base", "SessionLocal", "close_db", "get_async_db", "get_engine", "init_db"]
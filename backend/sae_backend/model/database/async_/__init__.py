@@ -1,11 +1,13 @@
 """
 Connexion à la base de données asyncrone
+
+Comme le moteur synchrone (voir ..connection), le moteur est créé à la première utilisation.
 """
 import os
 from asyncio import current_task
 from functools import partial
 
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, async_scoped_session
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, async_scoped_session
 
 from ...config import get_dsn
 
@@ -15,15 +17,35 @@ else:
     engine_creator = partial(create_async_engine, pool_size=20, max_overflow=-1)
 
 
-async_engine = engine_creator(get_dsn(is_async=True))
-AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
-
+# Liés au moteur par get_async_engine
+AsyncSessionLocal = async_sessionmaker(expire_on_commit=False)
 
-async_session_factory = async_sessionmaker(
-    async_engine,
-    expire_on_commit=False,
-)
+async_session_factory = async_sessionmaker(expire_on_commit=False)
 AsyncScopedSession = async_scoped_session(
     async_session_factory,
     scopefunc=current_task,
 )
+
+_async_engine: AsyncEngine | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Renvoie le moteur asyncrone de la base de données, en le créant au premier appel.
+    """
+    global _async_engine
+
+    if _async_engine is None:
+        _async_engine = engine_creator(get_dsn(is_async=True))
+        AsyncSessionLocal.configure(bind=_async_engine)
+        async_session_factory.configure(bind=_async_engine)
+
+    return _async_engine
+
+
+async def dispose_async_engine():
+    """
+    Ferme les connexions ouvertes par le moteur asyncrone, si il a été créé.
+    """
+    if _async_engine is not None:
+        await _async_engine.dispose()
@@ -0,0 +1,1710 @@
+"""
+Opérations CRUD asyncrones des routes de l'API.
+
+Pendant asyncrone de ..operations, fonction pour fonction : les routes s'exécutent directement sur la boucle
+d'évènements et partagent le pool de connexions des évènements socket, au lieu d'occuper un thread et une
+connexion du moteur synchrone par requête.
+"""
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Row, case, delete, desc, exists, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from ..db_models import (
+    Answer,
+    AnswerStats,
+    AuthorisedGroup,
+    Group,
+    GroupMember,
+    ParticipantProgress,
+    Question,
+    QuestionStats,
+    QuestionType,
+    ResultDetail,
+    Results,
+    ResultSummary,
+    Survey,
+    SurveyQuestion,
+    SurveySession,
+    SurveySessionTemplate,
+    SurveySessionType,
+    User,
+    UserAffiliation,
+)
+from ..group_hierarchy import detach_group, new_group_closure
+from ...api import api_models
+from ...security import JOIN_CODE_ATTEMPTS, create_session_join_code
+
+# Nombre de lignes lues à la fois par les exports de résultats
+EXPORT_BATCH = 1000
+
+"""
+
+Concerne les opérations sur la base de données pour les utilisateurs.
+
+"""
+
+
+async def register_user(
+    db: AsyncSession, name: str | None, surname: str | None, email: str, affiliation: UserAffiliation
+) -> User:
+    """
+    Enregistre un utilisateur dans la base de données.
+
+    Paramètres
+    ----------
+    name : str | None
+        Prénom de l'utilisateur.
+
+    surname : str | None
+        Nom de l'utilisateur.
+
+    email : str
+        Adresse email de l'utilisateur.
+
+    affiliation : UserAffiliation
+        Statut de l'utilisateur (étudiant ou enseignant).
+
+    Retour
+    ------
+
+    User
+        Utilisateur enregistré dans la base de données.
+    """
+    new_user = User(email=email, name=name, surname=surname, affiliation=affiliation)
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+
+    return new_user
+
+
+async def get_user(db: AsyncSession, email: str | None) -> User | None:
+    """
+    Renvoie l'utilisateur qui correspond à une adresse mail.
+
+    Paramètres
+    ----------
+    email : str | None
+        Adresse email de l'utilisateur.
+
+    Retour
+    ------
+
+    User | None
+        Utilisateur correspondant à l'email ou None si aucun utilisateur ne correspond.
+    """
+    return (await db.execute(select(User).where(User.email == email).limit(1))).scalar()
+
+
+async def get_user_by_id(db: AsyncSession, user_id: int) -> User | None:
+    """
+    Renvoie l'utilisateur qui correspond à un id.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur.
+
+    Retour
+    ------
+
+    User | None
+        Utilisateur correspondant à l'id ou None si aucun utilisateur ne correspond.
+    """
+    return await db.get(User, user_id)
+
+
+async def modify_user(db: AsyncSession, email: str, name: str | None, surname: str | None) -> User:
+    """
+    Modifie le prénom et/ou le nom d'un utilisateur.
+
+    Paramètres
+    ----------
+    email : str
+        Adresse email de l'utilisateur.
+
+    name : str | None
+        Nouveau prénom, ou None pour le garder.
+
+    surname : str | None
+        Nouveau nom, ou None pour le garder.
+
+    Retour
+    ------
+
+    User
+        Utilisateur modifié.
+    """
+    user = await get_user(db, email)
+
+    if name is not None:
+        user.name = name  # type: ignore
+
+    if surname is not None:
+        user.surname = surname  # type: ignore
+
+    await db.commit()
+    await db.refresh(user)
+
+    return user  # type: ignore
+
+
+"""
+
+Concerne les opérations sur la base de données pour les questions.
+
+"""
+
+
+async def get_survey_info(db: AsyncSession, user_id: int, survey_id: int) -> Survey | None:
+    """
+    Renvoie un questionnaire s'il appartient à l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    survey_id : int
+        Id du questionnaire.
+
+    Retour
+    ------
+
+    Survey | None
+        Questionnaire correspondant à l'id ou None s'il n'appartient pas à l'utilisateur.
+    """
+    stmt = select(Survey).where(Survey.user_id == user_id, Survey.id == survey_id).limit(1)
+    return (await db.execute(stmt)).scalar()
+
+
+async def _owned_question(db: AsyncSession, user_id: int, question_id: int) -> Question | None:
+    stmt = select(Question).where(Question.user_id == user_id, Question.id == question_id).limit(1)
+    return (await db.execute(stmt)).scalar()
+
+
+async def create_survey(db: AsyncSession, user_id: int, title: str, subject: str) -> Survey:
+    """
+    Enregistre la création d'un questionnaire dans la base de données.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    title : str
+        Titre du questionnaire.
+
+    subject : str
+        Sujet du questionnaire.
+
+    Retour
+    ------
+
+    Survey
+        Questionnaire enregistré dans la base de données.
+    """
+    new_survey = Survey(user_id=user_id, title=title, subject=subject)
+    db.add(new_survey)
+    await db.commit()
+    await db.refresh(new_survey)
+
+    return new_survey
+
+
+async def get_surveys(db: AsyncSession, user_id: int) -> Sequence[Survey]:
+    """
+    Renvoie tous les questionnaires de l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    Retour
+    ------
+
+    Sequence[Survey]
+        Questionnaires créés par l'utilisateur.
+    """
+    return (await db.execute(select(Survey).where(Survey.user_id == user_id))).scalars().all()
+
+
+async def get_survey(db: AsyncSession, user_id: int, survey_id: int) -> Sequence[Question] | None:
+    """
+    Renvoie les questions d'un questionnaire s'il appartient à l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    survey_id : int
+        Id du questionnaire.
+
+    Retour
+    ------
+
+    Sequence[Question] | None
+        Questions du questionnaire ou None s'il n'appartient pas à l'utilisateur.
+    """
+    if await get_survey_info(db, user_id, survey_id) is None:
+        return None
+
+    stmt = (
+        select(Question)
+        .where(Question.id.in_(select(SurveyQuestion.question_id).where(SurveyQuestion.survey_id == survey_id)))
+    )
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def update_survey(db: AsyncSession, user_id: int, survey_id: int, title: str, subject: str) -> Survey | None:
+    """
+    Met à jour le titre et le sujet d'un questionnaire s'il appartient à l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    survey_id : int
+        Id du questionnaire.
+
+    title : str
+        Nouveau titre du questionnaire.
+
+    subject : str
+        Nouveau sujet du questionnaire.
+
+    Retour
+    ------
+
+    Survey | None
+        Questionnaire modifié ou None s'il n'appartient pas à l'utilisateur.
+    """
+    survey = await get_survey_info(db, user_id, survey_id)
+    if survey is None:
+        return None
+
+    survey.title = title  # type: ignore
+    survey.subject = subject  # type: ignore
+    await db.commit()
+    await db.refresh(survey)
+    return survey
+
+
+async def delete_survey(db: AsyncSession, user_id: int, survey_id: int) -> Survey | None:
+    """
+    Supprime un questionnaire (et ses liens avec les questions) s'il appartient à l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    survey_id : int
+        Id du questionnaire.
+
+    Retour
+    ------
+
+    Survey | None
+        Questionnaire supprimé ou None s'il n'appartient pas à l'utilisateur.
+    """
+    survey = await get_survey_info(db, user_id, survey_id)
+    if survey is None:
+        return None
+
+    await db.execute(
+        delete(SurveyQuestion)
+        .where(SurveyQuestion.survey_id == survey_id)
+        .execution_options(synchronize_session=False)
+    )
+    await db.delete(survey)
+    await db.commit()
+    return survey
+
+
+async def add_question_to_survey(
+    db: AsyncSession, user_id: int, survey_id: int, question_id: int
+) -> SurveyQuestion | None:
+    """
+    Ajoute une question à un questionnaire si l'utilisateur est propriétaire des deux.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    survey_id : int
+        Id du questionnaire.
+
+    question_id : int
+        Id de la question.
+
+    Retour
+    ------
+
+    SurveyQuestion | None
+        Lien entre le questionnaire et la question ou
+        None si l'un des deux n'appartient pas à l'utilisateur.
+    """
+    if await get_survey_info(db, user_id, survey_id) is None:
+        return None
+    if await _owned_question(db, user_id, question_id) is None:
+        return None
+
+    new_survey_question = SurveyQuestion(survey_id=survey_id, question_id=question_id)
+    db.add(new_survey_question)
+    await db.commit()
+    await db.refresh(new_survey_question)
+
+    return new_survey_question
+
+
+async def remove_question_from_survey(
+    db: AsyncSession, user_id: int, survey_id: int, question_id: int
+) -> dict[str, str] | None:
+    """
+    Enlève une question d'un questionnaire si l'utilisateur est propriétaire des deux.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    survey_id : int
+        Id du questionnaire.
+
+    question_id : int
+        Id de la question.
+
+    Retour
+    ------
+
+    dict[str, str] | None
+        Message de confirmation ou None si l'un des deux n'appartient pas à l'utilisateur
+        ou si la question n'est pas dans le questionnaire.
+    """
+    if await get_survey_info(db, user_id, survey_id) is None:
+        return None
+    if await _owned_question(db, user_id, question_id) is None:
+        return None
+
+    stmt = select(SurveyQuestion).where(
+        SurveyQuestion.survey_id == survey_id, SurveyQuestion.question_id == question_id
+    ).limit(1)
+    survey_question = (await db.execute(stmt)).scalar()
+    if survey_question is None:
+        return None
+
+    await db.delete(survey_question)
+    await db.commit()
+    return {"message": "Question supprimée du questionnaire"}
+
+
+async def create_question(db: AsyncSession, user_id: int, type: QuestionType, text: str, media: str | None) -> Question:
+    """
+    Enregistre la création d'une nouvelle question dans la base de données.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    type : QuestionType
+        Type de la question.
+
+    text : str
+        Énoncé de la question.
+
+    media : str | None
+        Média associé à la question, ou None.
+
+    Retour
+    ------
+
+    Question
+        Question enregistrée dans la base de données.
+    """
+    new_question = Question(user_id=user_id, type=type, text=text, media=media)
+
+    db.add(new_question)
+    await db.commit()
+    await db.refresh(new_question)
+
+    return new_question
+
+
+async def get_questions(db: AsyncSession, user_id: int) -> Sequence[Question]:
+    """
+    Renvoie toutes les questions créées par l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    Retour
+    ------
+
+    Sequence[Question]
+        Questions de l'utilisateur.
+    """
+    return (await db.execute(select(Question).where(Question.user_id == user_id))).scalars().all()
+
+
+async def get_questions_stats(db: AsyncSession, user_id: int) -> list[api_models.QuestionStatsBase]:
+    """
+    Renvoie les statistiques des questions créées par l'utilisateur, en additionnant les contributions
+    des sessions terminées (voir question_stats.py) : deux requêtes, sans relire les réponses.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    Retour
+    ------
+
+    list[api_models.QuestionStatsBase]
+        Statistiques de chaque question, par id croissant.
+    """
+    stmt_questions = (
+        select(
+            Question.id,
+            Question.type,
+            func.count(QuestionStats.session_id).label("nb_sessions"),
+            *(
+                func.coalesce(func.sum(column), 0).label(column.key)
+                for column in (
+                    QuestionStats.nb_participants,
+                    QuestionStats.nb_correct,
+                    QuestionStats.upper_count,
+                    QuestionStats.upper_correct,
+                    QuestionStats.lower_count,
+                    QuestionStats.lower_correct,
+                    QuestionStats.response_time_total_ms,
+                    QuestionStats.nb_timed,
+                )
+            ),
+        )
+        .outerjoin(QuestionStats, QuestionStats.question_id == Question.id)
+        .where(Question.user_id == user_id)
+        .group_by(Question.id, Question.type)
+        .order_by(Question.id)
+    )
+
+    stmt_answers = (
+        select(
+            Answer.question_id,
+            Answer.id,
+            Answer.text,
+            Answer.is_correct,
+            func.coalesce(func.sum(AnswerStats.nb_chosen), 0).label("nb_chosen"),
+        )
+        .join(Question, Answer.question_id == Question.id)
+        .outerjoin(AnswerStats, AnswerStats.answer_id == Answer.id)
+        .where(Question.user_id == user_id)
+        .group_by(Answer.question_id, Answer.id, Answer.text, Answer.is_correct)
+        .order_by(Answer.id)
+    )
+
+    questions = (await db.execute(stmt_questions)).all()
+    answers = (await db.execute(stmt_answers)).all()
+
+    def rate(count: int, total: int) -> float | None:
+        return count / total if total else None
+
+    qcm_types = {QuestionType.single_answer, QuestionType.multiple_answers}
+    participants = {q.id: q.nb_participants for q in questions}
+
+    answers_by_question: dict[int, list[api_models.AnswerStatsBase]] = {}
+    for answer in answers:
+        answers_by_question.setdefault(answer.question_id, []).append(
+            api_models.AnswerStatsBase(
+                id=answer.id,
+                text=answer.text,
+                is_correct=bool(answer.is_correct),
+                nb_chosen=answer.nb_chosen,
+                rate=rate(answer.nb_chosen, participants[answer.question_id]),
+            )
+        )
+
+    stats = []
+    for q in questions:
+        is_qcm = q.type in qcm_types
+        upper_rate = rate(q.upper_correct, q.upper_count)
+        lower_rate = rate(q.lower_correct, q.lower_count)
+
+        stats.append(
+            api_models.QuestionStatsBase(
+                question_id=q.id,
+                type=q.type,
+                nb_sessions=q.nb_sessions,
+                nb_participants=q.nb_participants,
+                success_rate=rate(q.nb_correct, q.nb_participants) if is_qcm else None,
+                discrimination_index=(
+                    upper_rate - lower_rate if is_qcm and upper_rate is not None and lower_rate is not None else None
+                ),
+                average_response_time_ms=rate(q.response_time_total_ms, q.nb_timed),
+                answers=answers_by_question.get(q.id, []) if is_qcm else [],
+            )
+        )
+
+    return stats
+
+
+async def get_question(db: AsyncSession, user_id: int, question_id: int) -> Question | None:
+    """
+    Renvoie une question si elle appartient à l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    question_id : int
+        Id de la question.
+
+    Retour
+    ------
+
+    Question | None
+        Question correspondant à l'id ou None si elle n'appartient pas à l'utilisateur.
+    """
+    return await _owned_question(db, user_id, question_id)
+
+
+async def update_question(
+    db: AsyncSession, user_id: int, question_id: int, text: str, media: str | None, type: QuestionType
+) -> Question | None:
+    """
+    Met à jour une question si elle appartient à l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    question_id : int
+        Id de la question.
+
+    text : str
+        Nouvel énoncé de la question.
+
+    media : str | None
+        Nouveau média associé à la question, ou None.
+
+    type : QuestionType
+        Nouveau type de la question.
+
+    Retour
+    ------
+
+    Question | None
+        Question modifiée ou None si elle n'appartient pas à l'utilisateur.
+    """
+    question = await _owned_question(db, user_id, question_id)
+    if question is None:
+        return None
+
+    question.text = text  # type: ignore
+    question.media = media  # type: ignore
+    question.type = type  # type: ignore
+    await db.commit()
+    await db.refresh(question)
+    return question
+
+
+async def delete_question(db: AsyncSession, user_id: int, question_id: int) -> Question | None:
+    """
+    Supprime une question si elle appartient à l'utilisateur, avec ses réponses et ses liens avec les questionnaires.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    question_id : int
+        Id de la question.
+
+    Retour
+    ------
+
+    Question | None
+        Question supprimée ou None si elle n'appartient pas à l'utilisateur.
+    """
+    question = await _owned_question(db, user_id, question_id)
+    if question is None:
+        return None
+
+    await db.execute(delete(Answer).where(Answer.question_id == question_id))
+    await db.execute(delete(SurveyQuestion).where(SurveyQuestion.question_id == question_id))
+
+    await db.delete(question)
+    await db.commit()
+
+    return question
+
+
+async def create_answer(db: AsyncSession, user_id: int, question_id: int, text: str, is_correct: bool) -> Answer | None:
+    """
+    Ajoute une réponse à une question à choix de l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    question_id : int
+        Id de la question.
+
+    text : str
+        Texte de la réponse.
+
+    is_correct : bool
+        Vrai si la réponse est correcte.
+
+    Retour
+    ------
+
+    Answer | None
+        Réponse enregistrée ou None si la question n'appartient pas à l'utilisateur
+        ou n'est pas une question à choix.
+    """
+    stmt = select(Question.id).where(
+        Question.id == question_id,
+        Question.user_id == user_id,
+        or_(Question.type == QuestionType.multiple_answers, Question.type == QuestionType.single_answer),
+    )
+    if (await db.execute(stmt)).scalar() is None:
+        return None
+
+    new_answer = Answer(question_id=question_id, text=text, is_correct=is_correct)
+    db.add(new_answer)
+    await db.commit()
+    await db.refresh(new_answer)
+
+    return new_answer
+
+
+async def get_answers(db: AsyncSession, user_id: int, question_id: int) -> Sequence[Answer] | None:
+    """
+    Renvoie les réponses d'une question si elle appartient à l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    question_id : int
+        Id de la question.
+
+    Retour
+    ------
+
+    Sequence[Answer] | None
+        Réponses de la question ou None si elle n'appartient pas à l'utilisateur.
+    """
+    if await _owned_question(db, user_id, question_id) is None:
+        return None
+    return (await db.execute(select(Answer).where(Answer.question_id == question_id))).scalars().all()
+
+
+async def get_answer(db: AsyncSession, user_id: int, answer_id: int) -> Answer | None:
+    """
+    Renvoie une réponse si sa question appartient à l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    answer_id : int
+        Id de la réponse.
+
+    Retour
+    ------
+
+    Answer | None
+        Réponse correspondant à l'id ou None si sa question n'appartient pas à l'utilisateur.
+    """
+    stmt = (
+        select(Answer)
+        .join(Question, Answer.question_id == Question.id)
+        .where(Answer.id == answer_id, Question.user_id == user_id)
+    )
+    return (await db.execute(stmt)).scalar()
+
+
+async def update_answer(db: AsyncSession, user_id: int, answer_id: int, text: str, is_correct: bool) -> Answer | None:
+    """
+    Met à jour une réponse si sa question appartient à l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    answer_id : int
+        Id de la réponse.
+
+    text : str
+        Nouveau texte de la réponse.
+
+    is_correct : bool
+        Vrai si la réponse est correcte.
+
+    Retour
+    ------
+
+    Answer | None
+        Réponse modifiée ou None si sa question n'appartient pas à l'utilisateur.
+    """
+    answer = await get_answer(db, user_id, answer_id)
+    if answer is None:
+        return None
+
+    answer.text = text  # type:ignore
+    answer.is_correct = is_correct  # type:ignore
+    await db.commit()
+    await db.refresh(answer)
+    return answer
+
+
+async def delete_answer(db: AsyncSession, user_id: int, answer_id: int) -> Answer | None:
+    """
+    Supprime une réponse si sa question appartient à l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    answer_id : int
+        Id de la réponse.
+
+    Retour
+    ------
+
+    Answer | None
+        Réponse supprimée ou None si sa question n'appartient pas à l'utilisateur.
+    """
+    answer = await get_answer(db, user_id, answer_id)
+    if answer is None:
+        return None
+
+    await db.delete(answer)
+    await db.commit()
+    return answer
+
+
+"""
+
+Concerne les opérations sur la base de données pour les groupes.
+
+"""
+
+
+async def _group_creator_id(db: AsyncSession, group_id: int) -> int | None:
+    return (await db.execute(select(Group.creator_id).where(Group.id == group_id))).scalar()
+
+
+async def add_user_to_group(db: AsyncSession, user_id: int, added_member_id: int, group_id: int) -> GroupMember | None:
+    """
+    Ajoute un utilisateur à un groupe, si le groupe appartient à l'utilisateur connecté.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur propriétaire du groupe.
+
+    added_member_id : int
+        Id de l'utilisateur à ajouter.
+
+    group_id : int
+        Id du groupe.
+
+    Retour
+    ------
+
+    GroupMember | None
+        Membre du groupe enregistré ou None si l'utilisateur n'est pas le créateur du groupe.
+    """
+    if await _group_creator_id(db, group_id) != user_id:
+        return None
+
+    new_group_member = GroupMember(user_id=added_member_id, group_id=group_id)
+    db.add(new_group_member)
+    await db.commit()
+    await db.refresh(new_group_member)
+
+    return new_group_member
+
+
+async def create_group(db: AsyncSession, creator_id: int, group_name: str, parent_id: int | None) -> Group:
+    """
+    Enregistre la création d'un nouveau groupe, et sa place dans la hiérarchie des groupes.
+
+    Paramètres
+    ----------
+    creator_id : int
+        Id de l'utilisateur qui crée le groupe.
+
+    group_name : str
+        Nom du groupe.
+
+    parent_id : int | None
+        Id du groupe parent ou None s'il n'y a pas de groupe parent.
+
+    Retour
+    ------
+
+    Group
+        Groupe enregistré dans la base de données.
+    """
+    new_group = Group(creator_id=creator_id, group_name=group_name, parent_id=parent_id)
+    db.add(new_group)
+    await db.flush()
+
+    for stmt in new_group_closure(new_group.id, parent_id):  # type: ignore
+        await db.execute(stmt)
+
+    await db.commit()
+    await db.refresh(new_group)
+
+    return new_group
+
+
+async def get_groups(db: AsyncSession) -> Sequence[Group]:
+    """
+    Renvoie tous les groupes.
+
+    Retour
+    ------
+
+    Sequence[Group]
+        Tous les groupes.
+    """
+    return (await db.execute(select(Group))).scalars().all()
+
+
+async def get_user_groups(db: AsyncSession, user_id: int) -> Sequence[Group]:
+    """
+    Renvoie tous les groupes dont l'utilisateur est membre.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    Retour
+    ------
+
+    Sequence[Group]
+        Groupes dont l'utilisateur est membre.
+    """
+    stmt = select(Group).join(GroupMember).where(GroupMember.user_id == user_id)
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def get_group(db: AsyncSession, group_id: int) -> Group | None:
+    """
+    Renvoie le groupe qui correspond à un id.
+
+    Paramètres
+    ----------
+    group_id : int
+        Id du groupe.
+
+    Retour
+    ------
+
+    Group | None
+        Groupe correspondant à l'id ou None si aucun groupe ne correspond.
+    """
+    return await db.get(Group, group_id)
+
+
+async def update_group(db: AsyncSession, group_id: int, group_name: str) -> Group | None:
+    """
+    Renomme un groupe.
+
+    Paramètres
+    ----------
+    group_id : int
+        Id du groupe.
+
+    group_name : str
+        Nouveau nom du groupe.
+
+    Retour
+    ------
+
+    Group | None
+        Groupe modifié ou None si aucun groupe ne correspond.
+    """
+    group = await get_group(db, group_id)
+    if group is None:
+        return None
+
+    group.group_name = group_name  # type: ignore
+    await db.commit()
+    await db.refresh(group)
+    return group
+
+
+async def delete_group(db: AsyncSession, group_id: int) -> Group | None:
+    """
+    Supprime un groupe et le retire de la hiérarchie : ses sous-groupes deviennent des groupes racines.
+
+    Paramètres
+    ----------
+    group_id : int
+        Id du groupe.
+
+    Retour
+    ------
+
+    Group | None
+        Groupe supprimé ou None si aucun groupe ne correspond.
+    """
+    group = await get_group(db, group_id)
+    if group is None:
+        return None
+
+    for stmt in detach_group(group_id):
+        await db.execute(stmt)
+
+    await db.delete(group)
+    await db.commit()
+
+    return group
+
+
+async def get_group_users(db: AsyncSession, group_id: int) -> Sequence[User]:
+    """
+    Renvoie les membres d'un groupe.
+
+    Paramètres
+    ----------
+    group_id : int
+        Id du groupe.
+
+    Retour
+    ------
+
+    Sequence[User]
+        Membres du groupe.
+    """
+    stmt = select(User).join(GroupMember).where(GroupMember.group_id == group_id)
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def remove_member(db: AsyncSession, group_id: int, user_id: int, removed_user_id: int) -> GroupMember | None:
+    """
+    Retire un membre d'un groupe, si le groupe appartient à l'utilisateur connecté.
+
+    Paramètres
+    ----------
+    group_id : int
+        Id du groupe.
+
+    user_id : int
+        Id de l'utilisateur propriétaire du groupe.
+
+    removed_user_id : int
+        Id de l'utilisateur à retirer.
+
+    Retour
+    ------
+
+    GroupMember | None
+        Membre retiré ou None si l'utilisateur n'est pas le créateur du groupe
+        ou si l'utilisateur à retirer n'est pas dans le groupe.
+    """
+    if await _group_creator_id(db, group_id) != user_id:
+        return None
+
+    group_member = await db.get(GroupMember, {"group_id": group_id, "user_id": removed_user_id})
+    if group_member is None:
+        return None
+
+    await db.delete(group_member)
+    await db.commit()
+
+    return group_member
+
+
+"""
+
+Concerne les opérations sur la base de données pour les sessions.
+
+"""
+
+
+async def get_authorised_group_id(db: AsyncSession, template: SurveySessionTemplate) -> int | None:
+    """
+    Renvoie l'id du groupe autorisé à participer aux sessions d'un modèle.
+
+    Paramètres
+    ----------
+    template : SurveySessionTemplate
+        Modèle de session.
+
+    Retour
+    ------
+
+    int | None
+        Id du groupe autorisé ou None si le modèle est public.
+    """
+    stmt = select(AuthorisedGroup.group_id).where(AuthorisedGroup.session_template_id == template.id)
+    return (await db.execute(stmt)).scalar()
+
+
+def _owned_templates(user_id: int):
+    return (
+        select(SurveySessionTemplate)
+        .join(Survey, SurveySessionTemplate.survey_id == Survey.id)
+        .where(Survey.user_id == user_id)
+    )
+
+
+async def get_all_session_templates(db: AsyncSession, user_id: int) -> Sequence[SurveySessionTemplate]:
+    """
+    Renvoie tous les modèles de session de l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    Retour
+    ------
+
+    Sequence[SurveySessionTemplate]
+        Modèles de session non supprimés de l'utilisateur.
+    """
+    stmt = _owned_templates(user_id).where(SurveySessionTemplate.deleted == False)  # noqa
+    return (await db.execute(stmt)).scalars().all()
+
+
+async def get_session_template(
+    db: AsyncSession, user_id: int, session_template_id: int
+) -> SurveySessionTemplate | None:
+    """
+    Renvoie un modèle de session de l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    session_template_id : int
+        Id du modèle de session.
+
+    Retour
+    ------
+
+    SurveySessionTemplate | None
+        Modèle de session ou None s'il n'appartient pas à l'utilisateur ou a été supprimé.
+    """
+    stmt = (
+        _owned_templates(user_id)
+        .where(SurveySessionTemplate.id == session_template_id)
+        .where(SurveySessionTemplate.deleted == False)  # noqa
+    )
+    return (await db.execute(stmt)).scalar()
+
+
+async def create_session_template(
+    db: AsyncSession,
+    user_id: int,
+    survey_id: int,
+    name: str,
+    type: SurveySessionType,
+    authorised_group_id: int | None,
+    show_answers: bool,
+) -> SurveySessionTemplate | None:
+    """
+    Crée un modèle de session.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    survey_id : int
+        Id du questionnaire.
+
+    name : str
+        Nom du modèle de session.
+
+    type : SurveySessionType
+        Déroulement des sessions (pilotée, avec minuteur ou autonome libre).
+
+    authorised_group_id : int | None
+        Id du groupe autorisé à participer, ou None pour une session publique.
+
+    show_answers : bool
+        Vrai si les bonnes réponses sont montrées aux participants.
+
+    Retour
+    ------
+
+    SurveySessionTemplate | None
+        Modèle de session enregistré ou None si le questionnaire n'appartient pas à l'utilisateur.
+    """
+
+    # Est-ce qu'on a le droit de créer un modèle de session depuis ce questionaire ?
+    survey_creator_id = (await db.execute(select(Survey.user_id).where(Survey.id == survey_id))).scalar()
+    if survey_creator_id != user_id:
+        return None
+
+    is_public = authorised_group_id is None
+
+    template = SurveySessionTemplate(
+        survey_id=survey_id, name=name, type=type, is_public=is_public, show_answers=show_answers
+    )
+    db.add(template)
+    await db.flush()
+
+    if not is_public:
+        db.add(AuthorisedGroup(group_id=authorised_group_id, session_template_id=template.id))
+
+    await db.commit()
+    await db.refresh(template)
+
+    return template
+
+
+async def update_session_template(
+    db: AsyncSession,
+    user_id: int,
+    session_template_id: int,
+    survey_id: int | None,
+    name: str | None,
+    type: SurveySessionType | None,
+    authorised_group_id: int | None,
+    show_answers: bool | None,
+) -> SurveySessionTemplate | None:
+    """
+    Modifie un modèle de session. Les paramètres à None ne sont pas modifiés, sauf le groupe autorisé.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    session_template_id : int
+        Id du modèle de session.
+
+    survey_id : int | None
+        Id du nouveau questionnaire.
+
+    name : str | None
+        Nouveau nom du modèle de session.
+
+    type : SurveySessionType | None
+        Nouveau déroulement des sessions.
+
+    authorised_group_id : int | None
+        Id du groupe autorisé à participer, ou None pour une session publique.
+
+    show_answers : bool | None
+        Vrai si les bonnes réponses sont montrées aux participants.
+
+    Retour
+    ------
+
+    SurveySessionTemplate | None
+        Modèle de session modifié ou None s'il n'appartient pas à l'utilisateur.
+    """
+    session_template = await get_session_template(db, user_id, session_template_id)
+
+    if not session_template:
+        return None
+
+    if survey_id is not None:
+        session_template.survey_id = survey_id  # type: ignore
+
+    if name is not None:
+        session_template.name = name  # type: ignore
+
+    if type is not None:
+        session_template.type = type  # type: ignore
+
+    # On supprime l'ancien groupe lié
+    await db.execute(delete(AuthorisedGroup).where(AuthorisedGroup.session_template_id == session_template_id))
+    session_template.is_public = authorised_group_id is None  # type: ignore
+    if authorised_group_id is not None:
+        db.add(AuthorisedGroup(group_id=authorised_group_id, session_template_id=session_template_id))
+
+    if show_answers is not None:
+        session_template.show_answers = show_answers  # type: ignore
+
+    await db.commit()
+    await db.refresh(session_template)
+
+    return session_template
+
+
+async def delete_session_template(db: AsyncSession, user_id: int, session_template_id: int) -> bool:
+    """
+    Supprime un modèle de session (il est seulement marqué comme supprimé, ses sessions restent consultables).
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    session_template_id : int
+        Id du modèle de session.
+
+    Retour
+    ------
+
+    bool
+        Vrai si le modèle a été supprimé, faux s'il n'appartient pas à l'utilisateur.
+    """
+    stmt = _owned_templates(user_id).where(SurveySessionTemplate.id == session_template_id)
+    session_template = (await db.execute(stmt)).scalar()
+
+    if not session_template:
+        return False
+
+    session_template.deleted = True  # type: ignore
+    await db.commit()
+
+    return True
+
+
+async def start_survey_session(db: AsyncSession, user_id: int, session_template_id: int) -> SurveySession:
+    """
+    Démarre une session de questionaires.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    session_template_id : int
+        Id du modèle de session.
+
+    Retour
+    ------
+
+    SurveySession
+        Session démarrée, avec son code.
+    """
+    stmt = (
+        select(Survey.user_id)
+        .join(SurveySessionTemplate, SurveySessionTemplate.survey_id == Survey.id)
+        .where(SurveySessionTemplate.id == session_template_id)
+    )
+    template_owner_id = (await db.execute(stmt)).scalar()
+
+    if not template_owner_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="A session template with this id does not exist."
+        )
+
+    if template_owner_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="You must own the template to be able to start a session."
+        )
+
+    # Code unique (index ix_survey_session_join_code) : un code déjà pris est tiré à nouveau
+    for attempt in range(1, JOIN_CODE_ATTEMPTS + 1):
+        survey_session = SurveySession(session_template_id=session_template_id, created_at=datetime.now())
+        survey_session.join_code = create_session_join_code(survey_session.id)  # type: ignore
+
+        db.add(survey_session)
+        try:
+            await db.commit()
+            break
+        except IntegrityError:
+            await db.rollback()
+            if attempt == JOIN_CODE_ATTEMPTS:
+                raise
+
+    await db.refresh(survey_session)
+
+    return survey_session
+
+
+async def get_all_session(db: AsyncSession, user_id: int) -> list[api_models.SurveySession]:
+    """
+    Renvoie la liste de toutes les sessions (en cours et finies) lancées par l'utilisateur.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    Retour
+    ------
+
+    list[api_models.SurveySession]
+        Sessions de l'utilisateur, de la plus récente à la plus ancienne.
+    """
+    results_attached = exists().where(Results.session_id == SurveySession.id)
+    stmt = (
+        select(
+            SurveySession.created_at,
+            case((results_attached, True), else_=False).label("is_finished"),
+            SurveySession.join_code.label("join_code"),
+            SurveySessionTemplate.name.label("template_name"),
+        )
+        .join(SurveySessionTemplate, SurveySession.session_template_id == SurveySessionTemplate.id)
+        .join(Survey, SurveySessionTemplate.survey_id == Survey.id)
+        .where(Survey.user_id == user_id)
+        .order_by(desc(SurveySession.created_at))
+    )
+
+    return [
+        api_models.SurveySession(
+            created_at=sess.created_at,
+            finished=sess.is_finished,
+            join_code=sess.join_code,
+            name=sess.template_name,
+        )
+        for sess in await db.execute(stmt)
+    ]
+
+
+"""
+
+Concerne les opérations sur la base de données pour les résultats.
+
+"""
+
+
+async def get_session_scores(db: AsyncSession, code: str) -> list[dict]:
+    """
+    Récupère le score de chaque participant d'une session terminée, par score décroissant.
+
+    Paramètres
+    ----------
+    code : str
+        Code de la session.
+
+    Retour
+    ------
+
+    list[dict]
+        Id et score de chaque participant.
+    """
+    stmt = (
+        select(ResultSummary.user_id, ResultSummary.score)
+        .join(SurveySession, ResultSummary.session_id == SurveySession.id)
+        .where(SurveySession.join_code == code)
+        .order_by(desc(ResultSummary.score), ResultSummary.user_id)
+    )
+
+    return [{"id_player": str(row.user_id), "correctly_answered": row.score} for row in await db.execute(stmt)]
+
+
+async def get_player_results(db: AsyncSession, code: str, user_id: int) -> dict | None:
+    """
+    Récupère le détail par question des résultats d'un participant d'une session terminée.
+
+    Paramètres
+    ----------
+    code : str
+        Code de la session.
+
+    user_id : int
+        Id du participant.
+
+    Retour
+    ------
+
+    dict | None
+        Réponses du participant à chaque question ou None s'il n'y a pas de résultats pour ce participant.
+    """
+    stmt = (
+        select(ResultDetail)
+        .join(SurveySession, ResultDetail.session_id == SurveySession.id)
+        .where(SurveySession.join_code == code)
+        .where(ResultDetail.user_id == user_id)
+        .order_by(ResultDetail.question_id)
+    )
+    rows = (await db.scalars(stmt)).all()
+
+    if not rows:
+        return None
+
+    return {
+        "id_player": str(user_id),
+        "questions_answers": [
+            {
+                "question_id": str(row.question_id),
+                "question_text": row.question_text,
+                "answers_text": row.answers_text,
+                "correctly_answered": row.correctly_answered,
+            }
+            for row in rows
+        ],
+    }
+
+
+async def get_owned_session_ids(
+    db: AsyncSession, user_id: int, join_code: str | None = None, survey_id: int | None = None
+) -> list[int]:
+    """
+    Renvoie les identifiants des sessions de l'utilisateur, d'une session par son code
+    ou de toutes les sessions d'un questionnaire, de la plus ancienne à la plus récente.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    join_code : str | None
+        Code d'une session, ou None pour toutes les sessions.
+
+    survey_id : int | None
+        Id d'un questionnaire, ou None pour tous les questionnaires.
+
+    Retour
+    ------
+
+    list[int]
+        Identifiants des sessions.
+    """
+    stmt = (
+        select(SurveySession.id)
+        .join(SurveySessionTemplate, SurveySession.session_template_id == SurveySessionTemplate.id)
+        .join(Survey, SurveySessionTemplate.survey_id == Survey.id)
+        .where(Survey.user_id == user_id)
+        .order_by(SurveySession.id)
+    )
+
+    if join_code is not None:
+        stmt = stmt.where(SurveySession.join_code == join_code)
+
+    if survey_id is not None:
+        stmt = stmt.where(Survey.id == survey_id)
+
+    return list((await db.scalars(stmt)).all())
+
+
+async def stream_session_results(db: AsyncSession, session_ids: list[int]) -> AsyncIterator[Sequence[Row]]:
+    """
+    Lit le détail des résultats des sessions (un participant et une question par ligne) par paquets
+    de `EXPORT_BATCH` lignes, avec un curseur côté serveur : la mémoire utilisée ne dépend pas
+    du nombre de participants ni du nombre de sessions.
+
+    Paramètres
+    ----------
+    session_ids : list[int]
+        Identifiants des sessions.
+
+    Retour
+    ------
+
+    AsyncIterator[Sequence[Row]]
+        Paquets de lignes, par session, participant et question.
+    """
+    stmt = (
+        select(
+            SurveySession.join_code,
+            ResultDetail.user_id,
+            User.name,
+            User.surname,
+            ResultDetail.question_id,
+            ResultDetail.question_text,
+            ResultDetail.answers_text,
+            ResultDetail.correctly_answered,
+        )
+        .join(SurveySession, ResultDetail.session_id == SurveySession.id)
+        .join(User, ResultDetail.user_id == User.id)
+        .where(ResultDetail.session_id.in_(session_ids))
+        # Ordre de la clé primaire : pas de tri de toutes les lignes avant la première
+        .order_by(ResultDetail.session_id, ResultDetail.user_id, ResultDetail.question_id)
+        .execution_options(yield_per=EXPORT_BATCH)
+    )
+
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+async def get_saved_progress(db: AsyncSession, user_id: int, code: str) -> list[dict] | None:
+    """
+    Récupère l'avancement enregistré des participants d'une session autonome libre terminée.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    code : str
+        Code de la session.
+
+    Retour
+    ------
+
+    list[dict] | None
+        Id et pourcentage de complétion de chaque participant ou
+        None si la session n'existe pas ou n'appartient pas à l'utilisateur.
+    """
+    session_id = (
+        await db.execute(
+            select(SurveySession.id)
+            .join(SurveySessionTemplate, SurveySession.session_template_id == SurveySessionTemplate.id)
+            .join(Survey, SurveySessionTemplate.survey_id == Survey.id)
+            .where(SurveySession.join_code == code)
+            .where(Survey.user_id == user_id)
+        )
+    ).scalar()
+
+    if session_id is None:
+        return None
+
+    rows = await db.execute(
+        select(ParticipantProgress.user_id, ParticipantProgress.completed, ParticipantProgress.nb_questions)
+        .where(ParticipantProgress.session_id == session_id)
+        .order_by(ParticipantProgress.user_id)
+    )
+
+    return [
+        {
+            "id_player": str(row.user_id),
+            "percent": round(100 * row.completed / row.nb_questions, 1) if row.nb_questions else 100.0,
+        }
+        for row in rows
+    ]
+
+
+async def _full_names(db: AsyncSession, user_ids: set[int]) -> dict[int, str]:
+    """
+    Renvoie le nom complet de chaque utilisateur, en une seule requête.
+
+    Paramètres
+    ----------
+    user_ids : set[int]
+        Id des utilisateurs.
+
+    Retour
+    ------
+
+    dict[int, str]
+        Nom complet de chaque utilisateur, par id.
+    """
+    if not user_ids:
+        return {}
+
+    stmt = select(User.id, User.name, User.surname).where(User.id.in_(user_ids))
+    return {row.id: row.name + " " + row.surname for row in await db.execute(stmt)}
+
+
+async def add_name_to_players(db: AsyncSession, infos_players):
+    """
+    Ajoute le nom de chaque joueur en fonction de son id.
+
+    Paramètres
+    ----------
+    infos_players : list[dict]
+        Joueurs, avec leur id dans la clé `id_player`.
+
+    Retour
+    ------
+
+    list[dict]
+        Les mêmes joueurs, avec leur nom dans la clé `name`.
+    """
+    names = await _full_names(db, {int(player["id_player"]) for player in infos_players})
+
+    for player in infos_players:
+        player["name"] = names[int(player["id_player"])]
+
+    return infos_players
+
+
+async def add_name_to_player(db: AsyncSession, infos_players):
+    """
+    Ajoute le nom du joueur en fonction de son id.
+
+    Paramètres
+    ----------
+    infos_players : dict
+        Joueur, avec son id dans la clé `id_player`.
+
+    Retour
+    ------
+
+    dict
+        Le même joueur, avec son nom dans la clé `name`.
+    """
+    user_id = int(infos_players["id_player"])
+    infos_players["name"] = (await _full_names(db, {user_id}))[user_id]
+
+    return infos_players
+
+
+async def get_session_history(db: AsyncSession, user_id: int, limit: int, offset: int) -> list[dict]:
+    """
+    Renvoie une page de l'historique des sessions terminées auxquelles l'utilisateur a participé,
+    de la plus récente à la plus ancienne, avec son score, en une seule requête.
+
+    Paramètres
+    ----------
+    user_id : int
+        Id de l'utilisateur connecté.
+
+    limit : int
+        Nombre maximum de sessions.
+
+    offset : int
+        Nombre de sessions sautées.
+
+    Retour
+    ------
+
+    list[dict]
+        Session, questionnaire, propriétaire et score de l'utilisateur, pour chaque session.
+    """
+    owner = aliased(User)
+
+    stmt = (
+        select(
+            SurveySession.id,
+            SurveySession.join_code,
+            Survey.title,
+            owner.name,
+            ResultSummary.score,
+            ResultSummary.nb_answers,
+            ResultSummary.nb_open_answers,
+        )
+        .select_from(ResultSummary)
+        .join(SurveySession, ResultSummary.session_id == SurveySession.id)
+        .join(SurveySessionTemplate, SurveySession.session_template_id == SurveySessionTemplate.id)
+        .join(Survey, SurveySessionTemplate.survey_id == Survey.id)
+        .join(owner, Survey.user_id == owner.id)
+        .where(ResultSummary.user_id == user_id)
+        .order_by(desc(SurveySession.created_at), desc(SurveySession.id))
+        .limit(limit)
+        .offset(offset)
+    )
+
+    return [
+        {
+            "session_id": row.id,
+            "join_code": row.join_code,
+            "survey_title": row.title,
+            "owner_name": row.name,
+            "correct_answers": row.score,
+            "total_answers": row.nb_answers,
+            "total_open_answers": row.nb_open_answers,
+            "id_player": user_id,
+        }
+        for row in await db.execute(stmt)
+    ]
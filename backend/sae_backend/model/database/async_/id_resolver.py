@@ -0,0 +1,98 @@
+"""
+Résolution (adresse mail, code de session) -> (id utilisateur, id session), avec un cache borné.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from sqlalchemy import select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db_models import SurveySession, User
+
+
+class IdResolver:
+    """
+    Cache LRU à durée de vie limitée des ids utilisateur et session.
+
+    La clé ne contient que des valeurs stables (adresse mail et code de session) et
+    jamais la session SQLAlchemy utilisée pour la requête.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 3600, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+
+        self._entries: OrderedDict[tuple[str, str], tuple[int, int, float]] = OrderedDict()
+        # code de session -> clés du cache, pour invalider une session sans tout parcourir
+        self._by_join_code: dict[str, set[tuple[str, str]]] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Compteurs du cache.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    async def resolve(self, sess: AsyncSession, email: str, join_code: str) -> tuple[int, int]:
+        """
+        Renvoie l'id de l'utilisateur et l'id de la session.
+        En cas d'absence dans le cache, une seule requête récupère les deux.
+        """
+        key = (email, join_code)
+        entry = self._entries.get(key)
+
+        if entry is not None and entry[2] > self._clock():
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+        self.misses += 1
+
+        stmt = (
+            select(User.id, SurveySession.id)
+            .join_from(User, SurveySession, true())
+            .where(User.email == email)
+            .where(SurveySession.join_code == join_code)
+        )
+        user_id, session_id = (await sess.execute(stmt)).one()
+
+        self._store(key, user_id, session_id)
+
+        return user_id, session_id
+
+    def invalidate(self, join_code: str):
+        """
+        Oublie tous les ids liés à une session (à la fin de la session).
+        """
+        for key in self._by_join_code.pop(join_code, ()):
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_join_code.clear()
+
+    def _store(self, key: tuple[str, str], user_id: int, session_id: int):
+        self._entries[key] = (user_id, session_id, self._clock() + self.ttl)
+        self._entries.move_to_end(key)
+        self._by_join_code.setdefault(key[1], set()).add(key)
+
+        while len(self._entries) > self.maxsize:
+            old_key, _ = self._entries.popitem(last=False)
+            keys = self._by_join_code.get(old_key[1])
+
+            if keys is not None:
+                keys.discard(old_key)
+                if not keys:
+                    del self._by_join_code[old_key[1]]
+
+
+id_resolver = IdResolver()
+
+__all__ = ["IdResolver", "id_resolver"]
@@ -1,442 +1,320 @@
 """
 Opérations asyncrones sur la base de données.
 """
-from asyncio import gather
-from itertools import groupby, chain
 from typing import Sequence
 import json
 
-from async_lru import alru_cache
-from sqlalchemy import Row, or_, select, delete, and_, update, literal_column
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import Row, select, delete, update, insert
+from sqlalchemy.orm import aliased
 from sqlalchemy.sql.expression import func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .exceptions import AnswerDoesNotExist, NotAnOpenAnswer, OpenAnswerTooLong
 from ..db_models import (
     Answer,
+    AnswerStats,
     AuthorisedGroup,
+    GroupClosure,
     GroupMember,
     OpenAnswer,
+    ParticipantProgress,
     Question,
+    QuestionStats,
     QuestionType,
+    ResultDetail,
     Results,
+    ResultSummary,
     Survey,
     SurveyQuestion,
     SurveyResults,
     SurveySession,
     SurveySessionTemplate,
+    SurveySessionType,
     User,
-    SessionParticipant,
-    Group,
 )
+from ..question_stats import answer_stats, question_stats
+from ..result_summary import details, summarise
 
 
-async def is_session_owner(sess: AsyncSession, email: str, join_code: str) -> bool:
-    """
-    Verifie si un utilisateur est le propriétaire de la session auquel appartiens le code.
+async def session_access_rows(sess: AsyncSession, join_code: str) -> Sequence[Row]:
     """
+    Renvoie en une seule requête tout ce qu'il faut pour autoriser l'accès à une session :
+    son id, si elle a démarré, si elle est finie, l'adresse mail de son propriétaire, si elle est publique
+    et l'adresse mail de chaque membre du groupe autorisé ou de ses sous-groupes (une ligne par membre,
+    None si aucun).
 
-    stmt = (
-        select(func.count(User.id))
-        .join(Survey, User.id == Survey.user_id)
-        .join(SurveySessionTemplate, Survey.id == SurveySessionTemplate.survey_id)
-        .join(SurveySession)
-        .where(User.email == email)
-        .where(SurveySession.join_code == join_code)
-    )
-    owner_count = (await sess.execute(stmt)).scalar()
-
-    return owner_count is not None and owner_count >= 1
-
-
-async def can_join_session(sess: AsyncSession, email: str, join_code: str) -> bool:
-    """
-    Vérifie si un utilisateur à le droit de rejoindre une session.
+    Aucune ligne si la session n'existe pas.
     """
+    owner = aliased(User)
+    member = aliased(User)
 
-    # Si le questionaire est public, c'est facile...
-    stmt = select(SurveySessionTemplate.is_public).join(SurveySession).where(SurveySession.join_code == join_code)
-    is_public = (await sess.execute(stmt)).scalar()
-
-    if is_public:
-        return True
-
-    # Si c'est pas publique, il faut vérifier si l'utilisateur fait partie du groupe
-    # TODO : vérifier si groupe de groupe
-    check_stmt = (
-        select(func.count())
-        .select_from(SurveySession)
-        .join(SurveySessionTemplate)
-        .join(AuthorisedGroup)
-        .join(Group)
-        .join(GroupMember)
-        .join(User)
+    stmt = (
+        select(
+            SurveySession.id,
+            SurveySession.has_started,
+            SurveyResults.id.is_not(None).label("is_finished"),
+            owner.email.label("owner_email"),
+            SurveySessionTemplate.is_public,
+            member.email.label("member_email"),
+        )
+        .join(SurveySessionTemplate, SurveySession.session_template_id == SurveySessionTemplate.id)
+        .join(Survey, SurveySessionTemplate.survey_id == Survey.id)
+        .join(owner, Survey.user_id == owner.id)
+        .outerjoin(SurveyResults, SurveyResults.session_id == SurveySession.id)
+        .outerjoin(AuthorisedGroup, AuthorisedGroup.session_template_id == SurveySessionTemplate.id)
+        .outerjoin(GroupClosure, GroupClosure.ancestor_id == AuthorisedGroup.group_id)
+        .outerjoin(GroupMember, GroupMember.group_id == GroupClosure.descendant_id)
+        .outerjoin(member, GroupMember.user_id == member.id)
         .where(SurveySession.join_code == join_code)
-        .where(User.email == email)
-    )
-
-    relationship_count = (await sess.execute(check_stmt)).scalar()
-
-    return relationship_count == 1
-
-
-@alru_cache()
-async def _fetch_user_and_session(sess: AsyncSession, email: str, join_code: str) -> tuple[int, int]:
-    user_query = sess.execute(select(User.id).where(User.email == email))
-    session_query = sess.execute(select(SurveySession.id).where(SurveySession.join_code == join_code))
-
-    user_id, session_id = await gather(user_query, session_query)
-
-    return user_id.scalar_one(), session_id.scalar_one()
-
-
-async def join_session(sess: AsyncSession, email: str, join_code: str):
-    """
-    Enregistre un utilisateur comme faisant partie d'une session.
-    """
-
-    user_id, session_id = await _fetch_user_and_session(sess, email, join_code)
-
-    part = SessionParticipant(session_id=session_id, user_id=user_id)
-
-    sess.add(part)
-    await sess.commit()
-    await sess.refresh(part)
-
-
-async def leave_session(sess: AsyncSession, email: str, join_code: str):
-    """
-    Fait quitter un utilisateur d'une session
-    """
-
-    user_id, session_id = await _fetch_user_and_session(sess, email, join_code)
-
-    await sess.execute(
-        delete(SessionParticipant)
-        .where(SessionParticipant.user_id == user_id)
-        .where(SessionParticipant.session_id == session_id)
     )
-    await sess.commit()
-
-
-async def is_in_session(sess: AsyncSession, email: str, join_code: str) -> bool:
-    """
-    Vérifie si un utilisateur est présent dans une session.
-    """
-
-    user_id, session_id = await _fetch_user_and_session(sess, email, join_code)
-
-    count = (
-        await sess.execute(
-            select(func.count(SessionParticipant.session_id))
-            .where(SessionParticipant.user_id == user_id)
-            .where(SessionParticipant.session_id == session_id)
-        )
-    ).scalar_one()
 
-    return count != 0
+    return (await sess.execute(stmt)).all()
 
 
-async def users_in_session(sess: AsyncSession, join_code: str) -> Sequence[User]:
+async def survey_content_in_order(sess: AsyncSession, join_code: str) -> Sequence[Row[tuple[Question, Answer | None]]]:
     """
-    Renvoie la liste de tout les utilisateurs qui sont présent dans une session.
-    """
-
-    stmt = select(User).join(SessionParticipant).join(SurveySession).where(SurveySession.join_code == join_code)
-
-    users = (await sess.execute(stmt)).scalars().all()
-    return users
-
-
-async def all_questions_in_order(sess: AsyncSession, join_code: str) -> Sequence[Question]:
-    """
-    Renvoie la liste de toutes les questions dans l'ordre dans lesquelles elles doivent être
-    jouées dans le questionaire.
-    Pour l'instant l'ordre des question est determiné par leurs ID.
+    Renvoie en une seule requête toutes les questions du questionaire d'une session accompagnées
+    de leurs réponses possibles (None pour une question sans réponses), dans l'ordre du questionaire.
     """
     stmt = (
-        select(Question)
+        select(Question, Answer)
         .join(SurveyQuestion)
         .join(Survey)
         .join(SurveySessionTemplate)
         .join(SurveySession)
+        .outerjoin(Answer, Answer.question_id == Question.id)
         .where(SurveySession.join_code == join_code)
-        .order_by(Question.id)
+        .order_by(Question.id, Answer.id)
     )
 
-    questions = (await sess.execute(stmt)).scalars().all()
-    return questions
+    return (await sess.execute(stmt)).all()
 
 
-async def next_question(sess: AsyncSession, join_code: str) -> tuple[Question, Sequence[Answer]] | tuple[None, None]:
+async def get_session_state(
+    sess: AsyncSession, join_code: str
+) -> Row[tuple[int, bool, int | None, int, SurveySessionType]] | None:
     """
-    Renvoie la prochaine question accompagné de ses réponses possibles à jouer lors du questionaire.
-
-    Renvoie None, None si il n'y a pas de prochaine question.
+    Renvoie l'id d'une session, si elle a démarré, l'id de sa question en cours, l'id de son propriétaire
+    et son type, ou None si la session n'existe pas.
     """
-    survey_session = (
-        await sess.execute(select(SurveySession).where(SurveySession.join_code == join_code))
-    ).scalar_one()
-    all_questions = await all_questions_in_order(sess, join_code)
-
-    if survey_session.current_question_id is None:  # début du questionaire
-        question = all_questions[0]
-    else:
-        current_question_index = next(
-            (
-                i
-                for i, question in enumerate(all_questions)
-                if question.id == survey_session.current_question_id  # type: ignore
-            ),
-            None,
-        )
-        question = (
-            None
-            if current_question_index is None or current_question_index + 1 == len(all_questions)
-            else all_questions[current_question_index + 1]
+    stmt = (
+        select(
+            SurveySession.id,
+            SurveySession.has_started,
+            SurveySession.current_question_id,
+            Survey.user_id.label("owner_id"),
+            SurveySessionTemplate.type.label("session_type"),
         )
-
-    if question is None:  # fin des questions
-        return None, None
-
-    answers = (await sess.execute(select(Answer).where(Answer.question_id == question.id))).scalars().all()
-
-    # Save the current question
-    await sess.execute(
-        update(SurveySession).where(SurveySession.join_code == join_code).values(current_question_id=question.id)
+        .join(SurveySessionTemplate, SurveySession.session_template_id == SurveySessionTemplate.id)
+        .join(Survey, SurveySessionTemplate.survey_id == Survey.id)
+        .where(SurveySession.join_code == join_code)
     )
-    await sess.commit()
 
-    return question, answers
+    return (await sess.execute(stmt)).one_or_none()
 
 
-async def save_user_answer(sess: AsyncSession, email: str, join_code: str, answer_ids: list[int]):
+async def session_answers(sess: AsyncSession, session_id: int) -> tuple[Sequence[Row], Sequence[Row]]:
     """
-    Enregistre la ou les réponses d'un utilisateur (question type QCM).
+    Renvoie les réponses déjà enregistrées d'une session, pour reprendre son état en mémoire :
+    (id utilisateur, adresse mail, id réponse) des QCM et (id utilisateur, adresse mail, id question, texte)
+    des questions ouvertes.
     """
+    stmt_results = (
+        select(Results.user_id, User.email, Results.answer_id)
+        .join(User, Results.user_id == User.id)
+        .where(Results.session_id == session_id)
+        .order_by(Results.user_id)
+    )
+    stmt_open = (
+        select(OpenAnswer.user_id, User.email, OpenAnswer.question_id, OpenAnswer.text)
+        .join(User, OpenAnswer.user_id == User.id)
+        .where(OpenAnswer.session_id == session_id)
+        .order_by(OpenAnswer.id)
+    )
 
-    user_id, session_id = await _fetch_user_and_session(sess, email, join_code)
-
-    sess.add_all(Results(user_id=user_id, session_id=session_id, answer_id=aid) for aid in answer_ids)
-
-    try:
-        await sess.flush()
-    except IntegrityError as e:
-        raise AnswerDoesNotExist(e)
+    return (await sess.execute(stmt_results)).all(), (await sess.execute(stmt_open)).all()
 
-    await sess.commit()
 
-
-async def save_user_open_answer(sess: AsyncSession, email: str, join_code: str, question_id: int, text: str):
+async def save_participant_progress(sess: AsyncSession, session_id: int, rows: list[dict]):
     """
-    Enregistre le texte d'une réponse ouverte d'un utilisateur.
+    Enregistre l'avancement de tous les participants d'une session, en une seule transaction.
+    L'avancement déjà enregistré est remplacé : un second enregistrement (fin de session relancée
+    après une erreur) n'échoue pas sur la clé primaire.
     """
+    if rows:
+        await sess.execute(delete(ParticipantProgress).where(ParticipantProgress.session_id == session_id))
+        await sess.execute(insert(ParticipantProgress), [{"session_id": session_id, **row} for row in rows])
+        await sess.commit()
 
-    question_type = (await sess.execute(select(Question.type).where(Question.id == question_id))).scalar_one()
-
-    if question_type == QuestionType.open_restricted and (size := len(text.split())) > 1:
-        raise OpenAnswerTooLong(f"{size} words instead of 1")
-
-    if question_type in {QuestionType.multiple_answers, QuestionType.single_answer}:
-        raise NotAnOpenAnswer(question_type)
-
-    user_id, session_id = await _fetch_user_and_session(sess, email, join_code)
-
-    answer = OpenAnswer(text=text, question_id=question_id, user_id=user_id, session_id=session_id)
 
-    sess.add(answer)
-    await sess.commit()
-
-
-async def has_user_answered(sess: AsyncSession, email: str, join_code: str, question_id: int) -> bool:
+async def set_current_question(sess: AsyncSession, session_id: int, question_id: int | None):
     """
-    Vérifie si un utilisateur à déjà répondu a une question (type QCM).
+    Marque une session comme ayant démarré et enregistre sa question en cours, en une seule requête.
     """
+    values: dict = {"has_started": True}
+    if question_id is not None:
+        values["current_question_id"] = question_id
 
-    user_id, session_id = await _fetch_user_and_session(sess, email, join_code)
-
-    stmt = (
-        select(func.count())
-        .select_from(Results)
-        .join(Answer)
-        .join(Question)
-        .where(Results.user_id == user_id)
-        .where(Results.session_id == session_id)
-        .where(Question.id == question_id)
-    )
-
-    results = (await sess.execute(stmt)).scalar_one()
-
-    return results > 0
+    await sess.execute(update(SurveySession).where(SurveySession.id == session_id).values(**values))
+    await sess.commit()
 
 
-async def has_user_participated(sess: AsyncSession, email: str, join_code: str) -> bool:
+async def save_answers(sess: AsyncSession, results: Sequence[dict], open_answers: Sequence[dict]):
     """
-    Vérifie si un utilisateur à déjà participé à une session.
+    Enregistre en une seule transaction (INSERT multi-lignes) un lot de réponses QCM et ouvertes.
     """
-    stmt = (
-        select(func.count())
-        .select_from(Results)
-        .join(User)
-        .join(SurveySession)
-        .where(User.email == email)
-        .where(SurveySession.join_code == join_code)
-    )
 
-    results_count = (await sess.execute(stmt)).scalar_one()
+    # Insertion par la table, toutes les lignes avec les mêmes colonnes : l'ORM ferait une requête
+    # par combinaison de colonnes absentes ou à None (temps de réponse inconnu)
+    if results:
+        await sess.execute(insert(Results.__table__), [{"response_time_ms": None, **row} for row in results])
 
-    return results_count > 0
+    if open_answers:
+        await sess.execute(insert(OpenAnswer.__table__), [{"response_time_ms": None, **row} for row in open_answers])
+
+    await sess.commit()
 
 
 async def save_session_results(sess: AsyncSession, join_code: str) -> str:
     """
     Sauvagarde (imprime) les résultats d'une session de questionaire qui
-    viens de se terminer.
-    """
+    viens de se terminer, ainsi que le score et le détail par question de chaque participant
+    et la contribution de la session aux statistiques des questions.
 
-    stmt_multiple_answers = (
-        select(
-            SurveySession.id, Question.id, Results.user_id, Question.text, Answer.text, Answer.is_correct, Question.type
-        )
-        .join(SurveyQuestion)
-        .join(Survey)
-        .join(SurveySessionTemplate)
-        .join(SurveySession)
-        .outerjoin(Results)
-        .outerjoin(Answer, and_(Answer.id == Results.answer_id, Question.id == Answer.question_id))
-        .where(SurveySession.join_code == join_code)
-        .where(or_(Question.type == QuestionType.multiple_answers, Question.type == QuestionType.single_answer))
-        .order_by(Results.user_id, Question.user_id)
-    )
+    Le nombre de requêtes ne dépend ni du nombre de participants ni du nombre de questions :
+    la justesse des réponses aux QCM est calculée en une passe à partir du nombre de bonnes
+    réponses de chaque question.
 
-    stmt_open = (
-        select(
-            SurveySession.id,
-            Question.id,
-            OpenAnswer.user_id,
-            Question.text,
-            OpenAnswer.text,
-            literal_column("0"),
-            Question.type,
+    Les résultats ne sont enregistrés qu'une fois : si la session en a déjà, ils sont renvoyés
+    sans rien écrire, pour ne pas compter deux fois la session dans les statistiques.
+    """
+    session_id, saved_results = (
+        await sess.execute(
+            select(SurveySession.id, SurveyResults.saved_results)
+            .outerjoin(SurveyResults, SurveyResults.session_id == SurveySession.id)
+            .where(SurveySession.join_code == join_code)
         )
+    ).one()
+    if saved_results is not None:
+        return saved_results
+
+    # Questions du questionaire, avec leur nombre de bonnes réponses
+    stmt_questions = (
+        select(Question.id, Question.text, Question.type, func.count(Answer.id).filter(Answer.is_correct))
         .join(SurveyQuestion)
         .join(Survey)
         .join(SurveySessionTemplate)
         .join(SurveySession)
-        .outerjoin(OpenAnswer, and_(OpenAnswer.question_id == Question.id, OpenAnswer.session_id == SurveySession.id))
-        .where(SurveySession.join_code == join_code)
-        .where(or_(Question.type == QuestionType.open, Question.type == QuestionType.open_restricted))
-        .order_by(OpenAnswer.user_id, Question.user_id)
+        .outerjoin(Answer, Answer.question_id == Question.id)
+        .where(SurveySession.id == session_id)
+        .group_by(Question.id, Question.text, Question.type)
+        .order_by(Question.id)
     )
 
-    res_multiple_answers, res_open = await gather(sess.execute(stmt_multiple_answers), sess.execute(stmt_open))
+    stmt_results = (
+        select(Results.user_id, Answer.question_id, Answer.id, Answer.text, Answer.is_correct, Results.response_time_ms)
+        .join(Answer)
+        .where(Results.session_id == session_id)
+        .order_by(Results.user_id, Answer.question_id, Answer.id)
+    )
 
-    res_multiple_answers = res_multiple_answers.all()
-    res_open = res_open.all()
+    stmt_open = (
+        select(OpenAnswer.user_id, OpenAnswer.question_id, OpenAnswer.text, OpenAnswer.response_time_ms)
+        .where(OpenAnswer.session_id == session_id)
+        .order_by(OpenAnswer.user_id, OpenAnswer.question_id, OpenAnswer.id)
+    )
 
-    filtered_rows = filter(lambda r: r[2] is not None, chain(res_multiple_answers, res_open))
+    questions = (await sess.execute(stmt_questions)).all()
+    results = (await sess.execute(stmt_results)).all()
+    open_answers = (await sess.execute(stmt_open)).all()
+
+    multiple_types = {QuestionType.multiple_answers, QuestionType.single_answer}
+    question_text = {q.id: q.text for q in questions}
+    nb_correct = {q.id: q[3] for q in questions if q.type in multiple_types}
+
+    # Temps de réponse d'un participant à une question : celui de sa dernière réponse enregistrée
+    response_times: dict[tuple[int, int], int] = {}
+
+    def record_time(user_id: int, question_id: int, response_time_ms: int | None) -> None:
+        if response_time_ms is not None:
+            key = (user_id, question_id)
+            response_times[key] = max(response_times.get(key, 0), response_time_ms)
+
+    # user_id -> question_id -> [textes choisis, nombre de bonnes réponses choisies, une mauvaise réponse choisie]
+    chosen: dict[int, dict[int, list]] = {}
+    for user_id, question_id, _, text, is_correct, response_time_ms in results:
+        if question_id not in nb_correct:
+            continue
+
+        record_time(user_id, question_id, response_time_ms)
+        entry = chosen.setdefault(user_id, {}).setdefault(question_id, [[], 0, False])
+        entry[0].append(text)
+        if is_correct:
+            entry[1] += 1
+        else:
+            entry[2] = True
 
-    all_results = sorted(filtered_rows, key=lambda r: r[2])
+    answered_open: dict[int, dict[int, list[str]]] = {}
+    for user_id, question_id, text, response_time_ms in open_answers:
+        if question_id in question_text and question_id not in nb_correct:
+            record_time(user_id, question_id, response_time_ms)
+            answered_open.setdefault(user_id, {}).setdefault(question_id, []).append(text)
 
     out = {}
-    for user_id, user_group in groupby(all_results, lambda r: r[2]):
+    for user_id in sorted(chosen.keys() | answered_open.keys()):
         user_results = {}
-        questions = sorted(user_group, key=lambda r: r[1])
-        for question_id, question_group in groupby(questions, lambda r: r[1]):
-            user_question_rows = list(question_group)
-
-            question_result = {
-                "question_text": user_question_rows[0][3],
-                "answers_text": [r[4] for r in user_question_rows if r[4] is not None],
-            }
-
-            if user_question_rows[0][6] in {QuestionType.multiple_answers, QuestionType.single_answer}:
-                question_result["correctly_answered"] = await _check_multiple_correctly_answered(
-                    sess, question_id, user_question_rows
-                )
-
-            user_results[question_id] = question_result
+        user_chosen = chosen.get(user_id)
+        user_open = answered_open.get(user_id, {})
+
+        for question_id in question_text:
+            if question_id in nb_correct:
+                # Toutes les questions QCM apparaissent pour les participants qui ont répondu à un QCM
+                if user_chosen is None:
+                    continue
+
+                texts, nb_correct_chosen, wrong_chosen = user_chosen.get(question_id, ([], 0, False))
+                # Bien répondu : aucune mauvaise réponse et toutes les bonnes réponses choisies
+                correctly_answered = bool(texts) and not wrong_chosen and nb_correct_chosen == nb_correct[question_id]
+
+                user_results[question_id] = {
+                    "question_text": question_text[question_id],
+                    "answers_text": texts,
+                    "correctly_answered": correctly_answered,
+                    "response_time_ms": response_times.get((user_id, question_id)),
+                }
+
+            elif question_id in user_open:
+                user_results[question_id] = {
+                    "question_text": question_text[question_id],
+                    "answers_text": user_open[question_id],
+                    "response_time_ms": response_times.get((user_id, question_id)),
+                }
 
         out[user_id] = user_results
 
     serialised = json.dumps(out)
 
-    results = SurveyResults(session_id=res_multiple_answers[0][0], saved_results=serialised)
-    sess.add(results)
-
-    await sess.commit()
-
-    return serialised
-
+    sess.add(SurveyResults(session_id=session_id, saved_results=serialised))
 
-async def _check_multiple_correctly_answered(
-    sess: AsyncSession, question_id: int, user_question_rows: list[Row[tuple[int, int, int, str, str, bool, str]]]
-) -> bool:
-    """
-    Helper qui determine si on a répondu correctement à une question de type QCM.
-    """
-    all_answers = [r[5] for r in user_question_rows]
-    answers_given = list(set(all_answers))
+    # Score et détail de chaque participant, pour son historique, le classement et sa page de résultats
+    summaries = [summarise(session_id, user_id, user_results) for user_id, user_results in out.items()]
+    if summaries:
+        await sess.execute(insert(ResultSummary), summaries)
 
-    if len(answers_given) == 1:
-        is_correctly_answered = bool(answers_given[0])
+    rows = [row for user_id, user_results in out.items() for row in details(session_id, user_id, user_results)]
+    if rows:
+        # Insertion par la table : l'ORM ferait une requête par combinaison de colonnes à None (questions ouvertes)
+        await sess.execute(insert(ResultDetail.__table__), rows)
 
-    else:
-        # Si une réponse fausse a été donnée
-        if False in answers_given:
-            is_correctly_answered = False
+    # Contribution de la session aux statistiques des questions, ajoutée une seule fois
+    stats = question_stats(session_id, out)
+    if stats:
+        await sess.execute(insert(QuestionStats), stats)
 
-            # Si True est la seule réponse autre que None retenue, il faut vérifier si il existe d'autres réponses
-            # True non répondues
-        else:
-            nb_correct_answers = (
-                await sess.execute(
-                    select(func.count())
-                    .select_from(Answer)
-                    .join(Question)
-                    .where(Answer.is_correct)
-                    .where(Question.id == question_id)
-                )
-            ).scalar_one()
-            nb_true_answers = sum(1 for a in all_answers if a)
-
-            if nb_correct_answers == nb_true_answers:
-                is_correctly_answered = True
-            else:
-                is_correctly_answered = False
-    return is_correctly_answered
-
-
-async def is_session_joinable(sess: AsyncSession, join_code: str) -> bool:
-    """
-    Determine si une session de questionaire est joignable :
-        - elle existe
-        - elle n'est pas en cours d'être jouée
-        - elle n'est pas finie (pas de réponses enregistrées)
-    """
-    session = (
-        await sess.execute(select(SurveySession).where(SurveySession.join_code == join_code))
-    ).scalar_one_or_none()
-
-    if session is None:
-        return False
+    chosen_answers = [(row.question_id, row.id) for row in results if row.question_id in nb_correct]
+    distribution = answer_stats(session_id, chosen_answers)
+    if distribution:
+        await sess.execute(insert(AnswerStats), distribution)
 
-    if session.has_started:  # type: ignore
-        return False
-
-    saved_results_count = (
-        await sess.execute(
-            select(func.count(SurveyResults.id)).join(SurveySession).where(SurveySession.join_code == join_code)
-        )
-    ).scalar_one_or_none()
-
-    return saved_results_count == 0
-
-
-async def start_survey_session(sess: AsyncSession, join_code: str):
-    """
-    Marque une session comme ayant démarée
-    """
-    await sess.execute(update(SurveySession).where(SurveySession.join_code == join_code).values(has_started=True))
     await sess.commit()
+
+    return serialised
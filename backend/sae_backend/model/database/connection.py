@@ -1,10 +1,13 @@
 """
 Connexion avec la base de données.
+
+Le moteur est créé à la première utilisation (démarrage de l'application, commande de migration) et non à l'import :
+importer les modèles ne charge pas le pilote de la base et n'ouvre aucune connexion.
 """
 import os
 from functools import partial
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from ..config import get_dsn
@@ -12,10 +15,35 @@ from ..config import get_dsn
 if os.getenv("IS_TESTING"):
     engine_creator = create_engine
 else:  # pragma: no cover
-    engine_creator = partial(create_engine, pool_size=25)
+    # Ne sert qu'aux migrations et à la vérification du schéma : les routes et les évènements socket
+    # partagent le pool du moteur asyncrone
+    engine_creator = partial(create_engine, pool_size=1)
 
 
-engine = engine_creator(get_dsn())
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Lié au moteur par get_engine
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
+
+_engine: Engine | None = None
+
+
+def get_engine() -> Engine:
+    """
+    Renvoie le moteur de la base de données, en le créant au premier appel.
+    """
+    global _engine
+
+    if _engine is None:
+        _engine = engine_creator(get_dsn())
+        SessionLocal.configure(bind=_engine)
+
+    return _engine
+
+
+def dispose_engine():
+    """
+    Ferme les connexions ouvertes par le moteur, si il a été créé.
+    """
+    if _engine is not None:
+        _engine.dispose()
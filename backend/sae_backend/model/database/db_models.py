@@ -4,7 +4,7 @@ A ne pas confondre avec les modèles de l'API.
 """
 import enum
 
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, DateTime, Text, Enum
+from sqlalchemy import JSON, BigInteger, Column, ForeignKey, Index, Integer, String, Boolean, DateTime, Text, Enum
 from sqlalchemy.orm import relationship
 
 from .connection import Base
@@ -98,7 +98,7 @@ class SurveySessionTemplate(Base):
     __tablename__ = "survey_session_template"
 
     id = Column(Integer, primary_key=True, index=True)
-    survey_id = Column(Integer, ForeignKey("survey.id"))
+    survey_id = Column(Integer, ForeignKey("survey.id"), index=True)
     name = Column(String)
     type = Column(Enum(SurveySessionType))
     is_public = Column(Boolean, default=True)
@@ -116,7 +116,7 @@ class SurveySession(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     session_template_id = Column(Integer, ForeignKey("survey_session_template.id"))
-    join_code = Column(String)
+    join_code = Column(String, unique=True, index=True)  # Presque toutes les requêtes des sessions filtrent dessus
     created_at = Column(DateTime)
 
     # Etat de session en cours
@@ -135,12 +135,88 @@ class SurveyResults(Base):
     saved_results = Column(Text)
 
 
+class ResultSummary(Base):
+    """
+    Score d'un participant à une session terminée, calculé une fois à l'enregistrement des résultats
+    (voir save_session_results) : l'historique d'un étudiant n'a pas à relire les résultats complets.
+    """
+
+    __tablename__ = "result_summary"
+    # La clé primaire commence par session_id : l'historique d'un étudiant a besoin de son propre index
+    __table_args__ = (Index("ix_result_summary_user_session", "user_id", "session_id"),)
+
+    session_id = Column(Integer, ForeignKey("survey_session.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    score = Column(Integer, nullable=False)  # Nombre de QCM bien répondus
+    nb_answers = Column(Integer, nullable=False)  # Nombre de QCM
+    nb_open_answers = Column(Integer, nullable=False)  # Nombre de questions ouvertes répondues
+
+
+class ResultDetail(Base):
+    """
+    Résultat d'un participant à une question d'une session terminée, enregistré avec son résumé
+    (voir ResultSummary) : le détail d'un participant se lit sans relire les résultats des autres.
+    """
+
+    __tablename__ = "result_detail"
+
+    session_id = Column(Integer, ForeignKey("survey_session.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    # Pas de clé étrangère : la question peut être supprimée après la session, son texte est gardé ici
+    question_id = Column(Integer, primary_key=True)
+    question_text = Column(String)
+    answers_text = Column(JSON, nullable=False)  # Textes des réponses choisies ou écrites
+    correctly_answered = Column(Boolean)  # None pour les questions ouvertes
+    response_time_ms = Column(Integer)  # Temps de réponse, None s'il n'est pas connu
+
+
+class QuestionStats(Base):
+    """
+    Contribution d'une session terminée aux statistiques d'une question, ajoutée une seule fois
+    à l'enregistrement des résultats (voir save_session_results et question_stats.py).
+    """
+
+    __tablename__ = "question_stats"
+
+    # Pas de clé étrangère vers la question, comme pour ResultDetail
+    question_id = Column(Integer, primary_key=True)
+    session_id = Column(Integer, ForeignKey("survey_session.id"), primary_key=True)
+    nb_participants = Column(Integer, nullable=False)
+    nb_correct = Column(Integer, nullable=False)  # QCM bien répondus
+    # Groupes des meilleurs et des moins bons participants de la session, pour l'indice de discrimination
+    upper_count = Column(Integer, nullable=False)
+    upper_correct = Column(Integer, nullable=False)
+    lower_count = Column(Integer, nullable=False)
+    lower_correct = Column(Integer, nullable=False)
+    # Somme et nombre des temps de réponse connus, pour le temps de réponse moyen
+    response_time_total_ms = Column(BigInteger, nullable=False, server_default="0")
+    nb_timed = Column(Integer, nullable=False, server_default="0")
+
+
+class AnswerStats(Base):
+    """
+    Nombre de participants d'une session terminée qui ont choisi une réponse d'un QCM.
+    """
+
+    __tablename__ = "answer_stats"
+    __table_args__ = (Index("ix_answer_stats_question", "question_id"),)
+
+    answer_id = Column(Integer, primary_key=True)
+    session_id = Column(Integer, ForeignKey("survey_session.id"), primary_key=True)
+    question_id = Column(Integer, nullable=False)
+    nb_chosen = Column(Integer, nullable=False)
+
+
 class Results(Base):
     __tablename__ = "results"
+    # La clé primaire commence par user_id : les requêtes d'une session ont besoin de leur propre index
+    __table_args__ = (Index("ix_results_session_user", "session_id", "user_id"),)
 
     user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
     answer_id = Column(Integer, ForeignKey("answer.id"), primary_key=True)
     session_id = Column(Integer, ForeignKey("survey_session.id"), primary_key=True)
+    # Temps écoulé entre l'affichage de la question et la réponse (voir LiveSession.record_answer)
+    response_time_ms = Column(Integer)
 
     user = relationship("User", back_populates="results")
     answer = relationship("Answer", back_populates="results")
@@ -153,12 +229,17 @@ class OpenAnswer(Base):
     """
 
     __tablename__ = "open_answer"
+    __table_args__ = (
+        Index("ix_open_answer_session_question", "session_id", "question_id"),
+        Index("ix_open_answer_session_user", "session_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     text = Column(String)
     question_id = Column(Integer, ForeignKey("question.id"))
     user_id = Column(Integer, ForeignKey("user.id"))
     session_id = Column(Integer, ForeignKey("survey_session.id"))
+    response_time_ms = Column(Integer)
 
 
 class Answer(Base):
@@ -175,6 +256,7 @@ class Answer(Base):
 
 class SessionParticipant(Base):
     __tablename__ = "session_participant"
+    __table_args__ = (Index("ix_session_participant_session_user", "session_id", "user_id"),)
 
     user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
     session_id = Column(Integer, ForeignKey("survey_session.id"), primary_key=True)
@@ -183,6 +265,20 @@ class SessionParticipant(Base):
     user = relationship("User", back_populates="session_participant")
 
 
+class ParticipantProgress(Base):
+    """
+    Avancement final d'un participant dans une session autonome libre,
+    enregistré en une fois à la fin de la session (voir model/progress.py).
+    """
+
+    __tablename__ = "participant_progress"
+
+    session_id = Column(Integer, ForeignKey("survey_session.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
+    completed = Column(Integer, nullable=False)  # Nombre de questions passées
+    nb_questions = Column(Integer, nullable=False)
+
+
 class Group(Base):
     __tablename__ = "group"
 
@@ -195,6 +291,20 @@ class Group(Base):
     group_member = relationship("GroupMember", back_populates="group")
 
 
+class GroupClosure(Base):
+    """
+    Fermeture transitive de la hiérarchie des groupes : une ligne par couple (ancêtre, descendant),
+    y compris le groupe lui-même à la profondeur 0.
+    Maintenue par les opérations de création et de suppression de groupes.
+    """
+
+    __tablename__ = "group_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("group.id"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("group.id"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
+
+
 class GroupMember(Base):
     __tablename__ = "group_member"
 
@@ -0,0 +1,109 @@
+"""
+Hiérarchie des groupes (table group_closure), partagée par les opérations synchrones et asynchrones :
+les requêtes qui la maintiennent sont construites ici, et chaque session de base de données les exécute.
+
+Les droits d'accès des sessions en cache (voir session_acl) dépendent des membres des groupes et de leur
+hiérarchie : ils sont oubliés après chaque transaction validée qui ajoute ou supprime un groupe ou un membre,
+quelle que soit l'opération qui l'a faite.
+"""
+from sqlalchemy import Executable, delete, event, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..session_acl import invalidate_session_acl
+from .db_models import Group, GroupClosure, GroupMember
+
+# Clé de Session.info : la transaction en cours a modifié les groupes ou leurs membres
+_GROUPS_CHANGED = "groups_changed"
+
+
+def new_group_closure(group_id: int, parent_id: int | None) -> list[Executable]:
+    """
+    Requêtes qui placent un nouveau groupe dans la hiérarchie.
+
+    Paramètres
+    ----------
+    group_id : int
+        Id du nouveau groupe, déjà inséré.
+
+    parent_id : int | None
+        Id du groupe parent ou None s'il n'y a pas de groupe parent.
+
+    Retour
+    ------
+
+    list[Executable]
+        Requêtes à exécuter dans l'ordre.
+    """
+    # Le groupe est son propre ancêtre, puis hérite de tous les ancêtres de son parent
+    statements: list[Executable] = [insert(GroupClosure).values(ancestor_id=group_id, descendant_id=group_id, depth=0)]
+    if parent_id is not None:
+        statements.append(
+            insert(GroupClosure).from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(GroupClosure.ancestor_id, literal(group_id), GroupClosure.depth + 1).where(
+                    GroupClosure.descendant_id == parent_id
+                ),
+            )
+        )
+
+    return statements
+
+
+def detach_group(group_id: int) -> list[Executable]:
+    """
+    Requêtes qui retirent un groupe de la hiérarchie avant sa suppression : ses sous-groupes deviennent
+    des groupes racines.
+
+    Paramètres
+    ----------
+    group_id : int
+        Id du groupe supprimé.
+
+    Retour
+    ------
+
+    list[Executable]
+        Requêtes à exécuter dans l'ordre.
+    """
+    # Détache les sous-groupes des ancêtres du groupe supprimé, puis retire le groupe de la hiérarchie
+    subtree = select(GroupClosure.descendant_id).where(GroupClosure.ancestor_id == group_id).scalar_subquery()
+    ancestors = (
+        select(GroupClosure.ancestor_id)
+        .where(GroupClosure.descendant_id == group_id)
+        .where(GroupClosure.ancestor_id != group_id)
+        .scalar_subquery()
+    )
+
+    return [
+        delete(GroupClosure)
+        .where(GroupClosure.descendant_id.in_(subtree))
+        .where(GroupClosure.ancestor_id.in_(ancestors))
+        .execution_options(synchronize_session=False),
+        delete(GroupClosure)
+        .where(or_(GroupClosure.ancestor_id == group_id, GroupClosure.descendant_id == group_id))
+        .execution_options(synchronize_session=False),
+        update(Group).where(Group.parent_id == group_id).values(parent_id=None).execution_options(
+            synchronize_session=False
+        ),
+    ]
+
+
+@event.listens_for(Session, "after_flush")
+def _note_group_changes(session: Session, flush_context):
+    if any(isinstance(obj, (Group, GroupMember)) for obj in (*session.new, *session.deleted)):
+        session.info[_GROUPS_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    # Les membres autorisés des sessions en cache ne sont plus à jour
+    if session.info.pop(_GROUPS_CHANGED, False):
+        invalidate_session_acl()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_group_changes(session: Session):
+    session.info.pop(_GROUPS_CHANGED, None)
+
+
+__all__ = ["detach_group", "new_group_closure"]
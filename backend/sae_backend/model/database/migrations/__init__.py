@@ -0,0 +1,169 @@
+"""
+Migrations du schéma de la base de données.
+
+Chaque révision est un module `rNNNN_nom.py` de ce paquet, qui définit `revision` (son numéro),
+`description` et `upgrade(conn)`. Le numéro de la dernière révision appliquée est gardé dans la table
+`schema_version`.
+
+Les migrations sont appliquées une seule fois, par une commande séparée lancée avant les serveurs :
+
+    python -m sae_backend.model.database.migrations
+
+Au démarrage, l'application vérifie seulement que le schéma est à jour (voir check_schema_version).
+"""
+import importlib
+import logging
+import pkgutil
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Callable
+
+from sqlalchemy import Column, Connection, Engine, Integer, MetaData, Table, inspect, select, text
+
+from ..connection import Base, get_engine
+
+logger = logging.getLogger(__name__)
+
+_version_metadata = MetaData()
+
+schema_version = Table("schema_version", _version_metadata, Column("version", Integer, nullable=False))
+
+# Révision du schéma créé par create_all avant l'introduction des migrations
+BASELINE = 1
+
+
+class SchemaOutdated(Exception):
+    """
+    Le schéma de la base n'est pas à la dernière révision : les migrations n'ont pas été appliquées.
+    """
+
+
+@dataclass(frozen=True, slots=True)
+class Revision:
+    revision: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def _load_revisions() -> list[Revision]:
+    modules: list[ModuleType] = [
+        importlib.import_module(f"{__name__}.{info.name}")
+        for info in pkgutil.iter_modules(__path__)
+        if info.name.startswith("r")
+    ]
+
+    revisions = sorted(
+        (Revision(module.revision, module.description, module.upgrade) for module in modules),
+        key=lambda r: r.revision,
+    )
+
+    numbers = [r.revision for r in revisions]
+    if numbers != list(range(1, len(numbers) + 1)):
+        raise RuntimeError(f"Numéros de révisions non consécutifs : {numbers}")
+
+    return revisions
+
+
+REVISIONS = _load_revisions()
+HEAD = REVISIONS[-1].revision
+
+
+def current_version(conn: Connection) -> int | None:
+    """
+    Renvoie la révision du schéma, ou None si la base n'a jamais été migrée.
+    """
+    if not inspect(conn).has_table(schema_version.name):
+        return None
+
+    return conn.execute(select(schema_version.c.version)).scalar()
+
+
+def _set_version(conn: Connection, version: int):
+    _version_metadata.create_all(conn)
+    conn.execute(schema_version.delete())
+    conn.execute(schema_version.insert().values(version=version))
+
+
+def _lock(conn: Connection):
+    """
+    Empêche deux commandes de migration de s'exécuter en même temps (PostgreSQL uniquement,
+    sqlite verrouille déjà toute la base en écriture).
+    """
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('sae_backend.schema_version'))"))
+
+
+def migrate(engine: Engine | None = None) -> list[int]:
+    """
+    Applique les révisions manquantes, chacune dans sa propre transaction.
+    Renvoie les numéros des révisions appliquées.
+
+    Une base vide est créée directement à la dernière révision. Une base créée avant les migrations
+    (tables présentes, sans version) est considérée à la révision de référence.
+    """
+    engine = engine or get_engine()
+
+    with engine.begin() as conn:
+        _lock(conn)
+        version = current_version(conn)
+
+        if version is None:
+            if inspect(conn).has_table("user"):
+                version = BASELINE
+            else:
+                Base.metadata.create_all(conn)
+                version = HEAD
+                logger.info("Schéma créé à la révision %s", HEAD)
+
+            _set_version(conn, version)
+
+    applied = []
+
+    for revision in REVISIONS:
+        if revision.revision <= version:
+            continue
+
+        with engine.begin() as conn:
+            _lock(conn)
+            # Une autre commande a pu appliquer cette révision pendant l'attente du verrou
+            if (current_version(conn) or 0) >= revision.revision:
+                continue
+
+            logger.info("Révision %s : %s", revision.revision, revision.description)
+            revision.upgrade(conn)
+            _set_version(conn, revision.revision)
+
+        applied.append(revision.revision)
+
+    return applied
+
+
+def check_schema_version(engine: Engine | None = None):
+    """
+    Vérifie, en une requête, que le schéma est à la dernière révision. Lève SchemaOutdated sinon.
+    """
+    engine = engine or get_engine()
+
+    with engine.connect() as conn:
+        version = current_version(conn)
+
+    if version != HEAD:
+        raise SchemaOutdated(
+            f"Schéma à la révision {version} au lieu de {HEAD}, "
+            "lancer : python -m sae_backend.model.database.migrations"
+        )
+
+
+def main():
+    """
+    Point d'entrée de la commande de migration.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    applied = migrate()
+    if applied:
+        logger.info("Révisions appliquées : %s", ", ".join(map(str, applied)))
+    logger.info("Schéma à jour (révision %s)", HEAD)
+
+
+__all__ = ["HEAD", "REVISIONS", "SchemaOutdated", "check_schema_version", "current_version", "migrate"]
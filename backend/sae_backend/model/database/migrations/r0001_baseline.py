@@ -0,0 +1,11 @@
+"""
+Schéma créé par Base.metadata.create_all avant l'introduction des migrations.
+"""
+from sqlalchemy import Connection
+
+revision = 1
+description = "schéma de référence"
+
+
+def upgrade(conn: Connection):
+    pass
@@ -0,0 +1,19 @@
+"""
+Fermeture transitive de la hiérarchie des groupes, remplie à partir des parent_id existants.
+"""
+from sqlalchemy import Connection
+from sqlalchemy.orm import Session
+
+from ..db_models import GroupClosure
+
+revision = 2
+description = "table group_closure"
+
+
+def upgrade(conn: Connection):
+    GroupClosure.__table__.create(conn, checkfirst=True)
+
+    from ..operations import rebuild_group_closure
+
+    with Session(bind=conn) as db:
+        rebuild_group_closure(db)
@@ -0,0 +1,13 @@
+"""
+Avancement des participants des sessions autonomes libres.
+"""
+from sqlalchemy import Connection
+
+from ..db_models import ParticipantProgress
+
+revision = 3
+description = "table participant_progress"
+
+
+def upgrade(conn: Connection):
+    ParticipantProgress.__table__.create(conn, checkfirst=True)
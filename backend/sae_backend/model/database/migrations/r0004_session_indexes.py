@@ -0,0 +1,79 @@
+"""
+Index des colonnes de recherche des sessions et des réponses.
+
+Le code des sessions devient unique : les sessions qui partagent le code d'une session plus ancienne
+(tirages identiques avant cette révision) reçoivent un nouveau code avant la création de l'index.
+"""
+import logging
+
+from sqlalchemy import Column, Connection, Index, Integer, MetaData, String, Table, func, select, update
+
+from ...security import create_session_join_code
+
+logger = logging.getLogger(__name__)
+
+revision = 4
+description = "index des sessions et des réponses"
+
+# Tables réduites aux colonnes indexées, pour ne pas dépendre de l'état actuel des modèles
+_metadata = MetaData()
+
+_survey_session = Table("survey_session", _metadata, Column("id", Integer), Column("join_code", String))
+_survey_session_template = Table("survey_session_template", _metadata, Column("survey_id", Integer))
+_results = Table("results", _metadata, Column("session_id", Integer), Column("user_id", Integer))
+_open_answer = Table(
+    "open_answer", _metadata, Column("session_id", Integer), Column("question_id", Integer), Column("user_id", Integer)
+)
+_session_participant = Table(
+    "session_participant", _metadata, Column("session_id", Integer), Column("user_id", Integer)
+)
+
+_INDEXES = [
+    Index("ix_survey_session_join_code", _survey_session.c.join_code, unique=True),
+    Index("ix_survey_session_template_survey_id", _survey_session_template.c.survey_id),
+    Index("ix_results_session_user", _results.c.session_id, _results.c.user_id),
+    Index("ix_open_answer_session_question", _open_answer.c.session_id, _open_answer.c.question_id),
+    Index("ix_open_answer_session_user", _open_answer.c.session_id, _open_answer.c.user_id),
+    Index("ix_session_participant_session_user", _session_participant.c.session_id, _session_participant.c.user_id),
+]
+
+
+def _dedupe_join_codes(conn: Connection):
+    """
+    Donne un nouveau code à chaque session dont le code est déjà celui d'une session plus ancienne.
+    """
+    session = _survey_session.c
+    duplicated = (
+        select(session.join_code)
+        .where(session.join_code.is_not(None))
+        .group_by(session.join_code)
+        .having(func.count() > 1)
+    )
+    rows = conn.execute(
+        select(session.id, session.join_code).where(session.join_code.in_(duplicated)).order_by(session.id)
+    ).all()
+    if not rows:
+        return
+
+    taken = set(conn.execute(select(session.join_code).where(session.join_code.is_not(None))).scalars())
+    kept = set()
+    for session_id, join_code in rows:
+        # La session la plus ancienne garde son code
+        if join_code not in kept:
+            kept.add(join_code)
+            continue
+
+        new_code = create_session_join_code(session_id)
+        while new_code in taken:
+            new_code = create_session_join_code(session_id)
+        taken.add(new_code)
+
+        conn.execute(update(_survey_session).where(session.id == session_id).values(join_code=new_code))
+        logger.warning("Session %s : code %s déjà utilisé, remplacé par %s", session_id, join_code, new_code)
+
+
+def upgrade(conn: Connection):
+    _dedupe_join_codes(conn)
+
+    for index in _INDEXES:
+        index.create(conn, checkfirst=True)
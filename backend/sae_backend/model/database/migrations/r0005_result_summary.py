@@ -0,0 +1,40 @@
+"""
+Résumé des résultats de chaque participant, calculé pour les sessions déjà terminées.
+"""
+import json
+
+from sqlalchemy import Column, Connection, Integer, MetaData, Table, Text, insert, select
+
+from ..db_models import ResultSummary
+from ..result_summary import summarise
+
+revision = 5
+description = "table result_summary"
+
+_survey_results = Table(
+    "survey_results", MetaData(), Column("session_id", Integer), Column("saved_results", Text)
+)
+
+# Nombre de sessions lues à la fois
+_BATCH = 500
+
+
+def upgrade(conn: Connection):
+    ResultSummary.__table__.create(conn, checkfirst=True)
+
+    already_summarised = select(ResultSummary.session_id).distinct()
+    stmt = (
+        select(_survey_results.c.session_id, _survey_results.c.saved_results)
+        .where(_survey_results.c.session_id.not_in(already_summarised))
+        .execution_options(yield_per=_BATCH)
+    )
+
+    for partition in conn.execute(stmt).partitions():
+        rows = [
+            summarise(session_id, int(user_id), player_results)
+            for session_id, saved_results in partition
+            for user_id, player_results in json.loads(saved_results or "{}").items()
+            if user_id.isdigit()
+        ]
+        if rows:
+            conn.execute(insert(ResultSummary), rows)
@@ -0,0 +1,71 @@
+"""
+Statistiques des questions, calculées pour les sessions déjà terminées.
+"""
+import json
+
+from sqlalchemy import Column, Connection, Integer, MetaData, String, Table, Text, insert, select
+
+from ..db_models import AnswerStats, QuestionStats
+from ..question_stats import answer_stats, question_stats
+
+revision = 7
+description = "tables question_stats et answer_stats"
+
+# Tables réduites aux colonnes lues, pour ne pas dépendre de l'état actuel des modèles
+_metadata = MetaData()
+
+_survey_results = Table("survey_results", _metadata, Column("session_id", Integer), Column("saved_results", Text))
+_results = Table("results", _metadata, Column("session_id", Integer), Column("answer_id", Integer))
+_answer = Table("answer", _metadata, Column("id", Integer), Column("question_id", Integer))
+_question = Table("question", _metadata, Column("id", Integer), Column("type", String))
+
+_QCM_TYPES = ["single_answer", "multiple_answers"]
+
+# Nombre de sessions lues à la fois
+_BATCH = 500
+
+
+def upgrade(conn: Connection):
+    QuestionStats.__table__.create(conn, checkfirst=True)
+    AnswerStats.__table__.create(conn, checkfirst=True)
+
+    already_counted = select(QuestionStats.session_id).distinct()
+    stmt = (
+        select(_survey_results.c.session_id, _survey_results.c.saved_results)
+        .where(_survey_results.c.session_id.not_in(already_counted))
+        .execution_options(yield_per=_BATCH)
+    )
+
+    for partition in conn.execute(stmt).partitions():
+        stats = []
+        for session_id, saved_results in partition:
+            players_results = {
+                int(user_id): player_results
+                for user_id, player_results in json.loads(saved_results or "{}").items()
+                if user_id.isdigit()
+            }
+            stats.extend(question_stats(session_id, players_results))
+
+        session_ids = [session_id for session_id, _ in partition]
+        chosen = conn.execute(
+            select(_results.c.session_id, _answer.c.question_id, _answer.c.id)
+            .join(_answer, _results.c.answer_id == _answer.c.id)
+            .join(_question, _answer.c.question_id == _question.c.id)
+            .where(_results.c.session_id.in_(session_ids))
+            .where(_question.c.type.in_(_QCM_TYPES))
+        ).all()
+
+        chosen_by_session: dict[int, list[tuple[int, int]]] = {}
+        for session_id, question_id, answer_id in chosen:
+            chosen_by_session.setdefault(session_id, []).append((question_id, answer_id))
+
+        distribution = [
+            row
+            for session_id, session_chosen in chosen_by_session.items()
+            for row in answer_stats(session_id, session_chosen)
+        ]
+
+        if stats:
+            conn.execute(insert(QuestionStats), stats)
+        if distribution:
+            conn.execute(insert(AnswerStats), distribution)
@@ -0,0 +1,33 @@
+"""
+Temps de réponse des participants, et leur somme dans les statistiques des questions.
+
+Les sessions terminées avant cette révision n'ont pas de temps de réponse : leurs colonnes restent à None (ou à 0
+dans question_stats) et le temps de réponse moyen ne compte que les réponses chronométrées.
+"""
+from sqlalchemy import Connection, inspect, text
+
+revision = 8
+description = "temps de réponse"
+
+# Table -> colonnes ajoutées, avec leur définition
+_COLUMNS = {
+    "results": {"response_time_ms": "INTEGER"},
+    "open_answer": {"response_time_ms": "INTEGER"},
+    "result_detail": {"response_time_ms": "INTEGER"},
+    "question_stats": {
+        "response_time_total_ms": "BIGINT NOT NULL DEFAULT 0",
+        "nb_timed": "INTEGER NOT NULL DEFAULT 0",
+    },
+}
+
+
+def upgrade(conn: Connection):
+    inspector = inspect(conn)
+
+    for table, columns in _COLUMNS.items():
+        # Colonnes déjà présentes si la table a été créée après cette révision (create_all, révisions 6 et 7)
+        existing = {column["name"] for column in inspector.get_columns(table)}
+
+        for name, definition in columns.items():
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {definition}"))
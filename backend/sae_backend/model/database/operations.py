@@ -5,10 +5,10 @@ from datetime import datetime
 from typing import Sequence
 
 from fastapi import HTTPException, status
-from sqlalchemy import case, exists, or_
+from sqlalchemy import case, delete, exists, insert, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, union_all
-import json
+from sqlalchemy import desc
 
 from .db_models import (
     AuthorisedGroup,
@@ -22,14 +22,14 @@ from .db_models import (
     Answer,
     Survey,
     Group,
+    GroupClosure,
     GroupMember,
     Results,
     UserAffiliation,
-    OpenAnswer
 )
-from .db_models import SurveyResults
+from .group_hierarchy import detach_group, new_group_closure
 from ..api import api_models
-from ..security import create_session_join_code
+from ..security import JOIN_CODE_ATTEMPTS, create_session_join_code
 
 """
 
@@ -782,6 +782,11 @@ def create_group(db: Session, creator_id: int, group_name: str, parent_id: int |
     """
     new_group = Group(creator_id=creator_id, group_name=group_name, parent_id=parent_id)
     db.add(new_group)
+    db.flush()
+
+    for stmt in new_group_closure(new_group.id, parent_id):  # type: ignore
+        db.execute(stmt)
+
     db.commit()
     db.refresh(new_group)
 
@@ -890,11 +895,44 @@ def delete_group(db: Session, group_id: int) -> Group | None:
     group = get_group(db, group_id)
     if group is None:
         return None
+
+    for stmt in detach_group(group_id):
+        db.execute(stmt)
+
     db.delete(group)
     db.commit()
+
     return group
 
 
+def rebuild_group_closure(db: Session) -> int:
+    """
+    Reconstruit entièrement la fermeture de la hiérarchie des groupes à partir des parent_id.
+
+    Retour
+    ------
+
+    int
+        Nombre de lignes de la fermeture.
+    """
+    parents = dict(db.query(Group.id, Group.parent_id).all())
+
+    rows = []
+    for group_id in parents:
+        ancestor_id, depth, seen = group_id, 0, set()
+        while ancestor_id is not None and ancestor_id in parents and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            rows.append({"ancestor_id": ancestor_id, "descendant_id": group_id, "depth": depth})
+            ancestor_id, depth = parents[ancestor_id], depth + 1
+
+    db.execute(delete(GroupClosure))
+    if rows:
+        db.execute(insert(GroupClosure), rows)
+    db.commit()
+
+    return len(rows)
+
+
 def get_group_users(db: Session, group_id: int) -> list[User] | None:
     """
     Renvoie les utilisateurs qui sont dans le groupe dont l'id est passé en paramètre.
@@ -1084,11 +1122,20 @@ def start_survey_session(db: Session, user_id: int, session_template_id: int) ->
             status_code=status.HTTP_403_FORBIDDEN, detail="You must own the template to be able to start a session."
         )
 
-    survey_session = SurveySession(session_template_id=session_template_id, created_at=datetime.now())
-    survey_session.join_code = create_session_join_code(survey_session.id)  # type: ignore
+    # Code unique (index ix_survey_session_join_code) : un code déjà pris est tiré à nouveau
+    for attempt in range(1, JOIN_CODE_ATTEMPTS + 1):
+        survey_session = SurveySession(session_template_id=session_template_id, created_at=datetime.now())
+        survey_session.join_code = create_session_join_code(survey_session.id)  # type: ignore
+
+        db.add(survey_session)
+        try:
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            if attempt == JOIN_CODE_ATTEMPTS:
+                raise
 
-    db.add(survey_session)
-    db.commit()
     db.refresh(survey_session)
 
     return survey_session
@@ -1172,224 +1219,5 @@ def remove_member(db: Session, group_id: int, user_id: int, removed_user_id: int
         return None
     db.delete(group_member)
     db.commit()
-    return group_member
-
-
-def get_saved_results(db: Session, code: str) -> str:
-    """
-    Récupère le résultat du questionnaire.
-
-    Paramètres
-
-    ----------
-
-    join_code : str
-        Code de la session.
-
-    Retour
-    ------
-
-    str | None
-        le résultat du questionnaire
-    """
-    saved_id = db.query(SurveySession.id).filter(SurveySession.join_code == code).scalar()
-    return db.query(SurveyResults.saved_results).filter(SurveyResults.session_id == saved_id).scalar()
-
-
-def add_name_to_players(db: Session, infos_players) -> str:
-    """
-    Ajoute les noms de joueurs en fonction de leur id dans le json
-
-    Paramètres
-
-    ----------
-
-    infos_players
-        Json avec id_player, questions_answers
-
-    Retour
-    ------
-
-    str
-        Json modifié
-    """
-    for player in infos_players:
-        user = db.query(User).filter(User.id == int(player["id_player"])).scalar()
-        player["name"] = user.name + " " + user.surname
-
-    return infos_players
-
-
-def add_name_to_player(db: Session, infos_players) -> str:
-    """
-    Ajoute le noms du joueur en fonction de son id dans le json
-
-    Paramètres
-
-    ----------
-
-    infos_players
-        Json avec id_player, questions_answers
-
-    Retour
-    ------
-
-    str
-        Json modifié
-    """
-    user = db.query(User).filter(User.id == int(infos_players["id_player"])).scalar()
-    infos_players["name"] = user.name + " " + user.surname
-
-    return infos_players
-
-
-def get_sessions_player(db: Session, user_id: int) -> str:
-    """
-    Renvoie la liste des sessions auxquelles l'utilisateur a participé.
-
-    Paramètres
-    ----------
 
-    user_id : int
-        Id de l'utilisateur.
-
-    Retour
-    ------
-
-    str | None
-        Liste des sessions auxquelles l'utilisateur a participé au format JSON.
-    """
-    results_query = (
-        db.query(Results.session_id)
-        .filter(Results.user_id == user_id)
-        .order_by(desc(Results.session_id))
-        .distinct()
-    )
-
-    open_answer_query = (
-        db.query(OpenAnswer.session_id)
-        .filter(OpenAnswer.user_id == user_id)
-        .order_by(desc(OpenAnswer.session_id))
-        .distinct()
-    )
-
-    combined_query = union_all(results_query, open_answer_query)
-
-    combined_results = db.execute(combined_query).fetchall()
-
-    unique_results = set(result[0] for result in combined_results)
-
-    return str(list(unique_results))
-
-
-def get_join_code_survey_id(db: Session, results: str):
-    """
-    Renvoie le code pour rejoindre et l'id du questionnaire des sessions
-
-    Paramètres
-    ----------
-
-    results : list
-        Liste de tuples des sessions.
-
-    Retour
-    ------
-
-    str
-        JSON du join code et du survey auxquelles l'utilisateur a participé.
-    """
-    results_list_clean = []
-
-    for session in results:
-        results_list_clean.extend(int(val) for val in session if val.isdigit())
-
-    results_list = []
-
-    for session_id in results_list_clean:
-        join_code = db.query(SurveySession.join_code).filter(SurveySession.id == session_id).scalar()
-        session_template_id = (
-            db.query(SurveySession.session_template_id).filter(SurveySession.id == session_id).scalar()
-        )
-        survey_id = (
-            db.query(SurveySessionTemplate.survey_id).filter(SurveySessionTemplate.id == session_template_id).scalar()
-        )
-
-        result_dict = {"session_id": session_id, "join_code": join_code, "survey_id": survey_id}
-        results_list.append(result_dict)
-
-    return results_list
-
-
-def get_name_survey_owner(db: Session, results: str) -> str:
-    """
-    Renvoie le nom du questionnaire, son id et le nom de l'utilisateur qui l'a créé
-
-    Paramètres
-    ----------
-
-    results : list
-        JSON du join code et du survey.
-
-    Retour
-    ------
-
-    str
-        JSON du join code, du nom questionnaire, son id, et propriétaire.
-    """
-    for result in results:
-        survey_id = result["survey_id"]  # type: ignore
-        survey = db.query(Survey.title, Survey.user_id).filter(Survey.id == survey_id).first()
-
-        if survey:
-            title, user_id = survey
-            owner_name = db.query(User.name).filter(User.id == user_id).first()
-
-            if owner_name:
-                owner_name = owner_name[0]
-                result["survey_title"] = title  # type: ignore
-                result["owner_name"] = owner_name  # type: ignore
-
-    return results
-
-
-def get_sessions_results(db: Session, results: str, user_id: int) -> str:
-    """
-    Renvoie le resultat sauvegardé des sessions.
-
-    Paramètres
-    ----------
-
-    results : str
-        JSON du du questionnaire, son id et le nom de l'utilisateur qui l'a créé.
-
-    Retour
-    ------
-
-    str
-        JSON des résultats sauvegardés.
-    """
-    results.reverse()
-    for result in results:
-        session_id = result.get("session_id")
-        saved_results_row = db.query(SurveyResults.saved_results).filter(SurveyResults.session_id == session_id).first()
-
-        if saved_results_row:
-            saved_results_str = saved_results_row.saved_results
-
-            saved_results = json.loads(saved_results_str)
-            result["saved_results"] = saved_results
-
-            player_results = saved_results.get(str(user_id), {})
-            total_questions = len(player_results)
-            correct_answers = sum(answer.get("correctly_answered", False) for answer in player_results.values())
-            total_open_answers = sum(1 for answer in player_results.values() if "correctly_answered" not in answer)
-            total_answers = total_questions - total_open_answers
-
-            result["correct_answers"] = correct_answers
-            result["total_open_answers"] = total_open_answers
-            result["total_answers"] = total_answers
-
-            result.pop("survey_id", None)
-            result["id_player"] = user_id
-
-    return results
+    return group_member
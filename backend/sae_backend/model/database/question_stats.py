@@ -0,0 +1,114 @@
+"""
+Statistiques des questions (tables question_stats et answer_stats) : contribution de chaque session terminée,
+calculée une seule fois à partir des résultats de ses participants, à la fin de la session et pour les sessions
+terminées avant l'existence des tables (migration).
+
+Les contributions s'additionnent : les statistiques d'une question sur toutes les sessions qui l'ont utilisée
+se lisent en sommant ses lignes, sans relire les réponses.
+"""
+from collections import Counter
+from typing import Iterable
+
+# Part des participants d'une session dans le groupe des meilleurs et dans celui des moins bons
+# (indice de discrimination de Kelley)
+GROUP_FRACTION = 0.27
+
+
+def _groups(scores: dict[int, int]) -> tuple[set[int], set[int]]:
+    """
+    Renvoie les meilleurs et les moins bons participants d'une session. À score égal, l'ordre
+    des identifiants départage, pour que le calcul ne dépende pas de l'ordre des résultats.
+    """
+    if len(scores) < 2:
+        return set(), set()
+
+    ranked = sorted(scores, key=lambda user_id: (scores[user_id], user_id))
+    size = max(1, round(len(ranked) * GROUP_FRACTION))
+
+    return set(ranked[-size:]), set(ranked[:size])
+
+
+def question_stats(session_id: int, players_results: dict[int, dict]) -> list[dict]:
+    """
+    Renvoie la contribution d'une session aux statistiques de chacune de ses questions.
+
+    Paramètres
+    ----------
+    players_results : dict[int, dict]
+        Résultats de chaque participant, par question, tels qu'enregistrés dans survey_results :
+        les QCM ont une clé `correctly_answered`, les questions ouvertes non, et les réponses
+        chronométrées une clé `response_time_ms`.
+
+    Retour
+    ------
+
+    list[dict]
+        Colonnes de la table question_stats.
+    """
+    scores = {
+        user_id: sum(bool(answer.get("correctly_answered")) for answer in player_results.values())
+        for user_id, player_results in players_results.items()
+    }
+    upper, lower = _groups(scores)
+
+    stats: dict[int, dict] = {}
+    for user_id, player_results in players_results.items():
+        for question_id, answer in player_results.items():
+            row = stats.setdefault(
+                int(question_id),
+                {
+                    "question_id": int(question_id),
+                    "session_id": session_id,
+                    "nb_participants": 0,
+                    "nb_correct": 0,
+                    "upper_count": 0,
+                    "upper_correct": 0,
+                    "lower_count": 0,
+                    "lower_correct": 0,
+                    "response_time_total_ms": 0,
+                    "nb_timed": 0,
+                },
+            )
+            correct = bool(answer.get("correctly_answered"))
+
+            row["nb_participants"] += 1
+            row["nb_correct"] += correct
+
+            if user_id in upper:
+                row["upper_count"] += 1
+                row["upper_correct"] += correct
+
+            if user_id in lower:
+                row["lower_count"] += 1
+                row["lower_correct"] += correct
+
+            # Résultats enregistrés avant la mesure des temps de réponse : pas de temps
+            if answer.get("response_time_ms") is not None:
+                row["response_time_total_ms"] += answer["response_time_ms"]
+                row["nb_timed"] += 1
+
+    return list(stats.values())
+
+
+def answer_stats(session_id: int, chosen: Iterable[tuple[int, int]]) -> list[dict]:
+    """
+    Renvoie la contribution d'une session à la répartition des réponses de ses QCM.
+
+    Paramètres
+    ----------
+    chosen : Iterable[tuple[int, int]]
+        Identifiants de la question et de la réponse, pour chaque réponse choisie par un participant.
+
+    Retour
+    ------
+
+    list[dict]
+        Colonnes de la table answer_stats.
+    """
+    return [
+        {"answer_id": answer_id, "session_id": session_id, "question_id": question_id, "nb_chosen": nb_chosen}
+        for (question_id, answer_id), nb_chosen in Counter(chosen).items()
+    ]
+
+
+__all__ = ["answer_stats", "question_stats"]
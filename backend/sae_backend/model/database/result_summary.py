@@ -0,0 +1,71 @@
+"""
+Résumé (table result_summary) et détail par question (table result_detail) des résultats d'un participant,
+calculés à partir de ses résultats tels qu'enregistrés dans survey_results : à la fin d'une session,
+et pour les sessions terminées avant l'existence des tables (migrations).
+"""
+
+
+def summarise(session_id: int, user_id: int, player_results: dict) -> dict:
+    """
+    Renvoie la ligne de résumé d'un participant.
+
+    Paramètres
+    ----------
+    player_results : dict
+        Résultats du participant, par question, tels qu'enregistrés dans survey_results :
+        les QCM ont une clé `correctly_answered`, les questions ouvertes non.
+
+    Retour
+    ------
+
+    dict
+        Colonnes de la table result_summary.
+    """
+    score = nb_answers = nb_open_answers = 0
+
+    for answer in player_results.values():
+        if "correctly_answered" in answer:
+            nb_answers += 1
+            score += bool(answer["correctly_answered"])
+        else:
+            nb_open_answers += 1
+
+    return {
+        "session_id": session_id,
+        "user_id": user_id,
+        "score": score,
+        "nb_answers": nb_answers,
+        "nb_open_answers": nb_open_answers,
+    }
+
+
+def details(session_id: int, user_id: int, player_results: dict) -> list[dict]:
+    """
+    Renvoie les lignes de détail d'un participant, une par question.
+
+    Paramètres
+    ----------
+    player_results : dict
+        Résultats du participant, par question, tels qu'enregistrés dans survey_results.
+
+    Retour
+    ------
+
+    list[dict]
+        Colonnes de la table result_detail.
+    """
+    return [
+        {
+            "session_id": session_id,
+            "user_id": user_id,
+            "question_id": int(question_id),
+            "question_text": answer.get("question_text", ""),
+            "answers_text": answer.get("answers_text", []),
+            "correctly_answered": answer.get("correctly_answered"),
+            "response_time_ms": answer.get("response_time_ms"),
+        }
+        for question_id, answer in player_results.items()
+    ]
+
+
+__all__ = ["details", "summarise"]
@@ -0,0 +1,511 @@
+"""
+Etat en mémoire des sessions de questionaire en cours.
+
+Pendant une session, les évènements socket travaillent uniquement sur un objet LiveSession
+(un par code de session) au lieu de faire un aller-retour avec la base de données à chaque réponse.
+Les réponses validées sont confiées au tampon d'écriture groupée (voir answer_buffer), qui est vidé
+aux changements de question et à la fin de la session.
+
+L'état est propre au processus : tous les évènements d'un même code de session doivent être
+traités par le même processus (voir shard).
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .answer_buffer import AnswerBuffer, answer_buffer
+from .config import settings
+from .database.async_ import operations as pg_ops
+from .database.async_.id_resolver import id_resolver
+from .database.async_.exceptions import AnswerDoesNotExist, NotAnOpenAnswer, OpenAnswerTooLong
+from .database.db_models import QuestionType, SurveySessionType
+from .presence import Presence
+from .progress import ProgressStore
+from .scoreboard import Scoreboard
+from .session_acl import invalidate_session_acl, mark_session_started
+from .word_cloud import WordFrequencies
+
+
+@dataclass(slots=True)
+class LiveQuestion:
+    """
+    Question d'une session en cours.
+    `payload` est le contenu de l'évènement `next_question`, préparé une fois pour toutes au chargement.
+    """
+
+    id: int
+    type: QuestionType
+    answer_ids: set[int] = field(default_factory=set)
+    correct_ids: set[int] = field(default_factory=set)
+    payload: dict = field(default_factory=dict)
+
+    @property
+    def is_open(self) -> bool:
+        return self.type in {QuestionType.open, QuestionType.open_restricted}
+
+
+class LiveSession:
+    """
+    Etat d'une session de questionaire en cours : questions, question courante,
+    participants, présence, réponses déjà reçues et classement.
+
+    Dans une session autonome libre (auto_free), il n'y a pas de question courante commune :
+    chaque participant avance à son rythme dans la liste des questions.
+    """
+
+    def __init__(
+        self,
+        join_code: str,
+        session_id: int,
+        questions: list[LiveQuestion],
+        buffer: AnswerBuffer = answer_buffer,
+        owner_id: int | None = None,
+        session_type: SurveySessionType = SurveySessionType.piloted,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.join_code = join_code
+        self.session_id = session_id
+        self.session_type = session_type
+        self.questions = questions
+        self.current_index: int | None = None
+        self.has_started = False
+        # Vrai une fois les résultats enregistrés ou la session oubliée : l'objet n'est plus utilisé
+        self.closed = False
+        # Passage à la question suivante et fin de la session (propriétaire et minuteur) : un seul à la fois
+        self.lock = asyncio.Lock()
+
+        self.owner_id = owner_id
+        self.owner_sid: str | None = None
+
+        # adresse mail -> id utilisateur
+        self.participants: dict[str, int] = {}
+        # participants actuellement connectés
+        self.presence = Presence()
+
+        self.scoreboard = Scoreboard(sum(1 for q in questions if not q.is_open))
+        # id question -> ids des participants qui ont répondu, id réponse -> nombre de fois choisie
+        self._answered_by_question: dict[int, set[int]] = {q.id: set() for q in questions}
+        self._answer_counts: dict[int, int] = {aid: 0 for q in questions for aid in q.answer_ids}
+        # id question (ouverte en un mot) -> fréquence des mots répondus
+        self._word_clouds: dict[int, WordFrequencies] = {
+            q.id: WordFrequencies() for q in questions if q.type == QuestionType.open_restricted
+        }
+        # (id utilisateur, id question) -> [nombre de bonnes réponses choisies, une mauvaise réponse choisie]
+        self._progress: dict[tuple[int, int], list[int]] = {}
+
+        self._question_index = {q.id: i for i, q in enumerate(questions)}
+        self._answer_question = {aid: q.id for q in questions for aid in q.answer_ids}
+
+        # Session autonome libre : position de chaque participant dans la liste des questions
+        self.progress = ProgressStore(len(questions))
+
+        # (id utilisateur, id réponse) déjà reçus, pour refuser les doublons comme le faisait la base
+        self._answered: set[tuple[int, int]] = set()
+
+        self._buffer = buffer
+
+        # Affichage de la question en cours (ou de la première question d'une session autonome libre),
+        # et de la question en cours de chaque participant d'une session autonome libre, pour les temps de réponse
+        self._clock = clock
+        self._question_shown_at: float | None = None
+        self._shown_at_by_user: dict[int, float] = {}
+
+        # Dernier évènement reçu, pour oublier les sessions abandonnées (voir SessionNamespace._on_idle_check)
+        self.last_activity = clock()
+
+    @classmethod
+    async def load(cls, sess: AsyncSession, join_code: str) -> "LiveSession":
+        """
+        Charge l'état d'une session et tout son questionaire depuis la base de données.
+        """
+        state = await pg_ops.get_session_state(sess, join_code)
+        if state is None:
+            raise KeyError(join_code)
+
+        session_id, has_started, current_question_id, owner_id, session_type = state
+        session_type = session_type or SurveySessionType.piloted
+
+        # Les sessions avec minuteur indiquent aux clients le temps laissé pour chaque question
+        time_limit = settings.AUTO_TIMER_QUESTION_S if session_type == SurveySessionType.auto_timer else None
+
+        questions: list[LiveQuestion] = []
+        for question, answer in await pg_ops.survey_content_in_order(sess, join_code):
+            if not questions or questions[-1].id != question.id:
+                questions.append(
+                    LiveQuestion(
+                        question.id,  # type: ignore
+                        question.type,  # type: ignore
+                        payload={
+                            "question": {"text": question.text, "media": question.media, "id": question.id},
+                            "type": question.type.value,  # type: ignore
+                            "answers": [],
+                            "mode": session_type.value,
+                            "time_limit": time_limit,
+                        },
+                    )
+                )
+
+            if answer is not None:
+                questions[-1].answer_ids.add(answer.id)  # type: ignore
+                if answer.is_correct:
+                    questions[-1].correct_ids.add(answer.id)  # type: ignore
+                questions[-1].payload["answers"].append({"text": answer.text, "id": answer.id})
+
+        live = cls(join_code, session_id, questions, owner_id=owner_id, session_type=session_type)
+        live.has_started = bool(has_started)
+        if current_question_id is not None:
+            live.set_current_question(current_question_id)
+
+        # Session déjà commencée dans un autre processus ou oubliée après inactivité : reprise des réponses reçues
+        if live.has_started:
+            live._restore(*await pg_ops.session_answers(sess, session_id))
+
+        return live
+
+    def _restore(self, results: Sequence[Row], open_answers: Sequence[Row]):
+        """
+        Reprend les réponses déjà enregistrées d'une session rechargée : participants, réponses reçues
+        (les doublons restent refusés), résumés des réponses, classement et avancement des participants.
+        """
+        for user_id, email, answer_id in results:
+            if answer_id in self._answer_question:
+                self._add_known_participant(email, user_id)
+                self._answered.add((user_id, answer_id))
+                self._count_answers(user_id, [answer_id])
+
+        for user_id, email, question_id, text in open_answers:
+            if question_id in self._question_index:
+                self._add_known_participant(email, user_id)
+                self._count_open_answer(user_id, question_id, text)
+
+    def touch(self):
+        """
+        Note un évènement reçu pour la session.
+        """
+        self.last_activity = self._clock()
+
+    def idle_seconds(self) -> float:
+        """
+        Temps écoulé depuis le dernier évènement reçu, en secondes.
+        """
+        return self._clock() - self.last_activity
+
+    @property
+    def current_question(self) -> LiveQuestion | None:
+        if self.current_index is None:
+            return None
+        return self.questions[self.current_index]
+
+    @property
+    def is_self_paced(self) -> bool:
+        return self.session_type == SurveySessionType.auto_free
+
+    @property
+    def is_timed(self) -> bool:
+        return self.session_type == SurveySessionType.auto_timer
+
+    def set_current_question(self, question_id: int):
+        """
+        Marque une question comme étant la question en cours.
+        """
+        self.current_index = self._question_index[question_id]
+
+    async def advance(self, sess: AsyncSession) -> LiveQuestion | None:
+        """
+        Démarre la session si besoin et passe à la question suivante.
+        Renvoie None si il n'y a plus de questions.
+        """
+        next_index = 0 if self.current_index is None else self.current_index + 1
+        question = self.questions[next_index] if next_index < len(self.questions) else None
+
+        if question is None and self.has_started:
+            return None
+
+        await self._start(sess, None if question is None else question.id)
+
+        if question is not None:
+            self.current_index = next_index
+            self._question_shown_at = self._clock()
+
+        return question
+
+    async def start_self_paced(self, sess: AsyncSession) -> LiveQuestion | None:
+        """
+        Démarre une session autonome libre : tous les participants commencent à la première question.
+        Renvoie None si la session a déjà démarré ou n'a pas de questions.
+        """
+        if self.has_started:
+            return None
+
+        await self._start(sess, None)
+        self._question_shown_at = self._clock()
+
+        return self.questions[0] if self.questions else None
+
+    def next_question_for(self, email: str) -> LiveQuestion | None:
+        """
+        Session autonome libre : passe un participant à sa question suivante, prise dans la liste
+        chargée une fois pour toutes. Renvoie None si il a terminé le questionaire.
+        """
+        user_id = self.participants[email]
+        index = self.progress.advance(user_id)
+        self._shown_at_by_user[user_id] = self._clock()
+
+        return self.questions[index] if index < len(self.questions) else None
+
+    async def _start(self, sess: AsyncSession, question_id: int | None):
+        await pg_ops.set_current_question(sess, self.session_id, question_id)
+        self.has_started = True
+        mark_session_started(self.join_code)
+
+    async def add_participant(self, sess: AsyncSession, email: str) -> int:
+        """
+        Enregistre un participant de la session et renvoie son id.
+        """
+        if email not in self.participants:
+            user_id, _ = await id_resolver.resolve(sess, email, self.join_code)
+            self._add_known_participant(email, user_id)
+
+        return self.participants[email]
+
+    def _add_known_participant(self, email: str, user_id: int):
+        if email not in self.participants:
+            self.participants[email] = user_id
+            self.scoreboard.add_player(user_id)
+            self.progress.add(user_id)
+
+    async def record_answer(self, email: str, answer_ids: list[int]) -> int | None:
+        """
+        Enregistre la ou les réponses d'un participant (question type QCM).
+        Renvoie le nouveau score du participant s'il a changé, None sinon.
+        """
+        user_id = self.participants[email]
+
+        for aid in answer_ids:
+            if aid not in self._answer_question or (user_id, aid) in self._answered:
+                raise AnswerDoesNotExist(aid)
+
+        answered = {(user_id, aid) for aid in answer_ids}
+        self._answered |= answered
+
+        rows = [
+            {
+                "user_id": user_id,
+                "answer_id": aid,
+                "session_id": self.session_id,
+                "response_time_ms": self._response_time_ms(user_id, self._answer_question[aid]),
+            }
+            for aid in answer_ids
+        ]
+
+        # Quelle que soit l'erreur du tampon, la réponse n'est pas enregistrée : le participant peut la renvoyer
+        try:
+            await self._buffer.submit(results=rows)
+        except Exception:
+            self._answered -= answered
+            raise
+
+        return self._count_answers(user_id, answer_ids)
+
+    def _count_answers(self, user_id: int, answer_ids: list[int]) -> int | None:
+        """
+        Compte des réponses QCM validées. Renvoie le nouveau score du participant s'il a changé, None sinon.
+        """
+        for aid in answer_ids:
+            question_id = self._answer_question[aid]
+            self._answer_counts[aid] += 1
+            self._answered_by_question[question_id].add(user_id)
+            self._reach(user_id, question_id)
+
+        return self._update_score(user_id, answer_ids)
+
+    def _reach(self, user_id: int, question_id: int):
+        """
+        Session autonome libre : un participant qui répond à une question y est au moins arrivé
+        (avancement repris d'après les réponses après un rechargement).
+        """
+        if self.is_self_paced:
+            self.progress.advance_to(user_id, self._question_index[question_id])
+
+    def _response_time_ms(self, user_id: int, question_id: int) -> int | None:
+        """
+        Temps écoulé depuis l'affichage de la question au participant, en millisecondes.
+        None si ce n'est pas sa question en cours (réponse tardive) ou si l'affichage n'a pas été vu
+        par ce processus (session rechargée en cours de question).
+        """
+        if self.is_self_paced:
+            if user_id not in self.progress or self.progress.position(user_id) != self._question_index[question_id]:
+                return None
+            shown_at = self._shown_at_by_user.get(user_id, self._question_shown_at)
+        else:
+            question = self.current_question
+            if question is None or question.id != question_id:
+                return None
+            shown_at = self._question_shown_at
+
+        if shown_at is None:
+            return None
+
+        return round((self._clock() - shown_at) * 1000)
+
+    def _update_score(self, user_id: int, answer_ids: list[int]) -> int | None:
+        """
+        Met à jour le classement après des réponses validées, en les comparant aux bonnes réponses
+        de chaque question : une question est bien répondue si aucune mauvaise réponse n'est choisie
+        et que toutes les bonnes réponses le sont.
+        """
+        delta = 0
+
+        for aid in answer_ids:
+            question = self.questions[self._question_index[self._answer_question[aid]]]
+            progress = self._progress.setdefault((user_id, question.id), [0, 0])
+
+            was_correct = self._is_correct(progress, question)
+            if aid in question.correct_ids:
+                progress[0] += 1
+            else:
+                progress[1] = 1
+
+            delta += int(self._is_correct(progress, question)) - int(was_correct)
+
+        if delta == 0:
+            return None
+
+        return self.scoreboard.add(user_id, delta)
+
+    @staticmethod
+    def _is_correct(progress: list[int], question: LiveQuestion) -> bool:
+        return not progress[1] and 0 < progress[0] == len(question.correct_ids)
+
+    async def record_open_answer(self, email: str, question_id: int, text: str):
+        """
+        Enregistre la réponse d'un participant à une question ouverte.
+        """
+        user_id = self.participants[email]
+
+        index = self._question_index.get(question_id)
+        question = None if index is None else self.questions[index]
+
+        if question is None or not question.is_open:
+            raise NotAnOpenAnswer(None if question is None else question.type)
+
+        if question.type == QuestionType.open_restricted and (size := len(text.split())) > 1:
+            raise OpenAnswerTooLong(f"{size} words instead of 1")
+
+        await self._buffer.submit(
+            open_answers=[
+                {
+                    "text": text,
+                    "question_id": question_id,
+                    "user_id": user_id,
+                    "session_id": self.session_id,
+                    "response_time_ms": self._response_time_ms(user_id, question_id),
+                }
+            ]
+        )
+
+        self._count_open_answer(user_id, question_id, text)
+
+    def _count_open_answer(self, user_id: int, question_id: int, text: str):
+        self._answered_by_question[question_id].add(user_id)
+        self._reach(user_id, question_id)
+
+        if question_id in self._word_clouds:
+            self._word_clouds[question_id].add(text)
+
+    def has_word_cloud(self, question_id: int) -> bool:
+        return question_id in self._word_clouds
+
+    def word_cloud(self, question_id: int, k: int) -> dict | None:
+        """
+        Les k mots les plus répondus à une question ouverte en un mot, ou None pour les autres questions.
+        """
+        words = self._word_clouds.get(question_id)
+        if words is None:
+            return None
+
+        return {"question_id": question_id, "total": words.total, "words": words.top(k)}
+
+    def answer_summary(self) -> dict | None:
+        """
+        Résumé des réponses à la question en cours, pour le propriétaire de la session :
+        nombre de participants qui ont répondu et nombre de fois que chaque réponse a été choisie.
+        """
+        question = self.current_question
+        if question is None:
+            return None
+
+        return {
+            "question_id": question.id,
+            "answered": len(self._answered_by_question[question.id]),
+            "participants": len(self.participants),
+            "answers": {str(aid): self._answer_counts[aid] for aid in sorted(question.answer_ids)},
+        }
+
+    def progress_summary(self) -> dict:
+        """
+        Taux de complétion d'une session autonome libre, pour le propriétaire.
+        """
+        return {"join_code": self.join_code, **self.progress.completion()}
+
+    def participant_progress(self) -> list[dict]:
+        """
+        Taux de complétion de chaque participant.
+        """
+        return [
+            {"id_player": str(user_id), "email": email, "percent": self.progress.percent(user_id)}
+            for email, user_id in self.participants.items()
+        ]
+
+    async def save_progress(self, sess: AsyncSession):
+        """
+        Enregistre en une fois l'avancement des participants d'une session autonome libre.
+        """
+        if self.is_self_paced:
+            await pg_ops.save_participant_progress(sess, self.session_id, self.progress.rows())
+
+    async def flush(self):
+        """
+        Attend que toutes les réponses reçues soient écrites en base.
+        """
+        await self._buffer.flush()
+
+
+_live_sessions: dict[str, LiveSession] = {}
+
+
+def get_live_session(join_code: str) -> LiveSession | None:
+    """
+    Renvoie l'état d'une session en cours si il est déjà chargé dans ce processus.
+    """
+    return _live_sessions.get(join_code)
+
+
+async def load_live_session(sess: AsyncSession, join_code: str) -> LiveSession:
+    """
+    Renvoie l'état d'une session en cours, en le chargeant depuis la base si besoin.
+    """
+    live = _live_sessions.get(join_code)
+    if live is not None:
+        return live
+
+    live = await LiveSession.load(sess, join_code)
+
+    # Un autre chargement concurrent a pu terminer avant nous
+    return _live_sessions.setdefault(join_code, live)
+
+
+def close_live_session(join_code: str) -> LiveSession | None:
+    """
+    Oublie l'état d'une session terminée ou abandonnée.
+    """
+    id_resolver.invalidate(join_code)
+    invalidate_session_acl(join_code)
+    return _live_sessions.pop(join_code, None)
+
+
+__all__ = ["LiveQuestion", "LiveSession", "get_live_session", "load_live_session", "close_live_session"]
@@ -0,0 +1,66 @@
+"""
+Présence des participants d'une session de questionaire.
+
+Les arrivées et départs sont accumulés puis envoyés groupés, sous forme de différences,
+au lieu d'un message à toute la salle pour chaque participant.
+"""
+
+
+class Presence:
+    """
+    Participants connectés à une session et changements pas encore envoyés.
+    """
+
+    def __init__(self):
+        self.members: set[str] = set()
+        self._joined: set[str] = set()
+        self._left: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def join(self, email: str):
+        self.members.add(email)
+
+        # Un départ puis un retour dans le même intervalle s'annulent
+        if email in self._left:
+            self._left.discard(email)
+        else:
+            self._joined.add(email)
+
+    def leave(self, email: str):
+        if email not in self.members:
+            return
+
+        self.members.discard(email)
+
+        if email in self._joined:
+            self._joined.discard(email)
+        else:
+            self._left.add(email)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self._joined or self._left)
+
+    def delta(self) -> dict | None:
+        """
+        Renvoie les changements depuis le dernier appel (None si il n'y en a pas) et les oublie.
+        """
+        if not self.has_changes:
+            return None
+
+        out = {"joined": sorted(self._joined), "left": sorted(self._left), "count": len(self.members)}
+        self._joined.clear()
+        self._left.clear()
+
+        return out
+
+    def snapshot(self) -> dict:
+        """
+        Etat complet, pour un client qui arrive en cours de route.
+        """
+        return {"members": sorted(self.members), "count": len(self.members)}
+
+
+__all__ = ["Presence"]
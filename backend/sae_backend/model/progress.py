@@ -0,0 +1,114 @@
+"""
+Avancement des participants d'une session autonome libre (auto_free).
+
+Chaque participant a sa propre question en cours. Les positions sont rangées dans un tableau compact,
+indexé par un numéro de place attribué à l'arrivée du participant : avancer et lire une position se
+font en temps constant, et le nombre de participants à chaque position est tenu à jour pour que le
+taux de complétion ne demande jamais de parcourir les participants.
+"""
+from array import array
+
+
+class ProgressStore:
+    """
+    Position (nombre de questions passées) de chaque participant, de 0 à `nb_questions`.
+    """
+
+    def __init__(self, nb_questions: int):
+        self.nb_questions = nb_questions
+
+        # id utilisateur -> place dans les tableaux
+        self._slots: dict[int, int] = {}
+        self._user_ids = array("q")
+        self._positions = array("l")
+
+        # position -> nombre de participants à cette position, et somme des positions
+        self._at_position = [0] * (nb_questions + 1)
+        self._total = 0
+
+    def __len__(self) -> int:
+        return len(self._user_ids)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._slots
+
+    def add(self, user_id: int):
+        """
+        Ajoute un participant, à la première question.
+        """
+        if user_id in self._slots:
+            return
+
+        self._slots[user_id] = len(self._user_ids)
+        self._user_ids.append(user_id)
+        self._positions.append(0)
+        self._at_position[0] += 1
+
+    def position(self, user_id: int) -> int:
+        return self._positions[self._slots[user_id]]
+
+    def advance(self, user_id: int) -> int:
+        """
+        Passe un participant à la question suivante et renvoie sa nouvelle position
+        (`nb_questions` une fois le questionaire terminé).
+        """
+        slot = self._slots[user_id]
+        position = self._positions[slot]
+
+        if position < self.nb_questions:
+            self._at_position[position] -= 1
+            self._at_position[position + 1] += 1
+            self._positions[slot] = position + 1
+            self._total += 1
+
+        return self._positions[slot]
+
+    def advance_to(self, user_id: int, position: int) -> int:
+        """
+        Avance un participant jusqu'à `position` s'il n'y est pas déjà, et renvoie sa position.
+        """
+        slot = self._slots[user_id]
+        current = self._positions[slot]
+        position = min(position, self.nb_questions)
+
+        if position > current:
+            self._at_position[current] -= 1
+            self._at_position[position] += 1
+            self._positions[slot] = position
+            self._total += position - current
+
+        return self._positions[slot]
+
+    def completion(self) -> dict:
+        """
+        Taux de complétion de la session, pour le propriétaire.
+        `at_question` donne le nombre de participants à chaque question (le dernier élément : ceux qui ont fini).
+        """
+        possible = len(self) * self.nb_questions
+
+        return {
+            "participants": len(self),
+            "finished": self._at_position[-1],
+            "percent": round(100 * self._total / possible, 1) if possible else 0.0,
+            "at_question": list(self._at_position),
+        }
+
+    def percent(self, user_id: int) -> float:
+        """
+        Taux de complétion d'un participant.
+        """
+        if not self.nb_questions:
+            return 100.0
+        return round(100 * self.position(user_id) / self.nb_questions, 1)
+
+    def rows(self) -> list[dict]:
+        """
+        Une ligne par participant, pour l'enregistrement groupé en fin de session.
+        """
+        return [
+            {"user_id": user_id, "completed": position, "nb_questions": self.nb_questions}
+            for user_id, position in zip(self._user_ids, self._positions)
+        ]
+
+
+__all__ = ["ProgressStore"]
@@ -1,3 +1,10 @@
+"""
+Opérations sur Redis pour les sessions de questionaire.
+
+Un seul client, partagé par tout le processus, est utilisé. Chaque opération fait un seul aller-retour
+avec le serveur : les commandes liées sont envoyées ensemble dans une transaction (MULTI/EXEC).
+Toutes les clés d'une session expirent, pour ne pas garder indéfiniment les sessions abandonnées.
+"""
 from contextlib import asynccontextmanager
 
 import redis.asyncio as aredis
@@ -5,65 +12,164 @@ import redis.asyncio as aredis
 from .config import settings
 
 
-_pool = aredis.ConnectionPool.from_url(
-    settings.REDIS_URL,  # type: ignore
-    max_connections=None,
-    health_check_interval=10,
-    socket_connect_timeout=5,
-    retry_on_timeout=True,
-    socket_keepalive=True,
-)
+# Créé à la première utilisation (démarrage de l'application) et non à l'import, comme les moteurs de la base
+_client: aredis.Redis | None = None
+
+
+def get_redis_client() -> aredis.Redis:
+    """
+    Renvoie le client Redis du processus, en le créant au premier appel.
+    """
+    global _client
+
+    if _client is None:
+        pool = aredis.ConnectionPool.from_url(
+            settings.REDIS_URL,  # type: ignore
+            max_connections=None,
+            health_check_interval=10,
+            socket_connect_timeout=5,
+            retry_on_timeout=True,
+            socket_keepalive=True,
+        )
+        _client = aredis.Redis(connection_pool=pool)
+
+    return _client
+
+
+async def close_redis_client():
+    """
+    Ferme les connexions du client Redis, si il a été créé (arrêt de l'application).
+    """
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 
 @asynccontextmanager
 async def get_redis_session():
-    client = None
-    try:
-        client = aredis.Redis.from_pool(_pool)
-        yield client
-    finally:
-        if client is not None:
-            await client.aclose()
+    """
+    Donne accès au client Redis du processus, qui n'est pas fermé à la sortie.
+    """
+    yield get_redis_client()
+
+
+def _users_key(join_code: str) -> str:
+    return f"{join_code}:users"
+
+
+def _owner_key(join_code: str) -> str:
+    return f"{join_code}:owner_sid"
 
 
-async def join_session(client: aredis.Redis, email: str, join_code: str):
+def _shard_key(join_code: str) -> str:
+    return f"{join_code}:shard"
+
+
+# Scripts Lua, liés au client à chaque utilisation (register_script ne fait aucun aller-retour)
+
+# Prend le bail si il est libre ou déjà à nous (et le prolonge), en un seul aller-retour atomique
+_CLAIM_SHARD = """
+    local holder = redis.call('GET', KEYS[1])
+    if not holder or holder == ARGV[1] then
+        redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+        return 1
+    end
+    return 0
+    """
+
+# Libère le bail seulement si il est à nous
+_RELEASE_SHARD = """
+    if redis.call('GET', KEYS[1]) == ARGV[1] then
+        return redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+
+async def join_session(client: aredis.Redis, email: str, join_code: str) -> bool:
     """
     Enregistre un utilisateur comme faisant partie d'une session.
+    Renvoie False si il en faisait déjà partie (vérification et ajout sont atomiques).
     """
-    await client.sadd(f"{join_code}:users", email)  # type: ignore
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.sadd(_users_key(join_code), email)
+        pipe.expire(_users_key(join_code), settings.REDIS_SESSION_TTL)
+        added, _ = await pipe.execute()
+
+    return bool(added)
 
 
 async def leave_session(client: aredis.Redis, email: str, join_code: str):
     """
     Fait quitter un utilisateur d'une session.
     """
-    await client.srem(f"{join_code}:users", email)  # type: ignore
+    await client.srem(_users_key(join_code), email)  # type: ignore
 
 
 async def is_in_session(client: aredis.Redis, email: str, join_code: str) -> bool:
     """
     Vérifie si un utilisateur a rejoind une session.
     """
-    return bool(await client.sismember(f"{join_code}:users", email))  # type: ignore
+    return bool(await client.sismember(_users_key(join_code), email))  # type: ignore
 
 
 async def nb_users_in_session(client: aredis.Redis, join_code: str) -> int:
     """
     Renvoie le nombre d'utilisateurs connectés a une session.
     """
-    return await client.scard(f"{join_code}:users")  # type: ignore
+    return await client.scard(_users_key(join_code))  # type: ignore
 
 
 async def set_session_sid_owner(client: aredis.Redis, join_code: str, sid: str):
     """
     Sauvegarde le sid  propriétaire de la session.
     """
-    await client.set(f"{join_code}:owner_sid", sid)
+    await client.set(_owner_key(join_code), sid, ex=settings.REDIS_SESSION_TTL)
+
+
+async def get_session_sid_owner(client: aredis.Redis, join_code: str) -> str | None:
+    """
+    Renvoie le sid du propriétaire de la session, ou None si il n'est pas connu.
+    """
+    sid_bytes: bytes | None = await client.get(_owner_key(join_code))
+    return None if sid_bytes is None else sid_bytes.decode("utf-8")
+
+
+async def close_session(client: aredis.Redis, join_code: str):
+    """
+    Supprime toutes les clés d'une session terminée.
+    """
+    await client.delete(_users_key(join_code), _owner_key(join_code))
+
+
+async def claim_session_shard(client: aredis.Redis, join_code: str, worker_id: str, ttl: int) -> bool:
+    """
+    Réserve une session pour un processus. Renvoie False si un autre processus la détient déjà.
+    """
+    claim = client.register_script(_CLAIM_SHARD)
+    return bool(await claim(keys=[_shard_key(join_code)], args=[worker_id, ttl]))
+
+
+async def refresh_session_shards(client: aredis.Redis, join_codes: list[str], worker_id: str, ttl: int) -> list[str]:
+    """
+    Prolonge les baux de plusieurs sessions en un seul aller-retour.
+    Renvoie les codes des sessions dont le bail a été perdu.
+    """
+    claim = client.register_script(_CLAIM_SHARD)
+
+    async with client.pipeline(transaction=False) as pipe:
+        for join_code in join_codes:
+            await claim(keys=[_shard_key(join_code)], args=[worker_id, ttl], client=pipe)
+        claimed = await pipe.execute()
+
+    return [join_code for join_code, ok in zip(join_codes, claimed) if not ok]
 
 
-async def get_session_sid_owner(client: aredis.Redis, join_code: str) -> str:
+async def release_session_shard(client: aredis.Redis, join_code: str, worker_id: str):
     """
-    Renvoie le sid du propriétaire de la session.
+    Libère la réservation d'une session.
     """
-    sid_bytes: bytes = await client.get(f"{join_code}:owner_sid")
-    return sid_bytes.decode("utf-8")
+    release = client.register_script(_RELEASE_SHARD)
+    await release(keys=[_shard_key(join_code)], args=[worker_id])
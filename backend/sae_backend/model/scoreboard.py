@@ -0,0 +1,101 @@
+"""
+Classement en direct d'une session de questionaire.
+
+Le score d'un participant est son nombre de questions QCM bien répondues. Comme il est borné par
+le nombre de questions, les participants sont rangés par score dans des seaux, avec un arbre de Fenwick
+sur le nombre de participants par score : modifier un score et calculer un rang se font en O(log q),
+q étant le nombre de questions.
+"""
+
+
+class Scoreboard:
+    """
+    Classement des participants d'une session, mis à jour à chaque réponse.
+    """
+
+    def __init__(self, max_score: int):
+        self.max_score = max_score
+
+        # id utilisateur -> score
+        self._scores: dict[int, int] = {}
+        # score -> ids des utilisateurs qui ont ce score
+        self._buckets: list[set[int]] = [set() for _ in range(max_score + 1)]
+        # arbre de Fenwick (indices à partir de 1) du nombre de participants par score
+        self._tree = [0] * (max_score + 2)
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._scores
+
+    def add_player(self, user_id: int):
+        """
+        Ajoute un participant au classement avec un score nul, s'il n'y est pas déjà.
+        """
+        if user_id not in self._scores:
+            self._place(user_id, 0)
+
+    def add(self, user_id: int, delta: int = 1) -> int:
+        """
+        Modifie le score d'un participant (ajouté au besoin) et renvoie son nouveau score.
+        """
+        old = self._scores.get(user_id)
+        new = min(max((old or 0) + delta, 0), self.max_score)
+
+        if old == new:
+            return new
+
+        if old is not None:
+            self._buckets[old].discard(user_id)
+            self._update(old, -1)
+
+        self._place(user_id, new)
+
+        return new
+
+    def score(self, user_id: int) -> int:
+        return self._scores.get(user_id, 0)
+
+    def rank(self, user_id: int) -> int:
+        """
+        Rang d'un participant (1 pour le meilleur score, les ex-aequo partagent le même rang).
+        """
+        return len(self._scores) - self._count_up_to(self.score(user_id)) + 1
+
+    def ranking(self, limit: int | None = None) -> list[dict]:
+        """
+        Classement par score décroissant, au format de `get_score_all_players`.
+        """
+        out = []
+        for score in range(self.max_score, -1, -1):
+            for user_id in sorted(self._buckets[score]):
+                if limit is not None and len(out) >= limit:
+                    return out
+                out.append({"id_player": str(user_id), "correctly_answered": score})
+
+        return out
+
+    def _place(self, user_id: int, score: int):
+        self._scores[user_id] = score
+        self._buckets[score].add(user_id)
+        self._update(score, 1)
+
+    def _update(self, score: int, delta: int):
+        i = score + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_up_to(self, score: int) -> int:
+        """
+        Nombre de participants dont le score est inférieur ou égal à `score`.
+        """
+        total, i = 0, score + 1
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+
+__all__ = ["Scoreboard"]
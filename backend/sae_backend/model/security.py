@@ -7,6 +7,9 @@ import time
 
 _inner_uniqueness_counter = 0
 
+# Tirages d'un code de session avant d'abandonner, si les codes tirés sont déjà pris
+JOIN_CODE_ATTEMPTS = 5
+
 
 def _map_to_valid_chr_code(code: int) -> str:
     """
@@ -0,0 +1,123 @@
+"""
+Droits d'accès aux sessions de questionaire, gardés en cache par code de session.
+
+Le cache est chargé en une seule requête lors de la première demande de connexion à une session,
+les demandes suivantes sont vérifiées en mémoire.
+"""
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database.async_ import operations as pg_ops
+
+# Durée de vie d'une entrée : borne le délai de prise en compte des changements de groupes et de modèles
+ACL_TTL = 30
+
+
+@dataclass(slots=True)
+class SessionACL:
+    """
+    Droits d'accès à une session.
+    """
+
+    session_id: int
+    owner_email: str
+    is_public: bool
+    allowed_emails: frozenset[str]
+    has_started: bool = False
+    is_finished: bool = False
+
+    @property
+    def joinable(self) -> bool:
+        """
+        La session n'a pas commencé et n'est pas finie.
+        """
+        return not self.has_started and not self.is_finished
+
+    def is_owner(self, email: str) -> bool:
+        return email == self.owner_email
+
+    def can_join(self, email: str) -> bool:
+        return self.is_public or email in self.allowed_emails
+
+
+_acls: dict[str, tuple[SessionACL, float]] = {}
+
+
+async def load_session_acl(sess: AsyncSession, join_code: str) -> SessionACL | None:
+    """
+    Charge les droits d'accès à une session depuis la base de données.
+    Renvoie None si la session n'existe pas.
+    """
+    rows = await pg_ops.session_access_rows(sess, join_code)
+
+    if not rows:
+        return None
+
+    first = rows[0]
+
+    return SessionACL(
+        session_id=first.id,
+        owner_email=first.owner_email,
+        is_public=bool(first.is_public),
+        allowed_emails=frozenset(r.member_email for r in rows if r.member_email is not None),
+        has_started=bool(first.has_started),
+        is_finished=any(r.is_finished for r in rows),
+    )
+
+
+async def get_session_acl(sess: AsyncSession, join_code: str) -> SessionACL | None:
+    """
+    Renvoie les droits d'accès à une session, depuis le cache si possible.
+    """
+    cached = _acls.get(join_code)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
+    acl = await load_session_acl(sess, join_code)
+
+    if acl is not None:
+        _acls[join_code] = (acl, time.monotonic() + ACL_TTL)
+
+    return acl
+
+
+def get_cached_session_acl(join_code: str) -> SessionACL | None:
+    """
+    Renvoie les droits d'accès à une session seulement s'ils sont dans le cache.
+    """
+    cached = _acls.get(join_code)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+
+    return None
+
+
+def mark_session_started(join_code: str):
+    """
+    Plus personne ne peut rejoindre une session qui vient de démarrer.
+    """
+    cached = _acls.get(join_code)
+    if cached is not None:
+        cached[0].has_started = True
+
+
+def invalidate_session_acl(join_code: str | None = None):
+    """
+    Oublie les droits d'accès d'une session, ou de toutes les sessions.
+    """
+    if join_code is None:
+        _acls.clear()
+    else:
+        _acls.pop(join_code, None)
+
+
+__all__ = [
+    "SessionACL",
+    "load_session_acl",
+    "get_session_acl",
+    "get_cached_session_acl",
+    "mark_session_started",
+    "invalidate_session_acl",
+]
@@ -0,0 +1,130 @@
+"""
+Echéances des sessions autonomes avec minuteur (auto_timer).
+
+Un seul ordonnanceur par processus : les échéances de toutes les sessions sont rangées dans un tas,
+et une seule tâche attend la plus proche, au lieu d'une tâche par session.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import suppress
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class SessionScheduler:
+    """
+    Appelle `callback(join_code)` à l'échéance prévue pour chaque session.
+
+    Reprogrammer ou annuler une session ne retire rien du tas : les entrées périmées
+    sont simplement ignorées lorsqu'elles arrivent en tête.
+    """
+
+    def __init__(self, callback: Callable[[str], Awaitable[None]]):
+        self._callback = callback
+
+        self._heap: list[tuple[float, int, str]] = []
+        # code de session -> numéro de l'échéance en cours (les autres entrées du tas sont périmées)
+        self._current: dict[str, int] = {}
+        self._counter = itertools.count()
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._runner: asyncio.Task | None = None
+        # Appels en cours, gardés pour les attendre à l'arrêt
+        self._firing: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def __contains__(self, join_code: str) -> bool:
+        return join_code in self._current
+
+    def _bind_loop(self):
+        """
+        (Re)crée les primitives asyncio si la boucle d'évènements a changé (tests, rechargement).
+        """
+        loop = asyncio.get_running_loop()
+
+        if loop is not self._loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._runner = None
+            self._firing = set()
+
+    def schedule(self, join_code: str, delay: float):
+        """
+        Prévoit l'échéance d'une session dans `delay` secondes, en remplaçant l'échéance précédente.
+        """
+        self._bind_loop()
+
+        seq = next(self._counter)
+        self._current[join_code] = seq
+        heapq.heappush(self._heap, (time.monotonic() + delay, seq, join_code))
+
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+        elif self._heap[0][1] == seq:
+            # Nouvelle échéance la plus proche : la tâche doit raccourcir son attente
+            self._wakeup.set()
+
+    def cancel(self, join_code: str):
+        self._current.pop(join_code, None)
+
+    async def stop(self):
+        """
+        Arrête la tâche des échéances (arrêt de l'application) : les échéances prévues sont oubliées,
+        les appels déjà commencés sont attendus.
+        """
+        self._current.clear()
+        self._heap.clear()
+
+        runner, self._runner = self._runner, None
+        if self._loop is not asyncio.get_running_loop():
+            return
+
+        if runner is not None and not runner.done():
+            runner.cancel()
+            with suppress(asyncio.CancelledError):
+                await runner
+
+        if self._firing:
+            await asyncio.gather(*self._firing, return_exceptions=True)
+
+    def _drop_stale(self):
+        while self._heap and self._current.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    async def _run(self):
+        while True:
+            self._drop_stale()
+            if not self._heap:
+                return
+
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, join_code = heapq.heappop(self._heap)
+            del self._current[join_code]
+
+            # Un traitement lent (base de données) ne doit pas retarder les autres échéances
+            task = asyncio.create_task(self._fire(join_code))
+            self._firing.add(task)
+            task.add_done_callback(self._firing.discard)
+
+    async def _fire(self, join_code: str):
+        try:
+            await self._callback(join_code)
+        except Exception:
+            logger.exception("Echéance de la session %s", join_code)
+
+
+__all__ = ["SessionScheduler"]
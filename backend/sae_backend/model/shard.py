@@ -0,0 +1,90 @@
+"""
+Répartition des sessions de questionaire entre plusieurs processus.
+
+L'état d'une session en cours est gardé en mémoire (voir live_session) : tous ses évènements doivent
+être traités par le même processus. Le proxy envoie les connexions d'un même code de session toujours
+vers le même processus (hachage cohérent sur le code de session, voir frontend/nginx/config.conf).
+
+En complément, chaque processus prend dans Redis un bail sur les sessions qu'il charge, prolongé
+régulièrement. Une connexion mal routée (changement du nombre de processus, redémarrage) est alors
+refusée au lieu de créer un second état en mémoire pour la même session.
+"""
+import asyncio
+import logging
+import os
+import socket
+from contextlib import suppress
+
+from . import redis_operations as redis_ops
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class NotSessionShard(Exception):
+    """
+    La session est détenue par un autre processus.
+    """
+
+
+class ShardLeases:
+    """
+    Baux détenus par ce processus, prolongés en tâche de fond.
+    """
+
+    def __init__(self, worker_id: str = WORKER_ID, ttl: int = settings.SHARD_LEASE_TTL):
+        self.worker_id = worker_id
+        self.ttl = ttl
+        self.held: set[str] = set()
+        self._refresher: asyncio.Task | None = None
+
+    async def claim(self, join_code: str):
+        """
+        Prend le bail d'une session, ou lève NotSessionShard si un autre processus le détient.
+        """
+        if not await redis_ops.claim_session_shard(redis_ops.get_redis_client(), join_code, self.worker_id, self.ttl):
+            raise NotSessionShard(join_code)
+
+        self.held.add(join_code)
+
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh_forever())
+
+    async def release(self, join_code: str):
+        self.held.discard(join_code)
+        await redis_ops.release_session_shard(redis_ops.get_redis_client(), join_code, self.worker_id)
+
+    async def stop(self):
+        """
+        Arrête la prolongation des baux (arrêt de l'application) : ils expirent d'eux-mêmes après `ttl` secondes.
+        """
+        refresher, self._refresher = self._refresher, None
+        if refresher is None or refresher.done() or refresher.get_loop() is not asyncio.get_running_loop():
+            return
+
+        refresher.cancel()
+        with suppress(asyncio.CancelledError):
+            await refresher
+
+    async def _refresh_forever(self):
+        while self.held:
+            await asyncio.sleep(self.ttl / 3)
+
+            try:
+                lost = await redis_ops.refresh_session_shards(
+                    redis_ops.get_redis_client(), sorted(self.held), self.worker_id, self.ttl
+                )
+            except Exception:  # pragma: no cover
+                logger.exception("Impossible de prolonger les baux des sessions")
+                continue
+
+            for join_code in lost:
+                logger.warning("Bail de la session %s perdu par %s", join_code, self.worker_id)
+                self.held.discard(join_code)
+
+
+shard_leases = ShardLeases()
+
+__all__ = ["WORKER_ID", "NotSessionShard", "ShardLeases", "shard_leases"]
@@ -1,11 +1,17 @@
 """
 Gestionaire de session des sockets
+
+Par défaut les sockets passent par Redis, pour que plusieurs processus puissent émettre dans les mêmes salons.
+Le gestionaire en mémoire ne convient qu'à un seul processus (développement, tests de charge).
 """
-from socketio import AsyncRedisManager
+from socketio import AsyncManager, AsyncRedisManager
 
 from ..model.config import settings
 
 
-manager = AsyncRedisManager(settings.REDIS_URL)  # type: ignore
+if settings.SOCKETIO_MANAGER == "memory":
+    manager = AsyncManager()
+else:
+    manager = AsyncRedisManager(settings.REDIS_URL)  # type: ignore
 
 __all__ = ["manager"]
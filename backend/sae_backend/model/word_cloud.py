@@ -0,0 +1,56 @@
+"""
+Nuage de mots des réponses aux questions ouvertes en un mot.
+
+Les réponses sont normalisées (casse, accents, espaces et ponctuation autour du mot) puis comptées,
+pour n'envoyer au propriétaire de la session que les mots les plus fréquents.
+"""
+import heapq
+import string
+import unicodedata
+from collections import Counter
+
+_STRIPPED = string.whitespace + string.punctuation + "«»“”’…"
+
+
+def normalize_word(text: str) -> str:
+    """
+    Forme normalisée d'une réponse : minuscules, sans accents ni ponctuation autour.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).strip(_STRIPPED)
+
+
+class WordFrequencies:
+    """
+    Nombre d'occurences de chaque mot (normalisé) répondu à une question.
+    """
+
+    def __init__(self):
+        self.counts: Counter[str] = Counter()
+        self.total = 0
+        # forme normalisée -> première forme reçue, pour l'affichage
+        self._display: dict[str, str] = {}
+
+    def add(self, text: str) -> str | None:
+        """
+        Compte une réponse. Renvoie sa forme normalisée, ou None si il ne reste rien à compter.
+        """
+        key = normalize_word(text)
+        if not key:
+            return None
+
+        self.counts[key] += 1
+        self.total += 1
+        self._display.setdefault(key, text.strip(_STRIPPED))
+
+        return key
+
+    def top(self, k: int) -> list[dict]:
+        """
+        Les k mots les plus fréquents, du plus au moins fréquent (ordre alphabétique en cas d'égalité).
+        """
+        best = heapq.nsmallest(k, self.counts.items(), key=lambda item: (-item[1], item[0]))
+        return [{"text": self._display[key], "count": count} for key, count in best]
+
+
+__all__ = ["normalize_word", "WordFrequencies"]
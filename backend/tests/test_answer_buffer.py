@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from sae_backend.model.answer_buffer import AnswerBuffer
+from sae_backend.model.database.async_ import AsyncSessionLocal
+from sae_backend.model.database.async_.exceptions import AnswerDoesNotExist
+from sae_backend.model.database.async_.operations import get_session_state
+
+from .utils.testing_data import get_ressource
+from .utils.testing_queries import has_user_answered
+from .utils.testing_database import TestingAsyncSession
+
+
+@pytest.fixture
+def join_code() -> str:
+    return get_ressource("live_session_join_code")
+
+
+async def _session_id(join_code: str) -> int:
+    async with TestingAsyncSession() as sess:
+        state = await get_session_state(sess, join_code)
+
+    assert state is not None
+    return state[0]
+
+
+def _open_answer(session_id: int, text: str) -> dict:
+    return {
+        "text": text,
+        "question_id": get_ressource("open_question_id"),
+        "user_id": get_ressource("session_man2_id"),
+        "session_id": session_id,
+    }
+
+
+@pytest.mark.asyncio
+async def test_buffer_batches_and_rejects_invalid(join_code: str):
+    session_id = await _session_id(join_code)
+    user_id = get_ressource("session_man2_id")
+    answer1_id = get_ressource("running_session_answer1")
+
+    buffer = AnswerBuffer(AsyncSessionLocal, flush_interval=0.01, max_rows=100, max_pending=1000)
+    row = {"user_id": user_id, "answer_id": answer1_id, "session_id": session_id}
+
+    await asyncio.gather(
+        buffer.submit(results=[row]),
+        buffer.submit(open_answers=[_open_answer(session_id, "Un")]),
+        buffer.submit(open_answers=[_open_answer(session_id, "Deux")]),
+    )
+
+    assert buffer.pending == 0
+
+    async with TestingAsyncSession() as sess:
+        assert await has_user_answered(sess, "session.man2@gmail.com", join_code, get_ressource("second_question_id"))
+
+    # Le doublon est refusé sans empêcher l'écriture des autres réponses du lot
+    duplicate, valid = await asyncio.gather(
+        buffer.submit(results=[row]),
+        buffer.submit(open_answers=[_open_answer(session_id, "Trois")]),
+        return_exceptions=True,
+    )
+
+    assert isinstance(duplicate, AnswerDoesNotExist), duplicate
+    assert valid is None
+
+
+@pytest.mark.asyncio
+async def test_buffer_ack_on_enqueue_and_backpressure(join_code: str):
+    session_id = await _session_id(join_code)
+
+    buffer = AnswerBuffer(AsyncSessionLocal, flush_interval=10, max_rows=100, max_pending=1, ack_on_enqueue=True)
+
+    await buffer.submit(open_answers=[_open_answer(session_id, "Premier")])
+    assert buffer.pending == 1
+
+    # Le tampon est plein : le second envoi attend qu'il y ait de la place
+    second = asyncio.create_task(buffer.submit(open_answers=[_open_answer(session_id, "Second")]))
+    await asyncio.sleep(0.05)
+    assert not second.done()
+
+    await buffer.flush()
+    await second
+    assert buffer.pending == 1
+
+    await buffer.flush()
+    assert buffer.pending == 0
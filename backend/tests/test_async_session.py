@@ -2,186 +2,18 @@ import json
 from typing import Any
 
 import pytest
-from sae_backend.model.database.async_.exceptions import NotAnOpenAnswer, OpenAnswerTooLong
-
-from sae_backend.model.database.async_.operations import (
-    all_questions_in_order,
-    can_join_session,
-    has_user_answered,
-    has_user_participated,
-    is_session_joinable,
-    is_session_owner,
-    join_session,
-    leave_session,
-    next_question,
-    save_session_results,
-    save_user_answer,
-    save_user_open_answer,
-    start_survey_session,
-    users_in_session,
-    is_in_session,
-)
+from sqlalchemy import event, select
 
-from .utils.testing_data import get_ressource
-from .utils.testing_database import TestingAsyncSession
-
-
-@pytest.fixture
-def join_code() -> str:
-    return get_ressource("running_session_join_code")
-
-
-@pytest.fixture
-def nice_join_code() -> str:
-    return get_ressource("nice_session_join_code")
-
-
-@pytest.mark.asyncio
-async def test_is_session_owner(join_code: str):
-    async with TestingAsyncSession() as sess:
-        assert await is_session_owner(sess, "running.man@gmail.com", join_code)
-        assert not await is_session_owner(sess, "session.man2@gmail.com", join_code)
-
-
-@pytest.mark.asyncio
-async def test_can_join_session(join_code: str):
-    async with TestingAsyncSession() as sess:
-        assert await can_join_session(sess, "session.man2@gmail.com", join_code)
-
-
-@pytest.mark.asyncio
-async def test_can_join_session_authorised(nice_join_code: str):
-    async with TestingAsyncSession() as sess:
-        assert await can_join_session(sess, "jonnhy@peterson.com", nice_join_code)
-
-
-@pytest.mark.asyncio
-async def test_can_join_session_unauthorised(nice_join_code: str):
-    async with TestingAsyncSession() as sess:
-        assert not await can_join_session(sess, "session.man2@gmail.com", nice_join_code)
-
-
-@pytest.mark.asyncio
-async def test_session_lifecycle(join_code: str):
-    async with TestingAsyncSession() as sess:
-        assert len(await users_in_session(sess, join_code)) == 0
+from sae_backend.model.database.async_ import crud, get_async_engine
 
-        assert await can_join_session(sess, "session.man2@gmail.com", join_code)
+from sae_backend.model.database.async_.operations import save_session_results
 
-        await join_session(sess, "session.man2@gmail.com", join_code)
-        assert len(await users_in_session(sess, join_code)) == 1
+from sae_backend.model.database.db_models import AnswerStats, QuestionStats, SurveySession
+from sae_backend.model.live_session import close_live_session, load_live_session
 
-        assert await is_in_session(sess, "session.man2@gmail.com", join_code)
-
-        assert await can_join_session(sess, "session.man@gmail.com", join_code)
-
-        await join_session(sess, "session.man@gmail.com", join_code)
-        assert len(await users_in_session(sess, join_code)) == 2
-
-        await leave_session(sess, "session.man2@gmail.com", join_code)
-        assert len(await users_in_session(sess, join_code)) == 1
-
-        assert not await is_in_session(sess, "session.man2@gmail.com", join_code)
-
-
-@pytest.mark.asyncio
-async def test_is_session_joinable(join_code: str):
-    async with TestingAsyncSession() as sess:
-        assert await is_session_joinable(sess, join_code)
-
-
-@pytest.mark.asyncio
-async def test_session_not_joinable():
-    async with TestingAsyncSession() as sess:
-        assert not await is_session_joinable(sess, "FaK3C0de")
-
-
-@pytest.mark.asyncio
-async def test_all_questions(join_code: str):
-    async with TestingAsyncSession() as sess:
-        nb_questions = len(await all_questions_in_order(sess, join_code))
-        assert nb_questions == 4, nb_questions
-
-
-@pytest.mark.asyncio
-async def test_next_question(join_code: str):
-    next_question_id = get_ressource("first_question_id")
-
-    async with TestingAsyncSession() as sess:
-        question = (await next_question(sess, join_code))[0]
-        assert question is not None
-        assert question.id == next_question_id
-
-        # On va jusqu"a la fin du questionaire
-        guard = 0
-        while question is not None:
-            question = (await next_question(sess, join_code))[0]
-            guard += 1
-            assert guard < 500, "next_question does not circulate to the next question"
-
-
-@pytest.mark.asyncio
-async def test_save_questions(join_code: str):
-    question2_id = get_ressource("second_question_id")
-    answer1_id = get_ressource("running_session_answer1")
-    answer2_id = get_ressource("running_session_answer2")
-
-    async with TestingAsyncSession() as sess:
-        assert not await has_user_answered(sess, "session.man@gmail.com", join_code, question2_id)
-        assert not await has_user_answered(sess, "session.man2@gmail.com", join_code, question2_id)
-
-        await save_user_answer(sess, "session.man2@gmail.com", join_code, [answer1_id])
-        await save_user_answer(sess, "session.man@gmail.com", join_code, [answer1_id, answer2_id])
-
-        assert await has_user_answered(sess, "session.man@gmail.com", join_code, question2_id)
-        assert await has_user_answered(sess, "session.man2@gmail.com", join_code, question2_id)
-
-        assert await has_user_participated(sess, "session.man@gmail.com", join_code)
-
-
-@pytest.mark.asyncio
-async def test_start_survey_session():
-    to_start_join_code = get_ressource("running_session_start_me_join_code")
-
-    async with TestingAsyncSession() as sess:
-        assert await is_session_joinable(sess, to_start_join_code)
-
-        await start_survey_session(sess, to_start_join_code)
-
-        assert not await is_session_joinable(sess, to_start_join_code)
-
-
-@pytest.mark.asyncio
-async def test_save_open_answer(join_code: str):
-    open_question_id = get_ressource("open_question_id")
-    open_restricted_question_id = get_ressource("open_restricted_question_id")
-
-    async with TestingAsyncSession() as sess:
-        await save_user_open_answer(
-            sess, "session.man@gmail.com", join_code, open_question_id, "La vie est très complexe."
-        )
-
-        await save_user_open_answer(sess, "session.man@gmail.com", join_code, open_restricted_question_id, "Joie")
-
-
-@pytest.mark.asyncio
-async def test_save_open_answer_too_long(join_code: str):
-    open_restricted_question_id = get_ressource("open_restricted_question_id")
-
-    async with TestingAsyncSession() as sess:
-        with pytest.raises(OpenAnswerTooLong):
-            await save_user_open_answer(
-                sess, "session.man@gmail.com", join_code, open_restricted_question_id, "Malheur et soufrances"
-            )
-
-
-@pytest.mark.asyncio
-async def test_save_not_open_answer(join_code: str):
-    question2_id = get_ressource("second_question_id")
-
-    async with TestingAsyncSession() as sess:
-        with pytest.raises(NotAnOpenAnswer):
-            await save_user_open_answer(sess, "session.man@gmail.com", join_code, question2_id, "Malheur et soufrances")
+from .utils.testing_data import get_ressource
+from .utils.testing_database import TestingAsyncSession
+from .utils.testing_queries import has_user_participated
 
 
 @pytest.mark.asyncio
@@ -197,22 +29,42 @@ async def test_save_results():
     open_restricted_question_id = get_ressource("open_restricted_question_id")
 
     async with TestingAsyncSession() as sess:
+        live = await load_live_session(sess, join_code)
+        await live.add_participant(sess, "session.man@gmail.com")
+        await live.add_participant(sess, "session.man2@gmail.com")
+
         # Première question type QCM
-        await save_user_answer(sess, "session.man@gmail.com", join_code, [first_answer_id])
+        await live.record_answer("session.man@gmail.com", [first_answer_id])
 
         # Seconde question type QCM
-        await save_user_answer(sess, "session.man2@gmail.com", join_code, [answer1_id])
-        await save_user_answer(sess, "session.man@gmail.com", join_code, [answer1_id, answer2_id])
+        await live.record_answer("session.man2@gmail.com", [answer1_id])
+        await live.record_answer("session.man@gmail.com", [answer1_id, answer2_id])
 
         # Troisième question type ouverte
-        await save_user_open_answer(sess, "session.man@gmail.com", join_code, open_question_id, "Plusieurs mots ici")
-        await save_user_open_answer(sess, "session.man2@gmail.com", join_code, open_question_id, "La campagne est cool")
+        await live.record_open_answer("session.man@gmail.com", open_question_id, "Plusieurs mots ici")
+        await live.record_open_answer("session.man2@gmail.com", open_question_id, "La campagne est cool")
 
         # Quatrième question type ouverte
-        await save_user_open_answer(sess, "session.man@gmail.com", join_code, open_restricted_question_id, "One!")
+        await live.record_open_answer("session.man@gmail.com", open_restricted_question_id, "One!")
 
-        # Sauvegarde de tout ça
-        res_json = await save_session_results(sess, join_code)
+        await live.flush()
+        close_live_session(join_code)
+        assert await has_user_participated(sess, "session.man@gmail.com", join_code)
+
+        # Sauvegarde de tout ça, avec un nombre de requêtes indépendant du nombre de participants et de questions
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args[2])
+
+        event.listen(get_async_engine().sync_engine, "before_cursor_execute", count_statement)
+        try:
+            res_json = await save_session_results(sess, join_code)
+        finally:
+            event.remove(get_async_engine().sync_engine, "before_cursor_execute", count_statement)
+
+        # Dont l'insertion des résumés et du détail de chaque participant, et des statistiques des questions
+        assert 0 < len(statements) <= 9, statements
 
     results: dict[str, dict[str, Any]] = json.loads(res_json)
 
@@ -238,3 +90,54 @@ async def test_save_results():
         session_man_results[str(open_question_id)]["correctly_answered"]
 
     assert session_man_results[str(open_question_id)]["answers_text"][0] == "Plusieurs mots ici"
+
+    # Le classement et le détail de chaque participant sont lus sans relire les résultats complets
+    async with TestingAsyncSession() as sess:
+        scores = await crud.get_session_scores(sess, join_code)
+        details = {
+            user_id: await crud.get_player_results(sess, join_code, int(user_id)) for user_id in results
+        }
+
+    assert scores == sorted(
+        (
+            {"id_player": user_id, "correctly_answered": sum(bool(r.get("correctly_answered")) for r in res.values())}
+            for user_id, res in results.items()
+        ),
+        key=lambda s: s["correctly_answered"],
+        reverse=True,
+    )
+
+    for user_id, user_results in results.items():
+        assert details[user_id] == {
+            "id_player": user_id,
+            "questions_answers": [
+                {
+                    "question_id": question_id,
+                    "question_text": r["question_text"],
+                    "answers_text": r["answers_text"],
+                    "correctly_answered": r.get("correctly_answered"),
+                }
+                for question_id, r in user_results.items()
+            ],
+        }
+
+    # Contribution de la session aux statistiques des questions
+    async with TestingAsyncSession() as sess:
+        stmt = (
+            select(AnswerStats.answer_id, AnswerStats.nb_chosen)
+            .join(SurveySession, AnswerStats.session_id == SurveySession.id)
+            .where(SurveySession.join_code == join_code)
+            .where(AnswerStats.question_id == question2_id)
+        )
+        distribution = dict((await sess.execute(stmt)).all())
+
+        stmt = (
+            select(QuestionStats.question_id, QuestionStats.nb_participants, QuestionStats.nb_correct)
+            .join(SurveySession, QuestionStats.session_id == SurveySession.id)
+            .where(SurveySession.join_code == join_code)
+        )
+        stats = {row.question_id: row[1:] for row in await sess.execute(stmt)}
+
+    assert distribution == {answer1_id: 2, answer2_id: 1}
+    assert stats[question1_id] == (2, 1) and stats[question2_id] == (2, 1)
+    assert stats[open_question_id] == (2, 0) and stats[open_restricted_question_id] == (1, 0)
@@ -0,0 +1,226 @@
+import inspect
+
+import pytest
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from sae_backend.model.database import get_async_db, operations
+from sae_backend.model.database.async_ import crud, get_async_engine
+from sae_backend.model.database.db_models import GroupClosure, ResultSummary, SurveySessionType, UserAffiliation
+
+from .utils.testing_auth import get_token_for
+from .utils.testing_data import get_ressource
+from .utils.testing_database import TestingAsyncSession, TestingSessionLocal, app
+
+
+def test_routes_run_on_event_loop():
+    # Une route synchrone (ou une dépendance synchrone) occuperait un thread du pool de Starlette
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+
+        dependencies = [dep.call for dep in route.dependant.dependencies]
+        if get_async_db in dependencies or any(dep.dependencies for dep in route.dependant.dependencies):
+            assert inspect.iscoroutinefunction(route.endpoint), route.path
+
+
+@pytest.mark.asyncio
+async def test_crud_mirrors_operations():
+    user_id = get_ressource("session_man_id")
+    survey_id = get_ressource("testing_session_survey_id")
+
+    with TestingSessionLocal() as db:
+        sync_sessions = operations.get_all_session(db, user_id)
+        sync_templates = {t.id for t in operations.get_all_session_templates(db, user_id)}
+        sync_questions = {q.id for q in operations.get_survey(db, user_id, survey_id)}
+        sync_groups = {g.id for g in operations.get_groups(db)}
+
+    async with TestingAsyncSession() as sess:
+        assert await crud.get_all_session(sess, user_id) == sync_sessions
+        assert {t.id for t in await crud.get_all_session_templates(sess, user_id)} == sync_templates
+        assert {q.id for q in await crud.get_survey(sess, user_id, survey_id)} == sync_questions
+        assert {g.id for g in await crud.get_groups(sess)} == sync_groups
+
+
+@pytest.mark.asyncio
+async def test_crud_ownership():
+    user_id = get_ressource("session_man_id")
+    other_user_id = get_ressource("session_man2_id")
+    survey_id = get_ressource("testing_session_survey_id")
+
+    async with TestingAsyncSession() as sess:
+        assert await crud.get_survey(sess, other_user_id, survey_id) is None
+        assert await crud.update_survey(sess, other_user_id, survey_id, "Volé", "Volé") is None
+        assert await crud.get_saved_progress(sess, other_user_id, get_ressource("started_session_join_code")) is None
+
+        survey = await crud.get_survey_info(sess, user_id, survey_id)
+        assert survey is not None and survey.title == "Session testing survey"
+
+
+@pytest.mark.asyncio
+async def test_crud_group_closure():
+    parent_id = get_ressource("parent_group_id")
+
+    async def ancestors(sess, group_id: int) -> dict[int, int]:
+        stmt = select(GroupClosure.ancestor_id, GroupClosure.depth).where(GroupClosure.descendant_id == group_id)
+        return dict((await sess.execute(stmt)).all())
+
+    async with TestingAsyncSession() as sess:
+        middle = await crud.create_group(sess, 1, "Async middle group", parent_id)
+        leaf = await crud.create_group(sess, 1, "Async leaf group", middle.id)
+        assert await ancestors(sess, leaf.id) == {leaf.id: 0, middle.id: 1, parent_id: 2}
+
+        await crud.delete_group(sess, middle.id)
+        assert await ancestors(sess, leaf.id) == {leaf.id: 0}
+
+
+@pytest.fixture(scope="module")
+def history_student_id() -> int:
+    # Un étudiant qui a participé à 12 sessions (identifiants à plusieurs chiffres) d'un même professeur
+    with TestingSessionLocal() as db:
+        teacher = operations.register_user(db, "Histo", "Prof", "history.prof@gmail.com", UserAffiliation.teacher)
+        student = operations.register_user(db, "Histo", "Eleve", "history.student@gmail.com", UserAffiliation.student)
+        survey = operations.create_survey(db, teacher.id, "History survey", "history")
+        template = operations.create_session_template(
+            db, teacher.id, survey.id, "History", SurveySessionType.piloted, None, True
+        )
+
+        summaries = []
+        for i in range(12):
+            session = operations.start_survey_session(db, teacher.id, template.id)  # type: ignore
+            summaries.append(
+                {"session_id": session.id, "user_id": student.id, "score": i, "nb_answers": 12, "nb_open_answers": 1}
+            )
+        db.execute(insert(ResultSummary), summaries)
+        db.commit()
+
+        return student.id
+
+
+@pytest.mark.asyncio
+async def test_session_history(history_student_id):
+    async with TestingAsyncSession() as sess:
+        history = await crud.get_session_history(sess, history_student_id, 50, 0)
+
+    assert len(history) == 12
+    # De la plus récente à la plus ancienne
+    assert [h["correct_answers"] for h in history] == list(range(11, -1, -1))
+    assert all(h["survey_title"] == "History survey" and h["owner_name"] == "Histo" for h in history)
+    assert all(h["total_answers"] == 12 and h["total_open_answers"] == 1 for h in history)
+    assert all("saved_results" not in h for h in history)
+
+    async with TestingAsyncSession() as sess:
+        first_page = await crud.get_session_history(sess, history_student_id, 5, 0)
+        last_page = await crud.get_session_history(sess, history_student_id, 5, 10)
+
+    assert first_page == history[:5]
+    assert last_page == history[10:]
+
+
+@pytest.mark.asyncio
+async def test_session_history_single_query(history_student_id):
+    statements = []
+
+    def count_statement(*args):
+        statements.append(args[2])
+
+    event.listen(get_async_engine().sync_engine, "before_cursor_execute", count_statement)
+    try:
+        async with TestingAsyncSession() as sess:
+            await crud.get_session_history(sess, history_student_id, 50, 0)
+    finally:
+        event.remove(get_async_engine().sync_engine, "before_cursor_execute", count_statement)
+
+    assert len(statements) == 1, statements
+
+
+def test_session_history_route(history_student_id):
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer " + get_token_for("history.student@gmail.com")}
+
+    res = client.get("/api/results/get_sessions_player", params={"limit": 4, "offset": 2}, headers=headers)
+    assert res.status_code == 200, res.text
+    assert [h["correct_answers"] for h in res.json()] == [9, 8, 7, 6]
+    assert all(h["id_player"] == history_student_id for h in res.json())
+
+    res = client.get("/api/results/get_sessions_player", params={"limit": 0}, headers=headers)
+    assert res.status_code == 422
+
+
+def test_end_survey_without_results(history_student_id):
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer " + get_token_for("history.prof@gmail.com")}
+    join_code = get_ressource("started_session_join_code")
+
+    res = client.get(f"/api/endSurvey/get_end_survey/{join_code}", headers=headers)
+    assert res.status_code == 200 and res.json() == "Aucun resultat"
+
+    res = client.get(f"/api/endSurvey/get_player_details/{history_student_id}/{join_code}", headers=headers)
+    assert res.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_add_name_to_players_single_query():
+    with TestingSessionLocal() as db:
+        ranking = [
+            {
+                "id_player": str(
+                    operations.register_user(
+                        db, "Joueur", str(i), f"ranking.player{i}@gmail.com", UserAffiliation.student
+                    ).id
+                ),
+                "correctly_answered": 1,
+            }
+            for i in range(30)
+        ]
+
+    statements = []
+
+    def count_statement(*args):
+        statements.append(args[2])
+
+    event.listen(get_async_engine().sync_engine, "before_cursor_execute", count_statement)
+    try:
+        async with TestingAsyncSession() as sess:
+            players = await crud.add_name_to_players(sess, [dict(player) for player in ranking])
+    finally:
+        event.remove(get_async_engine().sync_engine, "before_cursor_execute", count_statement)
+
+    assert len(statements) == 1, statements
+    assert [player["name"] for player in players] == [f"Joueur {i}" for i in range(30)]
+
+    async with TestingAsyncSession() as sess:
+        assert (await crud.add_name_to_player(sess, dict(ranking[3])))["name"] == "Joueur 3"
+
+
+@pytest.mark.asyncio
+async def test_start_survey_session_retries_taken_code(monkeypatch):
+    taken = get_ressource("running_session_join_code")
+
+    def codes_from(*codes):
+        remaining = iter(codes)
+        return lambda session_id: next(remaining)
+
+    with TestingSessionLocal() as db:
+        teacher = operations.register_user(db, "Code", "Prof", "code.prof@gmail.com", UserAffiliation.teacher)
+        survey = operations.create_survey(db, teacher.id, "Code survey", "code")
+        template = operations.create_session_template(
+            db, teacher.id, survey.id, "Code", SurveySessionType.piloted, None, True
+        )
+        teacher_id, template_id = teacher.id, template.id  # type: ignore
+
+        # Code déjà pris : un nouveau code est tiré
+        monkeypatch.setattr(operations, "create_session_join_code", codes_from(taken, "SyncCd"))
+        assert operations.start_survey_session(db, teacher_id, template_id).join_code == "SyncCd"
+
+    async with TestingAsyncSession() as sess:
+        monkeypatch.setattr(crud, "create_session_join_code", codes_from(taken, "SyncCd", "AsynCd"))
+        assert (await crud.start_survey_session(sess, teacher_id, template_id)).join_code == "AsynCd"
+
+        # Tous les codes tirés sont pris : l'erreur remonte
+        monkeypatch.setattr(crud, "JOIN_CODE_ATTEMPTS", 2)
+        monkeypatch.setattr(crud, "create_session_join_code", codes_from(taken, "AsynCd"))
+        with pytest.raises(IntegrityError):
+            await crud.start_survey_session(sess, teacher_id, template_id)
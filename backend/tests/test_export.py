@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from sae_backend.model.database import operations
+from sae_backend.model.database.async_ import crud
+from sae_backend.model.database.db_models import ResultDetail, SurveySessionType, UserAffiliation
+
+from .utils.testing_auth import get_token_for
+from .utils.testing_database import TestingAsyncSession, TestingSessionLocal, app
+
+client = TestClient(app)
+
+NB_STUDENTS = 15
+NB_QUESTIONS = 3
+
+
+@pytest.fixture(scope="module")
+def exported() -> dict:
+    # Deux sessions terminées d'un même questionnaire, 15 participants et 3 questions chacune
+    with TestingSessionLocal() as db:
+        teacher = operations.register_user(db, "Export", "Prof", "export.prof@gmail.com", UserAffiliation.teacher)
+        operations.register_user(db, "Other", "Prof", "export.other@gmail.com", UserAffiliation.teacher)
+        student_ids = [
+            operations.register_user(db, "Élève", str(i), f"export.student{i}@gmail.com", UserAffiliation.student).id
+            for i in range(NB_STUDENTS)
+        ]
+        survey = operations.create_survey(db, teacher.id, "Export survey", "export")
+        template = operations.create_session_template(
+            db, teacher.id, survey.id, "Export", SurveySessionType.piloted, None, True
+        )
+        sessions = [operations.start_survey_session(db, teacher.id, template.id) for _ in range(2)]  # type: ignore
+
+        rows = [
+            {
+                "session_id": session.id,
+                "user_id": student_id,
+                "question_id": question_id,
+                "question_text": f"Question, {question_id}",
+                "answers_text": [] if question_id == 3 else ["Oui", "Non"][: question_id],
+                "correctly_answered": None if question_id == 3 else student_id % 2 == 0,
+            }
+            for session in sessions
+            for student_id in student_ids
+            for question_id in range(1, NB_QUESTIONS + 1)
+        ]
+        db.execute(insert(ResultDetail.__table__), rows)
+        db.commit()
+
+        return {
+            "survey_id": survey.id,
+            "join_codes": [session.join_code for session in sessions],
+            "session_ids": [session.id for session in sessions],
+            "student_ids": student_ids,
+        }
+
+
+def _headers(email: str) -> dict:
+    return {"Authorization": "Bearer " + get_token_for(email)}
+
+
+def test_export_session_csv(exported):
+    join_code = exported["join_codes"][0]
+    res = client.get(f"/api/endSurvey/export/{join_code}", headers=_headers("export.prof@gmail.com"))
+
+    assert res.status_code == 200, res.text
+    assert res.headers["content-type"].startswith("text/csv")
+    assert f"resultats-{join_code}.csv" in res.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(res.text)))
+    assert len(rows) == NB_STUDENTS * NB_QUESTIONS
+    assert {row["join_code"] for row in rows} == {join_code}
+    assert [int(row["user_id"]) for row in rows[::NB_QUESTIONS]] == exported["student_ids"]
+
+    first_student = exported["student_ids"][0]
+    assert rows[0]["name"] == "Élève" and rows[0]["surname"] == "0"
+    assert rows[0]["question_text"] == "Question, 1"
+    assert rows[1]["answers_text"] == "Oui | Non"
+    assert rows[1]["correctly_answered"] == ("true" if first_student % 2 == 0 else "false")
+    assert rows[2]["answers_text"] == "" and rows[2]["correctly_answered"] == ""
+
+
+def test_export_survey_ndjson(exported):
+    res = client.get(
+        f"/api/endSurvey/export_survey/{exported['survey_id']}",
+        params={"format": "ndjson"},
+        headers=_headers("export.prof@gmail.com"),
+    )
+
+    assert res.status_code == 200, res.text
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in res.text.splitlines()]
+    assert len(rows) == 2 * NB_STUDENTS * NB_QUESTIONS
+    # Sessions dans l'ordre, chacune complète
+    assert [row["join_code"] for row in rows[:: NB_STUDENTS * NB_QUESTIONS]] == exported["join_codes"]
+    assert rows[1]["answers_text"] == ["Oui", "Non"]
+    assert rows[2]["correctly_answered"] is None
+
+
+def test_export_not_owner(exported):
+    headers = _headers("export.other@gmail.com")
+
+    res = client.get(f"/api/endSurvey/export/{exported['join_codes'][0]}", headers=headers)
+    assert res.status_code == 404
+
+    res = client.get(f"/api/endSurvey/export_survey/{exported['survey_id']}", headers=headers)
+    assert res.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_export_read_in_batches(exported, monkeypatch):
+    monkeypatch.setattr(crud, "EXPORT_BATCH", 7)
+
+    async with TestingAsyncSession() as sess:
+        sizes = [len(rows) async for rows in crud.stream_session_results(sess, exported["session_ids"])]
+
+    assert sum(sizes) == 2 * NB_STUDENTS * NB_QUESTIONS
+    assert max(sizes) == 7
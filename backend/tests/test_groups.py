@@ -1,8 +1,12 @@
 from fastapi.testclient import TestClient
 import pytest
 
+from sae_backend.model.database.db_models import GroupClosure
+from sae_backend.model.database.operations import create_group, delete_group, rebuild_group_closure
+
 from .utils.testing_auth import get_token_for
-from .utils.testing_database import app
+from .utils.testing_data import get_ressource
+from .utils.testing_database import TestingSessionLocal, app
 
 client = TestClient(app)
 
@@ -71,3 +75,32 @@ def test_delete_group_invalid(testing_users_auth_headers):
 def test_add_member_invalid(testing_users_auth_headers):
     res = client.post("/api/groups/add_member/5?member_id=10", headers=testing_users_auth_headers)
     assert res.status_code != 200, res.text
+
+
+def _ancestors(db, group_id: int) -> dict[int, int]:
+    rows = db.query(GroupClosure.ancestor_id, GroupClosure.depth).filter(GroupClosure.descendant_id == group_id)
+    return dict(rows.all())
+
+
+def test_group_closure():
+    parent_id = get_ressource("parent_group_id")
+    child_id = get_ressource("child_group_id")
+
+    with TestingSessionLocal() as db:
+        grandchild = create_group(db, 1, "Grandchild group", child_id)
+        assert _ancestors(db, grandchild.id) == {grandchild.id: 0, child_id: 1, parent_id: 2}
+
+        # Supprimer un groupe intermédiaire détache ses sous-groupes de ses ancêtres
+        middle = create_group(db, 1, "Middle group", parent_id)
+        leaf = create_group(db, 1, "Leaf group", middle.id)
+        delete_group(db, middle.id)
+
+        assert _ancestors(db, leaf.id) == {leaf.id: 0}
+        assert leaf.parent_id is None
+
+        # La reconstruction complète donne la même fermeture
+        before = db.query(GroupClosure.ancestor_id, GroupClosure.descendant_id, GroupClosure.depth).all()
+        rebuild_group_closure(db)
+        after = db.query(GroupClosure.ancestor_id, GroupClosure.descendant_id, GroupClosure.depth).all()
+
+        assert sorted(before) == sorted(after)
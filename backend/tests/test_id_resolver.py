@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy.exc import NoResultFound
+
+from sae_backend.model.database.async_.id_resolver import IdResolver
+
+from .utils.testing_data import get_ressource
+from .utils.testing_database import TestingAsyncSession
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def join_code() -> str:
+    return get_ressource("running_session_join_code")
+
+
+@pytest.mark.asyncio
+async def test_resolver_hits_and_misses(join_code: str):
+    resolver = IdResolver()
+
+    async with TestingAsyncSession() as sess:
+        user_id, _ = await resolver.resolve(sess, "session.man@gmail.com", join_code)
+        assert user_id == get_ressource("session_man_id")
+
+        assert await resolver.resolve(sess, "session.man@gmail.com", join_code) == (user_id, _)
+
+    assert resolver.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+@pytest.mark.asyncio
+async def test_resolver_unknown_user(join_code: str):
+    resolver = IdResolver()
+
+    async with TestingAsyncSession() as sess:
+        with pytest.raises(NoResultFound):
+            await resolver.resolve(sess, "nobody@nowhere.com", join_code)
+
+    assert len(resolver) == 0
+
+
+@pytest.mark.asyncio
+async def test_resolver_bounded_and_ttl(join_code: str):
+    clock = _FakeClock()
+    resolver = IdResolver(maxsize=1, ttl=10, clock=clock)
+
+    async with TestingAsyncSession() as sess:
+        await resolver.resolve(sess, "session.man@gmail.com", join_code)
+        await resolver.resolve(sess, "session.man2@gmail.com", join_code)
+        assert len(resolver) == 1
+
+        # La plus ancienne entrée a été évincée
+        await resolver.resolve(sess, "session.man@gmail.com", join_code)
+        assert resolver.misses == 3
+
+        clock.now = 11
+        await resolver.resolve(sess, "session.man@gmail.com", join_code)
+        assert resolver.misses == 4
+
+
+@pytest.mark.asyncio
+async def test_resolver_invalidate(join_code: str):
+    resolver = IdResolver()
+
+    async with TestingAsyncSession() as sess:
+        await resolver.resolve(sess, "session.man@gmail.com", join_code)
+        await resolver.resolve(sess, "session.man2@gmail.com", join_code)
+
+        resolver.invalidate(join_code)
+        assert len(resolver) == 0
+
+        await resolver.resolve(sess, "session.man@gmail.com", join_code)
+        assert resolver.hits == 0
@@ -0,0 +1,293 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from sae_backend.model.database import operations
+from sae_backend.model.database.async_.exceptions import AnswerDoesNotExist, NotAnOpenAnswer, OpenAnswerTooLong
+from sae_backend.model.database.async_.operations import get_session_state
+from sae_backend.model.database.db_models import QuestionType, SurveySessionType, UserAffiliation
+from sae_backend.model.live_session import close_live_session, get_live_session, load_live_session
+
+from .utils.testing_auth import get_token_for
+from .utils.testing_data import get_ressource
+from .utils.testing_queries import has_user_answered
+from .utils.testing_database import TestingAsyncSession, TestingSessionLocal, app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def join_code() -> str:
+    return get_ressource("live_session_join_code")
+
+
+@pytest.mark.asyncio
+async def test_load_live_session(join_code: str):
+    async with TestingAsyncSession() as sess:
+        live = await load_live_session(sess, join_code)
+
+        assert len(live.questions) == 4
+        assert live.current_question is None
+        assert get_live_session(join_code) is live
+        assert await load_live_session(sess, join_code) is live
+
+    assert close_live_session(join_code) is live
+    assert get_live_session(join_code) is None
+
+
+@pytest.mark.asyncio
+async def test_live_session_unknown_code():
+    async with TestingAsyncSession() as sess:
+        with pytest.raises(KeyError):
+            await load_live_session(sess, "FaK3C0de")
+
+
+@pytest.mark.asyncio
+async def test_live_session_answers(join_code: str):
+    question1_id = get_ressource("first_question_id")
+    first_answer_id = get_ressource("first_answer_id")
+    open_question_id = get_ressource("open_question_id")
+    open_restricted_question_id = get_ressource("open_restricted_question_id")
+
+    async with TestingAsyncSession() as sess:
+        live = await load_live_session(sess, join_code)
+        await live.add_participant(sess, "session.man@gmail.com")
+
+        live.set_current_question(question1_id)
+        assert live.current_question is not None and live.current_question.id == question1_id
+
+        assert await live.record_answer("session.man@gmail.com", [first_answer_id]) == 1
+        assert await has_user_answered(sess, "session.man@gmail.com", join_code, question1_id)
+
+        # Mauvaise réponse : le score ne change pas
+        assert await live.record_answer("session.man@gmail.com", [get_ressource("running_session_answer2")]) is None
+
+        summary = live.answer_summary()
+        assert summary is not None and summary["question_id"] == question1_id
+        assert summary["answered"] == 1 and summary["participants"] == 1
+        assert summary["answers"][str(first_answer_id)] == 1
+
+        user_id = live.participants["session.man@gmail.com"]
+        assert live.scoreboard.score(user_id) == 1
+        assert live.scoreboard.rank(user_id) == 1
+
+        with pytest.raises(AnswerDoesNotExist):
+            await live.record_answer("session.man@gmail.com", [first_answer_id])
+
+        with pytest.raises(AnswerDoesNotExist):
+            await live.record_answer("session.man@gmail.com", [-42])
+
+        await live.record_open_answer("session.man@gmail.com", open_question_id, "Rien ne se perd")
+
+        with pytest.raises(OpenAnswerTooLong):
+            await live.record_open_answer("session.man@gmail.com", open_restricted_question_id, "Deux mots")
+
+        await live.record_open_answer("session.man@gmail.com", open_restricted_question_id, "Été!")
+        assert not live.has_word_cloud(open_question_id)
+        assert live.word_cloud(open_restricted_question_id, 10) == {
+            "question_id": open_restricted_question_id,
+            "total": 1,
+            "words": [{"text": "Été", "count": 1}],
+        }
+
+        with pytest.raises(NotAnOpenAnswer):
+            await live.record_open_answer("session.man@gmail.com", question1_id, "QCM")
+
+        await live.flush()
+
+    close_live_session(join_code)
+
+
+@pytest.mark.asyncio
+async def test_live_session_advance(join_code: str):
+    question1_id = get_ressource("first_question_id")
+    first_answer_id = get_ressource("first_answer_id")
+
+    async with TestingAsyncSession() as sess:
+        live = await load_live_session(sess, join_code)
+
+        question = await live.advance(sess)
+        assert question is not None and question.id == question1_id
+        assert question.payload["question"]["id"] == question1_id
+        assert question.payload["type"] == "multiple_answers"
+        assert {"text": "Un questionaire en live", "id": first_answer_id} in question.payload["answers"]
+
+        state = await get_session_state(sess, join_code)
+        assert state is not None and state.has_started and state.current_question_id == question1_id
+
+        # Questions ouvertes : pas de réponses possibles
+        seen = [question.id]
+        while (question := await live.advance(sess)) is not None:
+            seen.append(question.id)
+
+        assert len(seen) == 4
+        assert live.current_question is not None and live.current_question.payload["answers"] == []
+        assert await live.advance(sess) is None
+
+    close_live_session(join_code)
+
+    # Un rechargement reprend à la question en cours
+    async with TestingAsyncSession() as sess:
+        live = await load_live_session(sess, join_code)
+        assert live.has_started
+        assert live.current_question is not None and live.current_question.id == seen[-1]
+
+    close_live_session(join_code)
+
+
+@pytest.mark.asyncio
+async def test_live_scoreboard_route(join_code: str):
+    async with TestingAsyncSession() as sess:
+        live = await load_live_session(sess, join_code)
+        await live.add_participant(sess, "session.man2@gmail.com")
+
+    owner_headers = {"Authorization": "Bearer " + get_token_for("running.man@gmail.com")}
+    res = client.get(f"/api/endSurvey/live_scoreboard/{join_code}", headers=owner_headers)
+    assert res.status_code == 200, res.text
+    ranking = [{k: p[k] for k in ("id_player", "correctly_answered")} for p in res.json()]
+    assert ranking == live.scoreboard.ranking()
+    assert str(get_ressource("session_man2_id")) in {p["id_player"] for p in ranking}
+
+    close_live_session(join_code)
+
+    res = client.get(f"/api/endSurvey/live_scoreboard/{join_code}", headers=owner_headers)
+    assert res.status_code == 404, res.text
+
+
+@pytest.mark.asyncio
+async def test_live_session_self_paced():
+    join_code = get_ressource("free_session_join_code")
+
+    async with TestingAsyncSession() as sess:
+        live = await load_live_session(sess, join_code)
+        assert live.is_self_paced and not live.is_timed
+        assert live.questions[0].payload["mode"] == "auto_free"
+        assert live.questions[0].payload["time_limit"] is None
+
+        await live.add_participant(sess, "session.man@gmail.com")
+        await live.add_participant(sess, "session.man2@gmail.com")
+
+        first = await live.start_self_paced(sess)
+        assert first is live.questions[0]
+        assert await live.start_self_paced(sess) is None
+
+        state = await get_session_state(sess, join_code)
+        assert state is not None and state.has_started and state.current_question_id is None
+
+    # Chacun avance à son rythme, sans question courante commune
+    assert live.next_question_for("session.man@gmail.com") is live.questions[1]
+    assert live.next_question_for("session.man@gmail.com") is live.questions[2]
+    assert live.next_question_for("session.man2@gmail.com") is live.questions[1]
+    assert live.current_question is None
+
+    assert live.next_question_for("session.man@gmail.com") is live.questions[3]
+    assert live.next_question_for("session.man@gmail.com") is None
+    assert live.next_question_for("session.man@gmail.com") is None
+
+    summary = live.progress_summary()
+    assert summary["participants"] == 2 and summary["finished"] == 1
+    assert summary["percent"] == round(100 * 5 / 8, 1)
+
+    # Avancement lu en mémoire pendant la session, puis depuis la base après l'enregistrement groupé
+    owner_headers = {"Authorization": "Bearer " + get_token_for("running.man@gmail.com")}
+    res = client.get(f"/api/endSurvey/progress/{join_code}", headers=owner_headers)
+    assert res.status_code == 200, res.text
+    live_progress = {p["id_player"]: p["percent"] for p in res.json()}
+    assert live_progress == {str(get_ressource("session_man_id")): 100.0, str(get_ressource("session_man2_id")): 25.0}
+
+    async with TestingAsyncSession() as sess:
+        await live.save_progress(sess)
+
+        # Second enregistrement (fin de session relancée) : l'avancement est remplacé
+        assert live.next_question_for("session.man2@gmail.com") is live.questions[2]
+        await live.save_progress(sess)
+
+    close_live_session(join_code)
+
+    res = client.get(f"/api/endSurvey/progress/{join_code}", headers=owner_headers)
+    assert res.status_code == 200, res.text
+    assert {p["id_player"]: p["percent"] for p in res.json()} == live_progress | {
+        str(get_ressource("session_man2_id")): 50.0
+    }
+
+    other_headers = {"Authorization": "Bearer " + get_token_for("session.man2@gmail.com")}
+    res = client.get(f"/api/endSurvey/progress/{join_code}", headers=other_headers)
+    assert res.status_code == 404, res.text
+
+
+def _create_session() -> tuple[str, int, int]:
+    """
+    Session pilotée d'une seule question QCM. Renvoie son code et les ids de la bonne et de la mauvaise réponse.
+    """
+    with TestingSessionLocal() as db:
+        teacher = operations.get_user(db, "reload.prof@gmail.com") or operations.register_user(
+            db, "Reload", "Prof", "reload.prof@gmail.com", UserAffiliation.teacher
+        )
+        question = operations.create_question(db, teacher.id, QuestionType.single_answer, "Reload", "")
+        right = operations.create_answer(db, teacher.id, question.id, "Oui", True)
+        wrong = operations.create_answer(db, teacher.id, question.id, "Non", False)
+        survey = operations.create_survey(db, teacher.id, "Reload survey", "reload")
+        operations.add_question_to_survey(db, teacher.id, survey.id, question.id)
+        template = operations.create_session_template(
+            db, teacher.id, survey.id, "Reload", SurveySessionType.piloted, None, True
+        )
+        join_code = operations.start_survey_session(db, teacher.id, template.id).join_code  # type: ignore
+        return join_code, right.id, wrong.id  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_scoreboard_restored_after_reload():
+    join_code, right_id, wrong_id = _create_session()
+
+    async with TestingAsyncSession() as sess:
+        live = await load_live_session(sess, join_code)
+        await live.add_participant(sess, "session.man@gmail.com")
+        await live.add_participant(sess, "session.man2@gmail.com")
+        await live.advance(sess)
+
+        await live.record_answer("session.man@gmail.com", [right_id])
+        await live.record_answer("session.man2@gmail.com", [wrong_id])
+        await live.flush()
+
+    expected = live.scoreboard.ranking()
+    assert [p["correctly_answered"] for p in expected] == [1, 0]
+
+    # Rechargement (session oubliée, autre processus) : le classement est repris des réponses enregistrées
+    close_live_session(join_code)
+    async with TestingAsyncSession() as sess:
+        reloaded = await load_live_session(sess, join_code)
+
+    assert reloaded is not live
+    assert reloaded.scoreboard.ranking() == expected
+
+    owner_headers = {"Authorization": "Bearer " + get_token_for("reload.prof@gmail.com")}
+    res = client.get(f"/api/endSurvey/live_scoreboard/{join_code}", headers=owner_headers)
+    assert res.status_code == 200, res.text
+    assert [{k: p[k] for k in ("id_player", "correctly_answered")} for p in res.json()] == expected
+
+    close_live_session(join_code)
+
+
+@pytest.mark.asyncio
+async def test_answer_rolled_back_when_buffer_fails(monkeypatch):
+    join_code, right_id, _ = _create_session()
+
+    async with TestingAsyncSession() as sess:
+        live = await load_live_session(sess, join_code)
+        await live.add_participant(sess, "session.man@gmail.com")
+        await live.advance(sess)
+
+    submit = live._buffer.submit
+
+    async def failing_submit(**rows):
+        raise RuntimeError("tampon indisponible")
+
+    # Echec du tampon (autre que AnswerDoesNotExist) : la réponse n'est pas considérée comme donnée
+    monkeypatch.setattr(live._buffer, "submit", failing_submit)
+    with pytest.raises(RuntimeError):
+        await live.record_answer("session.man@gmail.com", [right_id])
+
+    monkeypatch.setattr(live._buffer, "submit", submit)
+    assert await live.record_answer("session.man@gmail.com", [right_id]) == 1
+    await live.flush()
+
+    close_live_session(join_code)
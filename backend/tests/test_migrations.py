@@ -0,0 +1,154 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, insert, inspect, select, text
+from sqlalchemy.pool import StaticPool
+
+from sae_backend.model.database import Base
+from sae_backend.model.database.db_models import (
+    Group,
+    GroupClosure,
+    QuestionStats,
+    ResultDetail,
+    ResultSummary,
+    SurveySession,
+)
+from sae_backend.model.database.migrations import HEAD, SchemaOutdated, check_schema_version, current_version, migrate
+
+
+@pytest.fixture
+def engine():
+    # Base séparée de celle des autres tests
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    yield engine
+    engine.dispose()
+
+
+def _version(engine) -> int | None:
+    with engine.connect() as conn:
+        return current_version(conn)
+
+
+def _indexes(engine, table: str) -> set[str]:
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def _columns(engine, table: str) -> set[str]:
+    return {column["name"] for column in inspect(engine).get_columns(table)}
+
+
+def test_migrate_empty_database(engine):
+    with pytest.raises(SchemaOutdated):
+        check_schema_version(engine)
+
+    # Base vide : créée directement à la dernière révision
+    assert migrate(engine) == []
+    assert _version(engine) == HEAD
+    assert set(Base.metadata.tables) <= set(inspect(engine).get_table_names())
+
+    check_schema_version(engine)
+
+    assert migrate(engine) == []
+
+
+def test_migrate_database_created_before_migrations(engine):
+    # Base créée par create_all avant la fermeture des groupes, l'avancement des participants et les index
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE group_closure"))
+        conn.execute(text("DROP TABLE participant_progress"))
+        conn.execute(text("DROP INDEX ix_results_session_user"))
+        conn.execute(text("DROP INDEX ix_survey_session_join_code"))
+
+        conn.execute(
+            insert(Group),
+            [{"id": 1, "group_name": "parent", "parent_id": None}, {"id": 2, "group_name": "child", "parent_id": 1}],
+        )
+        # Codes tirés deux fois avant l'index unique
+        conn.execute(
+            insert(SurveySession),
+            [{"id": 1, "join_code": "DupCod"}, {"id": 2, "join_code": "DupCod"}, {"id": 3, "join_code": "Unique"}],
+        )
+
+    assert migrate(engine) == list(range(2, HEAD + 1))
+    assert _version(engine) == HEAD
+
+    with engine.connect() as conn:
+        closure = set(conn.execute(select(GroupClosure.ancestor_id, GroupClosure.descendant_id)).all())
+    assert closure == {(1, 1), (2, 2), (1, 2)}
+
+    with engine.connect() as conn:
+        codes = dict(conn.execute(select(SurveySession.id, SurveySession.join_code)).all())
+    assert codes[1] == "DupCod" and codes[3] == "Unique"
+    assert codes[2] not in {"DupCod", "Unique"}
+
+    assert "participant_progress" in inspect(engine).get_table_names()
+    assert "ix_results_session_user" in _indexes(engine, "results")
+    assert "ix_survey_session_join_code" in _indexes(engine, "survey_session")
+
+    check_schema_version(engine)
+
+
+def test_migrate_pending_revisions_only(engine):
+    migrate(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE results DROP COLUMN response_time_ms"))
+        conn.execute(text("ALTER TABLE question_stats DROP COLUMN nb_timed"))
+        conn.execute(text("UPDATE schema_version SET version = :version"), {"version": HEAD - 1})
+
+    with pytest.raises(SchemaOutdated):
+        check_schema_version(engine)
+
+    assert migrate(engine) == [HEAD]
+    assert "response_time_ms" in _columns(engine, "results")
+    assert {"response_time_total_ms", "nb_timed"} <= _columns(engine, "question_stats")
+    check_schema_version(engine)
+
+
+def test_migrate_backfills_results(engine):
+    migrate(engine)
+
+    saved_results = {
+        "7": {"1": {"correctly_answered": True}, "2": {"correctly_answered": False}, "3": {"answer": "Texte"}},
+        "12": {"1": {"correctly_answered": True}, "2": {"correctly_answered": True}},
+        "session_info": {},
+    }
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE result_summary"))
+        conn.execute(text("DROP TABLE result_detail"))
+        conn.execute(text("DROP TABLE question_stats"))
+        conn.execute(text("DROP TABLE answer_stats"))
+        conn.execute(text("UPDATE schema_version SET version = :version"), {"version": 4})
+        conn.execute(
+            text("INSERT INTO survey_results (session_id, saved_results) VALUES (:session_id, :saved_results)"),
+            {"session_id": 3, "saved_results": json.dumps(saved_results)},
+        )
+
+    assert migrate(engine) == [5, 6, 7, 8]
+
+    with engine.connect() as conn:
+        stmt = select(
+            ResultSummary.user_id, ResultSummary.score, ResultSummary.nb_answers, ResultSummary.nb_open_answers
+        ).where(ResultSummary.session_id == 3)
+        summaries = set(conn.execute(stmt).all())
+
+        stmt = select(ResultDetail.user_id, ResultDetail.question_id, ResultDetail.correctly_answered).where(
+            ResultDetail.session_id == 3
+        )
+        details = set(conn.execute(stmt).all())
+
+        stmt = select(
+            QuestionStats.question_id,
+            QuestionStats.nb_participants,
+            QuestionStats.nb_correct,
+            QuestionStats.upper_correct,
+            QuestionStats.lower_correct,
+        ).where(QuestionStats.session_id == 3)
+        stats = set(conn.execute(stmt).all())
+
+    assert summaries == {(7, 1, 2, 1), (12, 2, 2, 0)}
+    assert details == {(7, 1, True), (7, 2, False), (7, 3, None), (12, 1, True), (12, 2, True)}
+    # Participant 12 dans le groupe des meilleurs, participant 7 dans celui des moins bons
+    assert stats == {(1, 2, 2, 1, 1), (2, 2, 1, 1, 0), (3, 1, 0, 0, 0)}
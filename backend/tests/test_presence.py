@@ -0,0 +1,36 @@
+from sae_backend.model.presence import Presence
+
+
+def test_presence_delta():
+    presence = Presence()
+
+    assert presence.delta() is None
+
+    presence.join("a@a.com")
+    presence.join("b@b.com")
+    assert presence.delta() == {"joined": ["a@a.com", "b@b.com"], "left": [], "count": 2}
+    assert presence.delta() is None
+
+    presence.leave("a@a.com")
+    presence.leave("nobody@nowhere.com")
+    assert presence.delta() == {"joined": [], "left": ["a@a.com"], "count": 1}
+
+
+def test_presence_changes_cancel_out():
+    presence = Presence()
+
+    # Arrivée puis départ dans le même intervalle : rien à envoyer
+    presence.join("a@a.com")
+    presence.leave("a@a.com")
+    assert not presence.has_changes
+
+    presence.join("b@b.com")
+    presence.delta()
+
+    # Départ puis retour dans le même intervalle : rien à envoyer non plus
+    presence.leave("b@b.com")
+    presence.join("b@b.com")
+    assert presence.delta() is None
+
+    assert presence.snapshot() == {"members": ["b@b.com"], "count": 1}
+    assert len(presence) == 1
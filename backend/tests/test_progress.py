@@ -0,0 +1,62 @@
+from sae_backend.model.progress import ProgressStore
+
+
+def test_progress_advance():
+    progress = ProgressStore(3)
+    progress.add(10)
+    progress.add(20)
+    progress.add(10)
+
+    assert len(progress) == 2 and 10 in progress and 30 not in progress
+    assert progress.position(10) == 0
+
+    assert progress.advance(10) == 1
+    assert progress.advance(10) == 2
+    assert progress.advance(10) == 3
+    # Questionaire terminé : la position ne bouge plus
+    assert progress.advance(10) == 3
+
+    assert progress.position(20) == 0
+    assert progress.percent(10) == 100.0 and progress.percent(20) == 0.0
+
+
+def test_progress_completion():
+    progress = ProgressStore(4)
+    assert progress.completion() == {"participants": 0, "finished": 0, "percent": 0.0, "at_question": [0, 0, 0, 0, 0]}
+
+    for user_id in range(4):
+        progress.add(user_id)
+        for _ in range(user_id + 1):
+            progress.advance(user_id)
+
+    completion = progress.completion()
+    assert completion["participants"] == 4
+    assert completion["finished"] == 1
+    assert completion["at_question"] == [0, 1, 1, 1, 1]
+    assert completion["percent"] == round(100 * 10 / 16, 1)
+
+    assert progress.rows()[2] == {"user_id": 2, "completed": 3, "nb_questions": 4}
+
+
+def test_progress_without_questions():
+    progress = ProgressStore(0)
+    progress.add(1)
+
+    assert progress.advance(1) == 0
+    assert progress.percent(1) == 100.0
+    assert progress.completion()["percent"] == 0.0
+
+
+def test_progress_advance_to():
+    progress = ProgressStore(3)
+    progress.add(10)
+    progress.add(20)
+
+    assert progress.advance_to(10, 2) == 2
+    # Jamais de retour en arrière, ni au delà de la fin
+    assert progress.advance_to(10, 1) == 2
+    assert progress.advance_to(20, 7) == 3
+
+    completion = progress.completion()
+    assert completion["at_question"] == [0, 0, 1, 1]
+    assert completion["percent"] == round(100 * 5 / 6, 1)
@@ -0,0 +1,94 @@
+"""
+Les requêtes du chemin des sockets doivent utiliser les index des colonnes de recherche
+(voir les index de db_models) au lieu de parcourir les tables des sessions et des réponses.
+"""
+import re
+
+import pytest
+from sqlalchemy import event
+
+from sae_backend.model.database.async_ import get_async_engine
+from sae_backend.model.database.async_.crud import get_session_history
+from sae_backend.model.database.async_.operations import (
+    get_session_state,
+    save_session_results,
+    session_access_rows,
+    session_answers,
+    survey_content_in_order,
+)
+
+from .utils.testing_data import get_ressource
+from .utils.testing_database import TestingAsyncSession
+
+# Tables qui grossissent avec le nombre de sessions et de participants
+_HOT_TABLES = {"survey_session", "results", "open_answer", "session_participant", "survey_session_template"}
+
+
+async def _socket_path_statements(join_code: str) -> list[tuple[str, tuple]]:
+    statements: list[tuple[str, tuple]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(get_async_engine().sync_engine, "before_cursor_execute", record)
+    try:
+        async with TestingAsyncSession() as sess:
+            await session_access_rows(sess, join_code)
+            state = await get_session_state(sess, join_code)
+            await session_answers(sess, state.id)
+            await survey_content_in_order(sess, join_code)
+            await save_session_results(sess, join_code)
+    finally:
+        event.remove(get_async_engine().sync_engine, "before_cursor_execute", record)
+
+    return statements
+
+
+async def _plan(statement: str, parameters: tuple) -> list[str]:
+    async with get_async_engine().connect() as conn:
+        rows = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[-1] for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_socket_path_uses_indexes():
+    statements = await _socket_path_statements(get_ressource("query_plans_session_join_code"))
+    assert statements
+
+    used_indexes = set()
+
+    for statement, parameters in statements:
+        plan = await _plan(statement, parameters)
+
+        for step in plan:
+            # Parcours complet, ou index construit à la volée par sqlite faute d'index existant
+            scanned = re.match(r"SCAN (\w+)(?: AS \w+)?$", step)
+            assert scanned is None or scanned.group(1) not in _HOT_TABLES, (statement, plan)
+
+            automatic = re.match(r"SEARCH (\w+) USING AUTOMATIC", step)
+            assert automatic is None or automatic.group(1) not in _HOT_TABLES, (statement, plan)
+
+            used_indexes.update(re.findall(r"INDEX (ix_\w+)", step))
+
+    assert {"ix_survey_session_join_code", "ix_results_session_user"} <= used_indexes
+    assert used_indexes & {"ix_open_answer_session_user", "ix_open_answer_session_question"}
+
+
+@pytest.mark.asyncio
+async def test_session_history_uses_index():
+    statements: list[tuple[str, tuple]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(get_async_engine().sync_engine, "before_cursor_execute", record)
+    try:
+        async with TestingAsyncSession() as sess:
+            await get_session_history(sess, get_ressource("session_man_id"), 50, 0)
+    finally:
+        event.remove(get_async_engine().sync_engine, "before_cursor_execute", record)
+
+    (statement, parameters), = statements
+    plan = await _plan(statement, parameters)
+    assert any("INDEX ix_result_summary_user_session" in step for step in plan), plan
@@ -0,0 +1,233 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from sae_backend.model.database import operations
+from sae_backend.model.database.async_ import crud, get_async_engine
+from sae_backend.model.database.async_ import operations as pg_ops
+from sae_backend.model.database.db_models import (
+    AnswerStats,
+    QuestionStats,
+    QuestionType,
+    ResultDetail,
+    SurveySessionType,
+    UserAffiliation,
+)
+from sae_backend.model.database.question_stats import answer_stats, question_stats
+from sae_backend.model.live_session import close_live_session, load_live_session
+
+from .utils.testing_auth import get_token_for
+from .utils.testing_database import TestingAsyncSession, TestingSessionLocal, app
+
+client = TestClient(app)
+
+
+def test_question_stats():
+    players_results = {
+        1: {
+            "10": {"correctly_answered": True, "response_time_ms": 1000},
+            "11": {"correctly_answered": True},
+            "12": {"answers_text": ["a"]},
+        },
+        2: {"10": {"correctly_answered": True, "response_time_ms": 3000}, "11": {"correctly_answered": False}},
+        3: {"10": {"correctly_answered": False}, "11": {"correctly_answered": False}},
+        4: {"10": {"correctly_answered": False}, "11": {"correctly_answered": True}, "12": {"answers_text": ["b"]}},
+    }
+
+    # Groupes de 1 participant sur 4 : le meilleur est 1, le moins bon 3
+    stats = {row["question_id"]: row for row in question_stats(5, players_results)}
+
+    assert set(stats) == {10, 11, 12}
+    assert all(row["session_id"] == 5 for row in stats.values())
+    assert stats[10] | {"session_id": 0} == {
+        "question_id": 10,
+        "session_id": 0,
+        "nb_participants": 4,
+        "nb_correct": 2,
+        "upper_count": 1,
+        "upper_correct": 1,
+        "lower_count": 1,
+        "lower_correct": 0,
+        "response_time_total_ms": 4000,
+        "nb_timed": 2,
+    }
+    assert (stats[11]["nb_correct"], stats[11]["upper_correct"], stats[11]["lower_correct"]) == (2, 1, 0)
+    assert (stats[12]["nb_participants"], stats[12]["nb_correct"], stats[12]["upper_count"]) == (2, 0, 1)
+
+    # Un seul participant : pas de groupes
+    assert question_stats(5, {1: players_results[1]})[0]["upper_count"] == 0
+
+
+def test_answer_stats():
+    rows = answer_stats(5, [(10, 100), (10, 101), (10, 100), (11, 110)])
+    assert sorted((row["answer_id"], row["question_id"], row["nb_chosen"]) for row in rows) == [
+        (100, 10, 2),
+        (101, 10, 1),
+        (110, 11, 1),
+    ]
+
+
+def _stats(question_id: int, session_id: int, nb_participants: int, nb_correct: int, upper=(0, 0), lower=(0, 0)):
+    return {
+        "question_id": question_id,
+        "session_id": session_id,
+        "nb_participants": nb_participants,
+        "nb_correct": nb_correct,
+        "upper_count": upper[0],
+        "upper_correct": upper[1],
+        "lower_count": lower[0],
+        "lower_correct": lower[1],
+    }
+
+
+@pytest.fixture(scope="module")
+def bank() -> dict:
+    # Un QCM et une question ouverte utilisés par deux sessions terminées
+    with TestingSessionLocal() as db:
+        teacher = operations.register_user(db, "Stats", "Prof", "stats.prof@gmail.com", UserAffiliation.teacher)
+        qcm = operations.create_question(db, teacher.id, QuestionType.single_answer, "QCM", "")
+        right = operations.create_answer(db, teacher.id, qcm.id, "Oui", True)
+        wrong = operations.create_answer(db, teacher.id, qcm.id, "Non", False)
+        unused = operations.create_question(db, teacher.id, QuestionType.multiple_answers, "Jamais posée", "")
+        open_question = operations.create_question(db, teacher.id, QuestionType.open, "Ouverte", "")
+
+        survey = operations.create_survey(db, teacher.id, "Stats survey", "stats")
+        template = operations.create_session_template(
+            db, teacher.id, survey.id, "Stats", SurveySessionType.piloted, None, True
+        )
+        sessions = [operations.start_survey_session(db, teacher.id, template.id) for _ in range(2)]  # type: ignore
+
+        db.execute(
+            insert(QuestionStats),
+            [
+                _stats(qcm.id, sessions[0].id, 10, 6, upper=(3, 3), lower=(3, 1)),
+                _stats(qcm.id, sessions[1].id, 6, 2, upper=(2, 1), lower=(2, 0)),
+                _stats(open_question.id, sessions[0].id, 8, 0),
+            ],
+        )
+        db.execute(
+            insert(AnswerStats),
+            [
+                {"answer_id": right.id, "session_id": sessions[0].id, "question_id": qcm.id, "nb_chosen": 6},
+                {"answer_id": wrong.id, "session_id": sessions[0].id, "question_id": qcm.id, "nb_chosen": 4},
+                {"answer_id": right.id, "session_id": sessions[1].id, "question_id": qcm.id, "nb_chosen": 2},
+            ],
+        )
+        db.commit()
+
+        return {
+            "teacher_id": teacher.id,
+            "qcm_id": qcm.id,
+            "right_id": right.id,
+            "wrong_id": wrong.id,
+            "unused_id": unused.id,
+            "open_id": open_question.id,
+        }
+
+
+def test_read_questions_stats(bank):
+    headers = {"Authorization": "Bearer " + get_token_for("stats.prof@gmail.com")}
+    res = client.get("/api/question/read_questions_stats", headers=headers)
+
+    assert res.status_code == 200, res.text
+    stats = {question["question_id"]: question for question in res.json()}
+    assert set(stats) == {bank["qcm_id"], bank["unused_id"], bank["open_id"]}
+
+    qcm = stats[bank["qcm_id"]]
+    assert (qcm["nb_sessions"], qcm["nb_participants"]) == (2, 16)
+    assert qcm["success_rate"] == pytest.approx(8 / 16)
+    assert qcm["discrimination_index"] == pytest.approx(4 / 5 - 1 / 5)
+    assert [(a["id"], a["nb_chosen"]) for a in qcm["answers"]] == [(bank["right_id"], 8), (bank["wrong_id"], 4)]
+    assert qcm["answers"][0]["rate"] == pytest.approx(8 / 16)
+
+    unused = stats[bank["unused_id"]]
+    assert (unused["nb_sessions"], unused["nb_participants"], unused["success_rate"]) == (0, 0, None)
+    assert unused["discrimination_index"] is None
+
+    open_question = stats[bank["open_id"]]
+    assert (open_question["nb_sessions"], open_question["nb_participants"]) == (1, 8)
+    assert open_question["success_rate"] is None and open_question["answers"] == []
+    assert open_question["average_response_time_ms"] is None
+
+
+@pytest.mark.asyncio
+async def test_questions_stats_query_count(bank):
+    statements = []
+
+    def count_statement(*args):
+        statements.append(args[2])
+
+    event.listen(get_async_engine().sync_engine, "before_cursor_execute", count_statement)
+    try:
+        async with TestingAsyncSession() as sess:
+            await crud.get_questions_stats(sess, bank["teacher_id"])
+    finally:
+        event.remove(get_async_engine().sync_engine, "before_cursor_execute", count_statement)
+
+    assert len(statements) == 2, statements
+
+
+def test_question_stats_unique_per_session(bank):
+    # Une seule contribution par question et par session
+    with TestingSessionLocal() as db:
+        stmt = select(QuestionStats.session_id).where(QuestionStats.question_id == bank["qcm_id"])
+        session_id = db.scalars(stmt).first()
+        with pytest.raises(IntegrityError):
+            db.execute(insert(QuestionStats), [_stats(bank["qcm_id"], session_id, 1, 1)])
+        db.rollback()
+
+        with pytest.raises(IntegrityError):
+            db.execute(
+                insert(AnswerStats),
+                [
+                    {
+                        "answer_id": bank["right_id"],
+                        "session_id": session_id,
+                        "question_id": bank["qcm_id"],
+                        "nb_chosen": 1,
+                    }
+                ],
+            )
+        db.rollback()
+
+
+@pytest.mark.asyncio
+async def test_response_times_saved_once():
+    with TestingSessionLocal() as db:
+        teacher = operations.register_user(db, "Chrono", "Prof", "chrono.prof@gmail.com", UserAffiliation.teacher)
+        operations.register_user(db, "Chrono", "Student", "chrono.student@gmail.com", UserAffiliation.student)
+        question = operations.create_question(db, teacher.id, QuestionType.single_answer, "Chrono", "")
+        right = operations.create_answer(db, teacher.id, question.id, "Oui", True)
+        survey = operations.create_survey(db, teacher.id, "Chrono survey", "chrono")
+        operations.add_question_to_survey(db, teacher.id, survey.id, question.id)
+        template = operations.create_session_template(
+            db, teacher.id, survey.id, "Chrono", SurveySessionType.piloted, None, True
+        )
+        join_code = operations.start_survey_session(db, teacher.id, template.id).join_code  # type: ignore
+        teacher_id, question_id, right_id = teacher.id, question.id, right.id
+
+    now = [100.0]
+    async with TestingAsyncSession() as sess:
+        live = await load_live_session(sess, join_code)
+        live._clock = lambda: now[0]
+        await live.add_participant(sess, "chrono.student@gmail.com")
+        await live.advance(sess)
+
+        now[0] += 1.5
+        await live.record_answer("chrono.student@gmail.com", [right_id])
+        await live.flush()
+
+        saved = await pg_ops.save_session_results(sess, join_code)
+        # Session déjà enregistrée : mêmes résultats, rien n'est ajouté aux statistiques
+        assert await pg_ops.save_session_results(sess, join_code) == saved
+
+        stmt = select(ResultDetail).where(ResultDetail.session_id == live.session_id)
+        detail = (await sess.execute(stmt)).scalar_one()
+        assert detail.response_time_ms == 1500
+
+        stats = {q.question_id: q for q in await crud.get_questions_stats(sess, teacher_id)}
+        assert (stats[question_id].nb_sessions, stats[question_id].nb_participants) == (1, 1)
+        assert stats[question_id].average_response_time_ms == pytest.approx(1500)
+
+    close_live_session(join_code)
@@ -1,7 +1,19 @@
 import pytest
 from redis import ConnectionError
 
-from sae_backend.model.redis_operations import get_redis_session, join_session, leave_session, nb_users_in_session
+from sae_backend.model.config import settings
+from sae_backend.model.redis_operations import (
+    claim_session_shard,
+    close_session,
+    get_redis_session,
+    get_session_sid_owner,
+    join_session,
+    leave_session,
+    nb_users_in_session,
+    refresh_session_shards,
+    release_session_shard,
+    set_session_sid_owner,
+)
 
 
 @pytest.fixture
@@ -25,9 +37,12 @@ async def test_full_redis_session_flow(redis_client):
 
     assert await nb_users_in_session(client, join_code) == 0, "Too many users in session"
 
-    await join_session(client, "hello", join_code)
+    assert await join_session(client, "hello", join_code)
     assert await nb_users_in_session(client, join_code) == 1, "There isn't one user in the session"
 
+    assert not await join_session(client, "hello", join_code), "User joined twice"
+    assert 0 < await client.ttl(f"{join_code}:users") <= settings.REDIS_SESSION_TTL
+
     await join_session(client, "joe", join_code)
     assert await nb_users_in_session(client, join_code) == 2, "There isn't two users in the session"
 
@@ -36,3 +51,46 @@ async def test_full_redis_session_flow(redis_client):
 
     await leave_session(client, "joe", join_code)
     assert await nb_users_in_session(client, join_code) == 0, "Too many users in session"
+
+
+@pytest.mark.asyncio
+async def test_redis_session_owner(redis_client):
+    client = await redis_client
+
+    join_code = "0wn3r5"
+
+    assert await get_session_sid_owner(client, join_code) is None
+
+    await set_session_sid_owner(client, join_code, "sid")
+    await join_session(client, "hello", join_code)
+    assert await get_session_sid_owner(client, join_code) == "sid"
+
+    await close_session(client, join_code)
+    assert await get_session_sid_owner(client, join_code) is None
+    assert await nb_users_in_session(client, join_code) == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_session_shard(redis_client):
+    client = await redis_client
+
+    join_code = "5h4rd5"
+
+    await release_session_shard(client, join_code, "worker-1")
+    await release_session_shard(client, join_code, "worker-2")
+
+    assert await claim_session_shard(client, join_code, "worker-1", 60)
+    assert await claim_session_shard(client, join_code, "worker-1", 60)
+    assert not await claim_session_shard(client, join_code, "worker-2", 60)
+
+    assert await refresh_session_shards(client, [join_code], "worker-2", 60) == [join_code]
+    assert await refresh_session_shards(client, [join_code], "worker-1", 60) == []
+
+    # Seul le détenteur du bail peut le libérer
+    await release_session_shard(client, join_code, "worker-2")
+    assert not await claim_session_shard(client, join_code, "worker-2", 60)
+
+    await release_session_shard(client, join_code, "worker-1")
+    assert await claim_session_shard(client, join_code, "worker-2", 60)
+
+    await release_session_shard(client, join_code, "worker-2")
@@ -0,0 +1,41 @@
+from sae_backend.model.scoreboard import Scoreboard
+
+
+def test_scoreboard_ranking():
+    board = Scoreboard(max_score=3)
+
+    for user_id in (1, 2, 3):
+        board.add_player(user_id)
+
+    assert board.add(2) == 1
+    assert board.add(2) == 2
+    assert board.add(3) == 1
+
+    assert board.rank(2) == 1
+    assert board.rank(3) == 2
+    assert board.rank(1) == 3
+
+    assert board.ranking() == [
+        {"id_player": "2", "correctly_answered": 2},
+        {"id_player": "3", "correctly_answered": 1},
+        {"id_player": "1", "correctly_answered": 0},
+    ]
+    assert len(board.ranking(limit=2)) == 2
+
+
+def test_scoreboard_ties_and_bounds():
+    board = Scoreboard(max_score=2)
+
+    board.add(1)
+    board.add(2)
+    assert board.rank(1) == board.rank(2) == 1
+
+    # Le score reste entre 0 et le nombre de questions
+    assert board.add(1, 5) == 2
+    assert board.add(2, -3) == 0
+    assert board.rank(2) == 2
+
+    # Un participant déjà classé n'est pas remis à zéro
+    board.add_player(1)
+    assert board.score(1) == 2
+    assert len(board) == 2
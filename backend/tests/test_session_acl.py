@@ -0,0 +1,104 @@
+import pytest
+
+from sae_backend.model.database.async_ import crud
+from sae_backend.model.session_acl import (
+    get_cached_session_acl,
+    get_session_acl,
+    invalidate_session_acl,
+    load_session_acl,
+    mark_session_started,
+)
+
+from .utils.testing_data import get_ressource
+from .utils.testing_database import TestingAsyncSession
+
+
+@pytest.fixture
+def join_code() -> str:
+    return get_ressource("running_session_join_code")
+
+
+@pytest.fixture
+def nice_join_code() -> str:
+    return get_ressource("nice_session_join_code")
+
+
+@pytest.mark.asyncio
+async def test_public_session_acl(join_code: str):
+    async with TestingAsyncSession() as sess:
+        acl = await load_session_acl(sess, join_code)
+
+    assert acl is not None
+    assert acl.joinable
+    assert acl.is_owner("running.man@gmail.com")
+    assert not acl.is_owner("session.man2@gmail.com")
+    assert acl.can_join("session.man2@gmail.com")
+
+
+@pytest.mark.asyncio
+async def test_group_session_acl(nice_join_code: str):
+    async with TestingAsyncSession() as sess:
+        acl = await load_session_acl(sess, nice_join_code)
+
+    assert acl is not None
+    assert acl.is_owner("michael@michaelson.com")
+    assert acl.can_join("jonnhy@peterson.com")
+    assert not acl.can_join("session.man2@gmail.com")
+
+
+@pytest.mark.asyncio
+async def test_nested_group_session_acl():
+    async with TestingAsyncSession() as sess:
+        acl = await load_session_acl(sess, get_ressource("nested_session_join_code"))
+
+    assert acl is not None
+    assert acl.can_join("nested@student.com")
+    assert not acl.can_join("jonnhy@peterson.com")
+
+
+@pytest.mark.asyncio
+async def test_unknown_session_acl():
+    async with TestingAsyncSession() as sess:
+        assert await get_session_acl(sess, "FaK3C0de") is None
+
+    assert get_cached_session_acl("FaK3C0de") is None
+
+
+@pytest.mark.asyncio
+async def test_session_acl_cache(nice_join_code: str):
+    async with TestingAsyncSession() as sess:
+        acl = await get_session_acl(sess, nice_join_code)
+        assert acl is not None
+        assert await get_session_acl(sess, nice_join_code) is acl
+
+    assert get_cached_session_acl(nice_join_code) is acl
+
+    mark_session_started(nice_join_code)
+    assert not acl.joinable
+
+    invalidate_session_acl(nice_join_code)
+    assert get_cached_session_acl(nice_join_code) is None
+
+
+@pytest.mark.asyncio
+async def test_session_acl_invalidated_by_group_changes(nice_join_code: str):
+    async with TestingAsyncSession() as sess:
+        creator = await crud.get_user(sess, "michael@michaelson.com")
+        student = await crud.get_user(sess, "session.man2@gmail.com")
+        assert creator is not None and student is not None
+
+        acl = await get_session_acl(sess, nice_join_code)
+        assert acl is not None and not acl.can_join("session.man2@gmail.com")
+
+        # Nouveau membre du groupe autorisé : les droits en cache sont oubliés à la validation
+        assert await crud.add_user_to_group(sess, creator.id, student.id, get_ressource("auth_group_id"))
+        assert get_cached_session_acl(nice_join_code) is None
+
+        acl = await get_session_acl(sess, nice_join_code)
+        assert acl is not None and acl.can_join("session.man2@gmail.com")
+
+        assert await crud.remove_member(sess, get_ressource("auth_group_id"), creator.id, student.id)
+        assert get_cached_session_acl(nice_join_code) is None
+
+        acl = await get_session_acl(sess, nice_join_code)
+        assert acl is not None and not acl.can_join("session.man2@gmail.com")
@@ -0,0 +1,238 @@
+"""
+Evènements socket des sessions, sans serveur Socket.IO : les envois sont enregistrés au lieu d'être émis.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from sae_backend.controller.socket import session as socket_session
+from sae_backend.controller.socket.codes import (
+    ANSWER_DOES_NOT_EXIST,
+    ANSWER_SAVED,
+    NEXT_QUESTION,
+    NO_MORE_QUESTIONS,
+    SESSION_ENDS,
+    TIMED_SESSION,
+    WRONG_SHARD,
+)
+from sae_backend.controller.socket.session import SessionNamespace
+from sae_backend.model.database import operations
+from sae_backend.model.database.db_models import ParticipantProgress, QuestionType, SurveySessionType, UserAffiliation
+from sae_backend.model.config import settings
+from sae_backend.model.live_session import get_live_session
+from sae_backend.model.shard import NotSessionShard
+
+from .utils.testing_database import TestingSessionLocal
+
+OWNER_SID = "owner-sid"
+STUDENT_SID = "student-sid"
+STUDENT_EMAIL = "session.man@gmail.com"
+
+
+def _create_session(session_type: SurveySessionType) -> tuple[str, list[tuple[int, int]]]:
+    """
+    Session de deux questions QCM, chacune avec une bonne et une mauvaise réponse.
+    Renvoie son code et les ids (bonne réponse, mauvaise réponse) de chaque question.
+    """
+    with TestingSessionLocal() as db:
+        teacher = operations.get_user(db, "timed.prof@gmail.com") or operations.register_user(
+            db, "Timed", "Prof", "timed.prof@gmail.com", UserAffiliation.teacher
+        )
+        survey = operations.create_survey(db, teacher.id, "Events survey", "events")
+        answers = []
+        for i in range(2):
+            question = operations.create_question(db, teacher.id, QuestionType.single_answer, f"Question {i}", "")
+            right = operations.create_answer(db, teacher.id, question.id, "Oui", True)
+            wrong = operations.create_answer(db, teacher.id, question.id, "Non", False)
+            operations.add_question_to_survey(db, teacher.id, survey.id, question.id)
+            answers.append((right.id, wrong.id))  # type: ignore
+
+        template = operations.create_session_template(db, teacher.id, survey.id, "Events", session_type, None, True)
+        return operations.start_survey_session(db, teacher.id, template.id).join_code, answers  # type: ignore
+
+
+def _namespace(join_code: str, monkeypatch) -> SessionNamespace:
+    ns = SessionNamespace("/session")
+    ns.emitted = []  # type: ignore
+    # sid -> données de la connexion, le propriétaire de la session étant déjà connecté
+    owner = {"email": "timed.prof@gmail.com", "join_code": join_code, "is_owner": True}
+    ns.sessions = {OWNER_SID: owner}  # type: ignore
+
+    async def emit(event, data=None, **kwargs):
+        ns.emitted.append(event)  # type: ignore
+
+    async def get_session(sid):
+        return ns.sessions[sid]  # type: ignore
+
+    async def nothing(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(ns, "emit", emit)
+    monkeypatch.setattr(ns, "get_session", get_session)
+    monkeypatch.setattr(ns, "close_room", nothing)
+    monkeypatch.setattr(socket_session.redis_ops, "close_session", nothing)
+
+    return ns
+
+
+@pytest.fixture
+def timed_join_code() -> str:
+    return _create_session(SurveySessionType.auto_timer)[0]
+
+
+@pytest.fixture
+def namespace(timed_join_code, monkeypatch) -> SessionNamespace:
+    ns = _namespace(timed_join_code, monkeypatch)
+
+    yield ns
+
+    ns._timers.cancel(timed_join_code)
+    ns._idle_checks.cancel(timed_join_code)
+
+
+@pytest.mark.asyncio
+async def test_timed_session_deadline_and_owner(namespace, timed_join_code, monkeypatch):
+    # Démarrage par le propriétaire
+    assert await namespace.on_initiate_next_question(OWNER_SID) == NEXT_QUESTION
+    live = get_live_session(timed_join_code)
+    assert live is not None and live.current_index == 0
+
+    # Echéance et demande du propriétaire en même temps : une seule question passée
+    results = await asyncio.gather(
+        namespace._on_question_deadline(timed_join_code), namespace.on_initiate_next_question(OWNER_SID)
+    )
+    assert results[1] == TIMED_SESSION
+    assert live.current_index == 1
+    assert namespace.emitted.count("next_question") == 2  # type: ignore
+
+    # Dernière échéance et fin demandée par le propriétaire en même temps : résultats enregistrés une fois
+    saves = []
+    save_session_results = socket_session.pg_ops.save_session_results
+
+    async def counted_save(sess, join_code):
+        saves.append(join_code)
+        return await save_session_results(sess, join_code)
+
+    monkeypatch.setattr(socket_session.pg_ops, "save_session_results", counted_save)
+
+    results = await asyncio.gather(
+        namespace._on_question_deadline(timed_join_code), namespace.on_end_session(OWNER_SID)
+    )
+    assert results[1] == SESSION_ENDS
+    assert saves == [timed_join_code]
+    assert live.closed and get_live_session(timed_join_code) is None
+    assert namespace.emitted.count("session_end") == 1  # type: ignore
+
+    # Nouvelle demande de fin : rien n'est enregistré une seconde fois
+    assert await namespace.on_end_session(OWNER_SID) == SESSION_ENDS
+    assert saves == [timed_join_code]
+
+    await namespace.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_idle_session_evicted(namespace, timed_join_code, monkeypatch):
+    monkeypatch.setattr(settings, "LIVE_SESSION_IDLE_S", 60)
+
+    assert await namespace.on_initiate_next_question(OWNER_SID) == NEXT_QUESTION
+    live = get_live_session(timed_join_code)
+    assert live is not None
+    assert timed_join_code in namespace._idle_checks
+    namespace._timers.cancel(timed_join_code)
+
+    flushes = []
+    flush = live.flush
+
+    async def counted_flush():
+        flushes.append(True)
+        await flush()
+
+    monkeypatch.setattr(live, "flush", counted_flush)
+
+    # Session encore active : la vérification suivante est prévue
+    namespace._idle_checks.cancel(timed_join_code)
+    await namespace._on_idle_check(timed_join_code)
+    assert get_live_session(timed_join_code) is live
+    assert timed_join_code in namespace._idle_checks
+
+    # Aucun évènement depuis plus longtemps que le délai : l'état est écrit puis oublié, sans terminer la session
+    live.last_activity -= 120
+    await namespace._on_idle_check(timed_join_code)
+    assert flushes and live.closed
+    assert get_live_session(timed_join_code) is None
+    assert "session_end" not in namespace.emitted  # type: ignore
+
+    # Rechargée au prochain évènement, à la question où elle en était
+    assert await namespace.on_initiate_next_question(OWNER_SID) == TIMED_SESSION
+    reloaded = get_live_session(timed_join_code)
+    assert reloaded is not None and reloaded is not live
+    assert reloaded.current_index == 0
+
+    await namespace.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_evicted_free_session_resumes(monkeypatch):
+    join_code, answers = _create_session(SurveySessionType.auto_free)
+    namespace = _namespace(join_code, monkeypatch)
+    namespace.sessions[STUDENT_SID] = {"email": STUDENT_EMAIL, "join_code": join_code}  # type: ignore
+    monkeypatch.setattr(settings, "LIVE_SESSION_IDLE_S", 60)
+
+    assert await namespace.on_initiate_next_question(OWNER_SID) == NEXT_QUESTION
+
+    # Bonne réponse à la première question, puis passage à la seconde
+    assert await namespace.on_user_answer(STUDENT_SID, [answers[0][0]]) == ANSWER_SAVED
+    assert await namespace.on_next_free_question(STUDENT_SID) == NEXT_QUESTION
+
+    live = get_live_session(join_code)
+    assert live is not None
+    user_id = live.participants[STUDENT_EMAIL]
+
+    # Session oubliée après inactivité : rien n'est enregistré comme avancement final
+    live.last_activity -= 120
+    await namespace._on_idle_check(join_code)
+    assert get_live_session(join_code) is None
+    with TestingSessionLocal() as db:
+        stmt = select(ParticipantProgress).where(ParticipantProgress.session_id == live.session_id)
+        assert db.scalars(stmt).all() == []
+
+    # Rechargée d'après les réponses enregistrées : doublon refusé, score et avancement repris
+    assert await namespace.on_user_answer(STUDENT_SID, [answers[0][0]]) == ANSWER_DOES_NOT_EXIST
+    reloaded = get_live_session(join_code)
+    assert reloaded is not None and reloaded is not live
+    assert reloaded.scoreboard.score(user_id) == 1
+    assert reloaded.progress_summary()["at_question"] == [1, 0, 0]
+
+    # Réponse à la seconde question, déjà affichée avant l'oubli : elle n'est pas servie une seconde fois
+    assert await namespace.on_user_answer(STUDENT_SID, [answers[1][0]]) == ANSWER_SAVED
+    assert reloaded.scoreboard.score(user_id) == 2
+    assert await namespace.on_next_free_question(STUDENT_SID) == NO_MORE_QUESTIONS
+
+    assert await namespace.on_end_session(OWNER_SID) == SESSION_ENDS
+    assert reloaded.closed and get_live_session(join_code) is None
+    with TestingSessionLocal() as db:
+        progress = db.scalars(stmt).all()
+        assert [(p.user_id, p.completed, p.nb_questions) for p in progress] == [(user_id, 2, 2)]
+
+    await namespace.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_wrong_shard_on_every_handler(namespace, timed_join_code, monkeypatch):
+    # Session chargée par un autre processus : aucun gestionnaire ne la charge ici
+    async def claimed_elsewhere(join_code):
+        raise NotSessionShard(join_code)
+
+    monkeypatch.setattr(settings, "SOCKET_SHARDING", True)
+    monkeypatch.setattr(socket_session.shard_leases, "claim", claimed_elsewhere)
+    namespace.sessions[STUDENT_SID] = {"email": STUDENT_EMAIL, "join_code": timed_join_code}  # type: ignore
+
+    assert await namespace.on_initiate_next_question(OWNER_SID) == WRONG_SHARD
+    assert await namespace.on_get_scoreboard(OWNER_SID) == WRONG_SHARD
+    assert await namespace.on_get_progress(OWNER_SID) == WRONG_SHARD
+    assert await namespace.on_next_free_question(STUDENT_SID) == WRONG_SHARD
+    assert await namespace.on_user_answer(STUDENT_SID, [1]) == WRONG_SHARD
+    assert await namespace.on_user_open_answer(STUDENT_SID, 1, "mot") == WRONG_SHARD
+    assert await namespace.on_end_session(OWNER_SID) == WRONG_SHARD
+    assert get_live_session(timed_join_code) is None
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from sae_backend.model.session_scheduler import SessionScheduler
+
+
+@pytest.mark.asyncio
+async def test_deadlines_in_order():
+    fired: list[str] = []
+
+    async def on_deadline(join_code: str):
+        fired.append(join_code)
+
+    scheduler = SessionScheduler(on_deadline)
+    scheduler.schedule("late", 0.06)
+    scheduler.schedule("early", 0.02)
+    scheduler.schedule("middle", 0.04)
+    assert len(scheduler) == 3
+
+    await asyncio.sleep(0.15)
+
+    assert fired == ["early", "middle", "late"]
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_reschedule_and_cancel():
+    fired: list[str] = []
+
+    async def on_deadline(join_code: str):
+        fired.append(join_code)
+
+    scheduler = SessionScheduler(on_deadline)
+    scheduler.schedule("moved", 0.02)
+    scheduler.schedule("cancelled", 0.02)
+
+    # Seule la dernière échéance d'une session compte
+    scheduler.schedule("moved", 0.05)
+    scheduler.cancel("cancelled")
+    assert "moved" in scheduler and "cancelled" not in scheduler
+
+    await asyncio.sleep(0.035)
+    assert fired == []
+
+    await asyncio.sleep(0.05)
+    assert fired == ["moved"]
+
+
+@pytest.mark.asyncio
+async def test_many_sessions_one_task():
+    fired: list[str] = []
+
+    async def on_deadline(join_code: str):
+        fired.append(join_code)
+
+    scheduler = SessionScheduler(on_deadline)
+    tasks_before = len(asyncio.all_tasks())
+
+    for i in range(500):
+        scheduler.schedule(f"session{i}", 0.01 + (i % 10) / 1000)
+
+    # Une seule tâche attend toutes les échéances
+    assert len(asyncio.all_tasks()) == tasks_before + 1
+
+    await asyncio.sleep(0.1)
+    assert sorted(fired) == sorted(f"session{i}" for i in range(500))
+
+
+@pytest.mark.asyncio
+async def test_failing_callback_does_not_stop_scheduler():
+    fired: list[str] = []
+
+    async def on_deadline(join_code: str):
+        if join_code == "broken":
+            raise RuntimeError(join_code)
+        fired.append(join_code)
+
+    scheduler = SessionScheduler(on_deadline)
+    scheduler.schedule("broken", 0.01)
+    scheduler.schedule("ok", 0.02)
+
+    await asyncio.sleep(0.06)
+    assert fired == ["ok"]
+
+
+@pytest.mark.asyncio
+async def test_stop():
+    fired: list[str] = []
+    started = asyncio.Event()
+
+    async def on_deadline(join_code: str):
+        started.set()
+        await asyncio.sleep(0.02)
+        fired.append(join_code)
+
+    scheduler = SessionScheduler(on_deadline)
+    scheduler.schedule("running", 0)
+    scheduler.schedule("forgotten", 10)
+    await started.wait()
+
+    # L'appel en cours est attendu, l'échéance prévue est oubliée et la tâche arrêtée
+    await scheduler.stop()
+    assert fired == ["running"]
+    assert len(scheduler) == 0
+    assert asyncio.all_tasks() == {asyncio.current_task()}
@@ -0,0 +1,116 @@
+"""
+Démarrage des processus : l'import du paquet doit rester léger, et la construction de l'application
+ne doit ouvrir aucune connexion (elles sont ouvertes par le cycle de vie de l'application).
+"""
+import json
+import os
+import subprocess  # nosec
+import sys
+
+from fastapi.testclient import TestClient
+
+from sae_backend.application import create_app
+from sae_backend.model.database.connection import get_engine
+from sae_backend.model.database.migrations import HEAD, current_version
+
+# Budgets d'import, mesurés dans un processus neuf (comme un processus uvicorn qui redémarre) : le paquet seul,
+# et les modules des sessions avec leurs dépendances (SQLAlchemy), avec une marge pour les machines lentes
+IMPORT_BUDGET_S = 0.2
+SESSION_IMPORT_BUDGET_S = 2.0
+
+
+def _run(code: str, **env: str) -> dict:
+    """
+    Exécute du code dans un nouvel interpréteur et renvoie le JSON qu'il affiche en dernier.
+    """
+    out = subprocess.run(  # nosec
+        [sys.executable, "-c", code],
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _import_times(*modules: str) -> dict[str, float]:
+    """
+    Importe des modules dans un nouvel interpréteur avec -X importtime, et renvoie la durée cumulée
+    de l'import de chacun (avec ses dépendances), en secondes.
+    """
+    out = subprocess.run(  # nosec
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {module}" for module in modules)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(__file__)),
+    )
+
+    # Lignes "import time: <propre> | <cumulé> | <module>", durées en microsecondes
+    times = {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return {module: times[module] for module in modules}
+
+
+def test_package_import_is_light():
+    res = _run(
+        """
+import json, sys
+import sae_backend
+import sae_backend.model.live_session
+from sae_backend.model import redis_operations
+print(json.dumps({"modules": sorted(sys.modules), "redis_client": redis_operations._client is not None}))
+"""
+    )
+
+    # Aucune connexion créée à l'import
+    assert not res["redis_client"]
+
+    # Les modules des sessions ne construisent pas l'application
+    for module in ("sae_backend.application", "sae_backend.controller", "fastapi", "socketio", "cas"):
+        assert module not in res["modules"], module
+
+
+def test_package_import_budget():
+    times = _import_times("sae_backend", "sae_backend.model.live_session")
+
+    assert times["sae_backend"] < IMPORT_BUDGET_S, times
+    assert times["sae_backend.model.live_session"] < SESSION_IMPORT_BUDGET_S, times
+
+
+def test_create_app_does_not_connect():
+    # Base inaccessible et pilote PostgreSQL pas forcément installé : rien ne doit être ouvert à la construction
+    res = _run(
+        """
+import json, sys
+from sae_backend.application import create_app
+from sae_backend.model.database import connection
+from sae_backend.model.database import async_
+from sae_backend.model import redis_operations
+
+create_app()
+print(json.dumps({
+    "engine": connection._engine is not None,
+    "async_engine": async_._async_engine is not None,
+    "redis_client": redis_operations._client is not None,
+    "cas": "cas" in sys.modules,
+}))
+""",
+        IS_TESTING="",
+        POSTGRES_SERVER="db.invalid",
+    )
+
+    assert res == {"engine": False, "async_engine": False, "redis_client": False, "cas": False}
+
+
+def test_lifespan_checks_schema():
+    with TestClient(create_app()) as client:
+        assert client.get("/api/openapi.json").status_code == 200
+
+        with get_engine().connect() as conn:
+            assert current_version(conn) == HEAD
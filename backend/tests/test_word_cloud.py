@@ -0,0 +1,19 @@
+from sae_backend.model.word_cloud import WordFrequencies, normalize_word
+
+
+def test_normalize_word():
+    assert normalize_word("  Éléphant! ") == "elephant"
+    assert normalize_word("ÇA") == "ca"
+    assert normalize_word("«Straße»") == "strasse"
+    assert normalize_word(" ?! ") == ""
+
+
+def test_word_frequencies_top():
+    words = WordFrequencies()
+
+    for text in ("Café", "cafe", "CAFÉ ", "thé", "Eau", "eau", "..."):
+        words.add(text)
+
+    assert words.total == 6
+    assert words.top(2) == [{"text": "Café", "count": 3}, {"text": "Eau", "count": 2}]
+    assert len(words.top(10)) == 3
@@ -204,6 +204,24 @@ def populate_database(db: Session):
     )
     _add_ressource("results_testing_session_join_code", results_testing_session.join_code)
 
+    live_session = start_survey_session(db, running_session_user.id, running_session_template.id)  # type: ignore
+    _add_ressource("live_session_join_code", live_session.join_code)
+
+    query_plans_session = start_survey_session(db, running_session_user.id, running_session_template.id)  # type: ignore
+    _add_ressource("query_plans_session_join_code", query_plans_session.join_code)
+
+    free_session_template = create_session_template(
+        db,
+        running_session_user.id,
+        running_session_survey.id,
+        "Free session template",
+        SurveySessionType.auto_free,
+        None,
+        False,
+    )
+    free_session = start_survey_session(db, running_session_user.id, free_session_template.id)  # type: ignore
+    _add_ressource("free_session_join_code", free_session.join_code)
+
     # Groupes et modèles de sessions
     group_creator = register_user(db, "Group", "Creator", "michael@michaelson.com", UserAffiliation.teacher)
     group_user = register_user(db, "Mich", "dd", "jonnhy@peterson.com", UserAffiliation.student)
@@ -218,3 +236,18 @@ def populate_database(db: Session):
     )
     nice_session = start_survey_session(db, group_creator.id, nice_template.id)  # type: ignore
     _add_ressource("nice_session_join_code", nice_session.join_code)
+
+    # Groupe de groupes : un membre du sous-groupe peut rejoindre une session du groupe parent
+    parent_group = create_group(db, group_creator.id, "Parent group", None)
+    _add_ressource("parent_group_id", parent_group.id)
+    child_group = create_group(db, group_creator.id, "Child group", parent_group.id)
+    _add_ressource("child_group_id", child_group.id)
+
+    nested_user = register_user(db, "Nested", "Student", "nested@student.com", UserAffiliation.student)
+    add_user_to_group(db, group_creator.id, nested_user.id, child_group.id)
+
+    nested_template = create_session_template(
+        db, group_creator.id, fun_survey.id, "Nested template", SurveySessionType.piloted, parent_group.id, False
+    )
+    nested_session = start_survey_session(db, group_creator.id, nested_template.id)  # type: ignore
+    _add_ressource("nested_session_join_code", nested_session.join_code)
@@ -4,8 +4,8 @@ from sqlalchemy.pool import StaticPool
 
 from sae_backend import app
 from sae_backend.model.config import get_dsn
-from sae_backend.model.database import Base, get_db
-from sae_backend.model.database.async_ import AsyncScopedSession as TestingAsyncSession
+from sae_backend.model.database import Base
+from sae_backend.model.database.async_ import AsyncScopedSession as TestingAsyncSession, get_async_engine
 
 from .testing_data import populate_database
 
@@ -16,6 +16,10 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Moteur asyncrone des routes et des évènements socket, créé au démarrage de l'application en dehors des tests.
+# Il ouvre la même base en mémoire partagée que le moteur de test.
+get_async_engine()
+
 # Création du DDL
 Base.metadata.create_all(bind=engine)
 
@@ -24,14 +28,4 @@ with TestingSessionLocal() as db:
     populate_database(db)
 
 
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-app.dependency_overrides[get_db] = override_get_db
-
-__all__ = ["TestingAsyncSession"]
+__all__ = ["TestingAsyncSession", "TestingSessionLocal", "app"]
@@ -0,0 +1,39 @@
+"""
+Vérifications du contenu de la base de données pendant les tests : l'application ne relit pas les réponses
+enregistrées pendant une session (voir LiveSession), les tests si.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from sae_backend.model.database.db_models import Answer, Results, SurveySession, User
+
+
+def _results(email: str, join_code: str):
+    return (
+        select(func.count())
+        .select_from(Results)
+        .join(User, Results.user_id == User.id)
+        .join(SurveySession, Results.session_id == SurveySession.id)
+        .where(User.email == email)
+        .where(SurveySession.join_code == join_code)
+    )
+
+
+async def has_user_answered(sess: AsyncSession, email: str, join_code: str, question_id: int) -> bool:
+    """
+    Vérifie si un utilisateur a déjà répondu à une question (type QCM).
+    """
+    stmt = _results(email, join_code).join(Answer, Results.answer_id == Answer.id).where(
+        Answer.question_id == question_id
+    )
+    return (await sess.execute(stmt)).scalar_one() > 0
+
+
+async def has_user_participated(sess: AsyncSession, email: str, join_code: str) -> bool:
+    """
+    Vérifie si un utilisateur a déjà participé à une session.
+    """
+    return (await sess.execute(_results(email, join_code))).scalar_one() > 0
+
+
+__all__ = ["has_user_answered", "has_user_participated"]
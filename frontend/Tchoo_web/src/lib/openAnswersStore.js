@@ -2,12 +2,18 @@ import { reactive } from "vue"
 
 const openStore = reactive({
     openAnswers: new Array(),
+    // Questions en un mot : mots les plus fréquents ({ text, count }), calculés par le serveur
+    words: new Array(),
 
     addOpenAnswer(text) {
         this.openAnswers.push(text)
     },
+    setWords(words) {
+        this.words = words
+    },
     clear() {
         this.openAnswers.length = 0
+        this.words = []
     }
 })
 